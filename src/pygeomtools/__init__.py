@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 # note: do not load viewer module here, as it has quite large nested imports. see lazy loading below.
-from . import detectors, geometry, materials, utils, visualization
+from . import detectors, geometry, materials, snapshot, utils, visualization
 from ._version import version as __version__
 from .detectors import (
     RemageDetectorInfo,
@@ -12,7 +12,13 @@ from .detectors import (
     get_sensvol_metadata,
 )
 from .region import Region
-from .write import write_pygeom, write_pygeom_aux_only
+from .snapshot import load_snapshot, save_snapshot
+from .write import (
+    patch_pygeom_aux,
+    write_pygeom,
+    write_pygeom_aux_only,
+    write_pygeom_batch,
+)
 
 __all__ = [
     "Region",
@@ -25,12 +31,17 @@ __all__ = [
     "get_senstable_by_uid",
     "get_sensvol_by_uid",
     "get_sensvol_metadata",
+    "load_snapshot",
     "materials",
+    "patch_pygeom_aux",
+    "save_snapshot",
+    "snapshot",
     "utils",
     "viewer",  # lazy import!
     "visualization",
     "write_pygeom",
     "write_pygeom_aux_only",
+    "write_pygeom_batch",
 ]
 
 
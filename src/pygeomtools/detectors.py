@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import dataclasses
 import json
 import logging
 from collections.abc import Generator
@@ -106,11 +107,25 @@ def generate_detector_macro(registry: g4.Registry, filename: str) -> None:
 def write_detector_auxvals(registry: g4.Registry) -> None:
     """Append an auxiliary structure, storing the sensitive detector volume information.
 
+    If the structure has already been written by this function before, it is replaced
+    in place, so that the registry can be written again after changing detector info.
+
     .. note::
         see :doc:`../metadata` for a reference of the written structure.
     """
-    if _get_rmg_detector_aux(registry, raise_on_missing=False) is not None:
-        msg = "detector auxiliary structure already written"
+    existing = [
+        i
+        for i, aux in enumerate(registry.userInfo)
+        if aux.auxtype in (AUXKEY_DET, AUXKEY_DETMETA)
+    ]
+    if any(
+        not getattr(registry.userInfo[i], "pygeom_committed", False) for i in existing
+    ):
+        # the structure has been read from a file, and the detector info is not
+        # available on the physical volumes.
+        msg = (
+            "detector auxiliary structure already present in registry (read from GDML?)"
+        )
         raise RuntimeError(msg)
 
     written_pvs = set()
@@ -119,14 +134,16 @@ def write_detector_auxvals(registry: g4.Registry) -> None:
         lambda d: d[1].detector_type,
     )
 
-    meta_group_aux = Auxiliary(AUXKEY_DETMETA, "", registry)
+    meta_group_aux = Auxiliary(AUXKEY_DETMETA, "", registry, addRegistry=False)
+    new_auxs = [meta_group_aux]
 
     for key, group in group_it:
         if key not in get_args(get_type_hints(RemageDetectorInfo)["detector_type"]):
             msg = f"unknown detector_type {key}"
             raise RuntimeError(msg)
 
-        group_aux = Auxiliary(AUXKEY_DET, key, registry)
+        group_aux = Auxiliary(AUXKEY_DET, key, registry, addRegistry=False)
+        new_auxs.append(group_aux)
 
         for pv, det in group:
             if pv.copyNumber != 0:
@@ -153,6 +170,15 @@ def write_detector_auxvals(registry: g4.Registry) -> None:
                     Auxiliary(pv.name, json_meta, registry, addRegistry=False)
                 )
 
+    for aux in new_auxs:
+        aux.pygeom_committed = True
+
+    # replace the previously committed structure at the same position.
+    pos = existing[0] if existing else len(registry.userInfo)
+    for i in reversed(existing):
+        del registry.userInfo[i]
+    registry.userInfo[pos:pos] = new_auxs
+
 
 def check_detector_uniqueness(
     registry: g4.Registry, ignore_duplicate_uids: set[int] | None = None
@@ -203,13 +229,53 @@ def _get_rmg_detector_aux(
         msg = f"GDML missing {AUXKEY_DETMETA} auxval (not written by legend-pygeom-tools?)"
         raise RuntimeError(msg)
     assert len(auxs) == 1
+
+    if getattr(auxs[0], "pygeom_committed", False):
+        # the readers use the (possibly changed) info on the physical volumes.
+        return auxs[0]
+
+    pv_dets = {pv.name: (d.detector_type, d.uid) for pv, d in walk_detectors(registry)}
+    if pv_dets:
+        aux_dets = {
+            name: (d.detector_type, d.uid)
+            for name, d in _parse_detector_auxs(registry, auxs[0]).items()
+        }
+        if pv_dets != aux_dets:
+            msg = (
+                "detector info on the physical volumes differs from the detector "
+                "auxiliary structure in the registry (read from GDML?)"
+            )
+            raise RuntimeError(msg)
     return auxs[0]
 
 
+def _pv_detectors(registry: g4.Registry) -> dict[str, RemageDetectorInfo]:
+    """Get the detector info of a registry with a committed detector auxiliary
+    structure from the physical volumes, that might have been changed after the
+    structure has been committed."""
+    # same order as in the committed structure, see write_detector_auxvals.
+    detmapping = {}
+    for pv, det in sorted(walk_detectors(registry), key=lambda d: d[1].detector_type):
+        detmapping.setdefault(pv.name, det)
+    return detmapping
+
+
+def _with_loaded_metadata(det: RemageDetectorInfo) -> RemageDetectorInfo:
+    """Convert the metadata to the form it is loaded in from GDML."""
+    if det.metadata is None:
+        return det
+    metadata = AttrsDict(json.loads(json.dumps(det.metadata, sort_keys=True)))
+    return dataclasses.replace(det, metadata=metadata)
+
+
 def get_sensvol_metadata(registry: g4.Registry, name: str) -> AttrsDict | None:
     """Load metadata attached to the given sensitive volume (from GDML)."""
     meta_aux = _get_rmg_detector_aux(registry)
     assert meta_aux is not None
+    if getattr(meta_aux, "pygeom_committed", False):
+        det = _pv_detectors(registry).get(name)
+        return None if det is None else _with_loaded_metadata(det).metadata
+
     meta_auxs = [aux for aux in meta_aux.subaux if aux.auxtype == name]
     if meta_auxs == []:
         return None
@@ -223,6 +289,18 @@ def get_all_sensvols(
     """Load all registered sensitive detectors with their metadata (from GDML)."""
     meta_aux = _get_rmg_detector_aux(registry)
     assert meta_aux is not None
+    if getattr(meta_aux, "pygeom_committed", False):
+        return {
+            name: _with_loaded_metadata(det)
+            for name, det in _pv_detectors(registry).items()
+            if type_filter is None or det.detector_type == type_filter
+        }
+    return _parse_detector_auxs(registry, meta_aux, type_filter)
+
+
+def _parse_detector_auxs(
+    registry: g4.Registry, meta_aux: Auxiliary, type_filter: str | None = None
+) -> dict[str, RemageDetectorInfo]:
     meta_auxs = {
         aux.auxtype: AttrsDict(json.loads(aux.auxvalue)) for aux in meta_aux.subaux
     }
@@ -304,9 +382,6 @@ def __set_pygeom_active_detector(self, det_info: RemageDetectorInfo | None) -> N
         msg = "patched-in function called on wrong type"
         raise TypeError(msg)
     assert self.registry is not None
-    if _get_rmg_detector_aux(self.registry, raise_on_missing=False) is not None:
-        msg = "detector auxiliary structure already written"
-        raise RuntimeError(msg)
     self.__pygeom_active_detector = det_info
 
 
@@ -2,18 +2,27 @@
 
 from __future__ import annotations
 
+import dataclasses
+import hashlib
+import json
+import logging
 import re
 import warnings
 from collections import Counter
+from collections.abc import Iterable
 from typing import Literal
 
 import numpy as np
 import pint
 import pyg4ometry.geant4 as g4
 from pyg4ometry import geant4
+from pyg4ometry import transformation as g4trans
+from pyg4ometry.gdml import Defines as gdml_defines
+from pyg4ometry.gdml import Units as gdml_units
 
 from . import detectors
 
+log = logging.getLogger(__name__)
 u = pint.get_application_registry()
 
 
@@ -280,6 +289,1317 @@ def get_approximate_volume(lv: geant4.LogicalVolume) -> pint.Quantity:
     return (vol * u("mm**3")).to("m**3")
 
 
+def _evaluate_solid_parameter(solid: geant4.solid.SolidBase, var: str) -> tuple:
+    value = getattr(solid, var, None)
+    idx = solid.varNames.index(var)
+    unit = getattr(solid, solid.varUnits[idx]) if solid.varUnits[idx] else None
+    try:
+        return (solid.evaluateParameter(value), unit)
+    except Exception:  # noqa: BLE001
+        # some solids store parameters that cannot be evaluated generically.
+        return (repr(value), unit)
+
+
+def _evaluate_transformation(tra: list) -> tuple:
+    return tuple(tuple(float(v) for v in t.eval()) for t in tra)
+
+
+def _canonical_value(value) -> object:
+    """Convert (nested) pyg4ometry defines and expressions to plain python values."""
+    if isinstance(value, gdml_defines.Matrix):
+        return tuple(np.asarray(value.eval(), dtype=float).ravel().tolist())
+    if isinstance(value, gdml_defines.VectorBase):
+        return tuple(float(v) for v in value.eval())
+    if isinstance(value, gdml_defines.ScalarBase | gdml_defines.BasicExpression):
+        return value.eval()
+    if isinstance(value, list | tuple):
+        return tuple(_canonical_value(v) for v in value)
+    return value
+
+
+def get_solid_hash(solid: geant4.solid.SolidBase) -> str:
+    """Get a hash over the type and the evaluated parameters of the given solid.
+
+    Boolean solids include the hashes of their constituents and their relative
+    transformations. The solid name is not part of the hash, so two identically
+    parametrized solids have the same hash.
+    """
+    params: list[object] = [solid.type]
+
+    if isinstance(
+        solid, geant4.solid.Union | geant4.solid.Subtraction | geant4.solid.Intersection
+    ):
+        params += [
+            get_solid_hash(solid.obj1),
+            get_solid_hash(solid.obj2),
+            _evaluate_transformation(solid.tra2),
+        ]
+    elif isinstance(solid, geant4.solid.MultiUnion):
+        for obj, tra in zip(solid.objects, solid.transformations, strict=True):
+            params += [get_solid_hash(obj), _evaluate_transformation(tra)]
+    elif isinstance(solid, geant4.solid.Scaled):
+        params.append(get_solid_hash(solid.solid))
+        params += [_evaluate_solid_parameter(solid, var) for var in solid.varNames]
+    elif isinstance(solid, geant4.solid.TessellatedSolid):
+        params += [solid.meshtype, repr(solid.meshtess)]
+    elif isinstance(solid, geant4.solid.OpticalSurface):
+        params += [
+            solid.finish,
+            solid.model,
+            solid.osType,
+            str(solid.value),
+            sorted((k, _canonical_value(v)) for k, v in solid.properties.items()),
+        ]
+    else:
+        params += [
+            (var, *_evaluate_solid_parameter(solid, var))
+            for var in getattr(solid, "varNames", [])
+        ]
+
+    return hashlib.sha1(repr(params).encode(), usedforsecurity=False).hexdigest()
+
+
+def _phi_section_extent(
+    rmin: float, rmax: float, sphi: float, dphi: float
+) -> tuple[list[float], list[float]]:
+    """Get the x/y extent of an annular sector."""
+    if dphi >= 2 * np.pi:
+        return [-rmax, -rmax], [rmax, rmax]
+
+    phis = [sphi, sphi + dphi]
+    # the outer arc reaches its extreme values at the crossings with the axes.
+    phis_axis = [
+        k * np.pi / 2
+        for k in range(
+            int(np.floor(sphi / (np.pi / 2))),
+            int(np.ceil((sphi + dphi) / (np.pi / 2))) + 1,
+        )
+        if sphi <= k * np.pi / 2 <= sphi + dphi
+    ]
+    points = [(r * np.cos(p), r * np.sin(p)) for r in (rmin, rmax) for p in phis]
+    points += [(rmax * np.cos(p), rmax * np.sin(p)) for p in phis_axis]
+    points = np.array(points)
+    return list(points.min(axis=0)), list(points.max(axis=0))
+
+
+def _transform_extent(
+    extent: np.ndarray, matrix: np.ndarray, translation: np.ndarray
+) -> np.ndarray:
+    """Get the axis-aligned extent of the transformed bounding box ``extent``."""
+    corners = np.array(
+        [
+            [extent[i][0], extent[j][1], extent[k][2]]
+            for i in (0, 1)
+            for j in (0, 1)
+            for k in (0, 1)
+        ]
+    )
+    corners = corners @ np.asarray(matrix).T + np.asarray(translation)
+    return np.array([corners.min(axis=0), corners.max(axis=0)])
+
+
+def _solid_transformation(tra: list) -> tuple[np.ndarray, np.ndarray]:
+    """Convert a boolean solid transformation to a matrix and a translation.
+
+    Note
+    ----
+    In contrast to physical volume placements, the rotation is not inverted, as in
+    the meshing of boolean solids in pyg4ometry.
+    """
+    rot, pos = tra[0].eval(), tra[1].eval()
+    return g4trans.tbxyz2matrix(rot), np.array(pos)
+
+
+def _compute_solid_extent(solid: geant4.solid.SolidBase) -> np.ndarray:
+    """Compute the local extent of a solid, analytically where possible."""
+    t = solid.type
+
+    def p(var):
+        return solid.evaluateParameterWithUnits(var)
+
+    if t == "Box":
+        half = np.array([p("pX"), p("pY"), p("pZ")]) / 2
+        return np.array([-half, half])
+    if t in ("Tubs", "Cons"):
+        if t == "Tubs":
+            rmin, rmax = p("pRMin"), p("pRMax")
+        else:
+            rmin, rmax = min(p("pRmin1"), p("pRmin2")), max(p("pRmax1"), p("pRmax2"))
+        lo, hi = _phi_section_extent(rmin, rmax, p("pSPhi"), p("pDPhi"))
+        dz = p("pDz") / 2
+        return np.array([[*lo, -dz], [*hi, dz]])
+    if t == "Orb":
+        r = p("pRMax")
+        return np.array([[-r, -r, -r], [r, r, r]])
+    if t == "Sphere":
+        r = p("pRmax")
+        return np.array([[-r, -r, -r], [r, r, r]])
+    if t == "Polycone":
+        lo, hi = _phi_section_extent(
+            min(p("pRMin")), max(p("pRMax")), p("pSPhi"), p("pDPhi")
+        )
+        z = p("pZpl")
+        return np.array([[*lo, min(z)], [*hi, max(z)]])
+    if t == "GenericPolycone":
+        lo, hi = _phi_section_extent(min(p("pR")), max(p("pR")), p("pSPhi"), p("pDPhi"))
+        z = p("pZ")
+        return np.array([[*lo, min(z)], [*hi, max(z)]])
+    if t in ("Polyhedra", "GenericPolyhedra"):
+        dphi = p("pDPhi")
+        rmax = max(p("rOuter") if t == "Polyhedra" else p("pR"))
+        # the given radius is the distance to the sides, not to the corners.
+        rmax /= np.cos(dphi / (2 * int(p("numSide"))))
+        z = p("zPlane") if t == "Polyhedra" else p("pZ")
+        lo, hi = _phi_section_extent(0, rmax, p("pSPhi"), dphi)
+        return np.array([[*lo, min(z)], [*hi, max(z)]])
+    if t == "Trd":
+        dx = max(p("pX1"), p("pX2")) / 2
+        dy = max(p("pY1"), p("pY2")) / 2
+        dz = p("pZ") / 2
+        return np.array([[-dx, -dy, -dz], [dx, dy, dz]])
+    if t == "Torus":
+        rxy = p("pRtor") + p("pRmax")
+        rz = p("pRmax")
+        return np.array([[-rxy, -rxy, -rz], [rxy, rxy, rz]])
+    if t == "Ellipsoid":
+        a, b, c = p("pxSemiAxis"), p("pySemiAxis"), p("pzSemiAxis")
+        zlo, zhi = p("pzBottomCut"), p("pzTopCut")
+        zlo = max(-c, zlo) if zlo != 0 else -c
+        zhi = min(c, zhi) if zhi != 0 else c
+        return np.array([[-a, -b, zlo], [a, b, zhi]])
+    if t == "Paraboloid":
+        r = max(p("pR1"), p("pR2"))
+        dz = p("pDz") / 2
+        return np.array([[-r, -r, -dz], [r, r, dz]])
+    if t == "Hype":
+        dz = p("lenZ") / 2
+        r = np.sqrt(p("outerRadius") ** 2 + (dz * np.tan(p("outerStereo"))) ** 2)
+        return np.array([[-r, -r, -dz], [r, r, dz]])
+    if t == "ExtrudedSolid":
+        lunit = gdml_units.unit(solid.lunit)
+        polygon = np.array(solid.evaluateParameter(solid.pPolygon)) * lunit
+        points = []
+        for z, offset, scale in solid.pZslices:
+            xy = polygon * solid.evaluateParameter(scale)
+            xy += np.array(solid.evaluateParameter(offset)) * lunit
+            z = solid.evaluateParameter(z) * lunit  # noqa: PLW2901
+            points += [[*xy.min(axis=0), z], [*xy.max(axis=0), z]]
+        points = np.array(points)
+        return np.array([points.min(axis=0), points.max(axis=0)])
+    if t in ("Union", "Subtraction", "Intersection"):
+        ext1 = get_solid_extent(solid.obj1)
+        if t == "Subtraction":
+            return ext1
+        ext2 = _transform_extent(
+            get_solid_extent(solid.obj2), *_solid_transformation(solid.tra2)
+        )
+        if t == "Union":
+            return np.array(
+                [np.minimum(ext1[0], ext2[0]), np.maximum(ext1[1], ext2[1])]
+            )
+        return np.array([np.maximum(ext1[0], ext2[0]), np.minimum(ext1[1], ext2[1])])
+    if t == "MultiUnion":
+        exts = [
+            _transform_extent(get_solid_extent(obj), *_solid_transformation(tra))
+            for obj, tra in zip(solid.objects, solid.transformations, strict=True)
+        ]
+        return np.array(
+            [np.min([e[0] for e in exts], axis=0), np.max([e[1] for e in exts], axis=0)]
+        )
+    if t == "Scaled":
+        scale = np.diag([p("pX"), p("pY"), p("pZ")])
+        return _transform_extent(get_solid_extent(solid.solid), scale, np.zeros(3))
+
+    # fall back to the (slow) mesh for all other solid types.
+    vertices, _, _ = solid.mesh().toVerticesAndPolygons()
+    vertices = np.array(vertices)
+    return np.array([vertices.min(axis=0), vertices.max(axis=0)])
+
+
+def get_solid_extent(solid: geant4.solid.SolidBase) -> np.ndarray:
+    """Get the axis-aligned bounding box of the solid in its local frame.
+
+    The extent is calculated analytically for the common primitive solids and for
+    boolean solids, and falls back to the (slow) mesh for all other solid types. The
+    result is cached on the solid instance, and is recalculated only if the
+    :func:`parameter hash <get_solid_hash>` of the solid changed.
+
+    Returns
+    -------
+    array of shape ``(2, 3)`` with ``[[xmin, ymin, zmin], [xmax, ymax, zmax]]`` in mm.
+    """
+    solid_hash = get_solid_hash(solid)
+    cached = getattr(solid, "_pygeom_extent", None)
+    if cached is None or cached[0] != solid_hash:
+        cached = (solid_hash, _compute_solid_extent(solid))
+        solid._pygeom_extent = cached
+
+    return cached[1].copy()
+
+
+def get_extent(lv: geant4.LogicalVolume) -> np.ndarray:
+    """Get the axis-aligned bounding box of the logical volume's solid, in the local
+    frame of the logical volume.
+
+    See also
+    --------
+    get_solid_extent
+    """
+    return get_solid_extent(lv.solid)
+
+
+def _placement_transformation(
+    pv: geant4.PhysicalVolume,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Get the transformation from the daughter frame to the mother frame."""
+    matrix = np.linalg.inv(g4trans.tbxyz2matrix(pv.rotation.eval()))
+    if pv.scale is not None:
+        matrix = matrix @ np.diag(pv.scale.eval())
+    return matrix, np.array(pv.position.eval())
+
+
+def get_world_transformation(
+    pv: geant4.PhysicalVolume,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Get the transformation matrix and translation of the physical volume in the
+    world frame.
+
+    The chain of placements up to the world volume has to be unique, i.e. all mother
+    logical volumes have to be placed exactly once.
+    """
+    registry = pv.registry
+    world = registry.worldVolume
+    matrix, translation = _placement_transformation(pv)
+
+    mother = pv.motherVolume
+    while mother is not world:
+        placements = [
+            mpv
+            for mpv in registry.physicalVolumeDict.values()
+            if mpv.type == "placement" and mpv.logicalVolume is mother
+        ]
+        if len(placements) != 1:
+            msg = (
+                f"logical volume {mother.name} is placed {len(placements)} times, "
+                f"cannot determine world position of {pv.name}"
+            )
+            raise ValueError(msg)
+        mmatrix, mtranslation = _placement_transformation(placements[0])
+        matrix = mmatrix @ matrix
+        translation = mmatrix @ translation + mtranslation
+        mother = placements[0].motherVolume
+
+    return matrix, translation
+
+
+def get_world_extent(pv: geant4.PhysicalVolume) -> np.ndarray:
+    """Get the axis-aligned bounding box of the physical volume in the world frame.
+
+    See also
+    --------
+    get_solid_extent
+    get_world_transformation
+    """
+    return _transform_extent(
+        get_extent(pv.logicalVolume), *get_world_transformation(pv)
+    )
+
+
+_BOOLEAN_SOLIDS = ("Union", "Subtraction", "Intersection")
+
+
+def _solid_constituents(solid: geant4.solid.SolidBase) -> list[geant4.solid.SolidBase]:
+    if solid.type in _BOOLEAN_SOLIDS:
+        return [solid.obj1, solid.obj2]
+    if solid.type == "MultiUnion":
+        return list(solid.objects)
+    if solid.type == "Scaled":
+        return [solid.solid]
+    return []
+
+
+def get_boolean_depth(solid: geant4.solid.SolidBase) -> int:
+    """Get the nesting depth of boolean solids, i.e. 0 for a primitive solid, 1 for a
+    boolean of two primitives, 2 for a boolean of a boolean, ..."""
+    children = _solid_constituents(solid)
+    if children == []:
+        return 0
+    depth = max(get_boolean_depth(c) for c in children)
+    return depth if solid.type == "Scaled" else depth + 1
+
+
+def _count_primitives(solid: geant4.solid.SolidBase) -> int:
+    children = _solid_constituents(solid)
+    if children == []:
+        return 1
+    return sum(_count_primitives(c) for c in children)
+
+
+def _count_facets(solid: geant4.solid.SolidBase) -> int:
+    if solid.type == "TessellatedSolid":
+        if solid.meshtype == geant4.solid.TessellatedSolid.MeshType.Freecad:
+            return len(solid.meshtess[1])
+        return len(solid.meshtess)
+    return sum(_count_facets(c) for c in _solid_constituents(solid))
+
+
+def _imprinted_daughters(lv: geant4.LogicalVolume) -> list[geant4.PhysicalVolume]:
+    """Get the daughters of the volume as seen by Geant4, i.e. with assemblies
+    imprinted into the mother volume."""
+    daughters = []
+    for pv in lv.daughterVolumes:
+        if pv.logicalVolume.type == "assembly":
+            daughters.extend(_imprinted_daughters(pv.logicalVolume))
+        else:
+            daughters.append(pv)
+    return daughters
+
+
+def analyze_navigation_cost(registry: geant4.Registry):
+    """Analyze the geometry tree for structures that are known to slow down the Geant4
+    navigation.
+
+    For each logical volume in the tree below the world volume, the returned table
+    contains:
+
+    * ``daughters``: the number of direct daughter volumes (with assemblies imprinted),
+    * ``level``: the (maximum) depth in the volume tree, the world being at level 0,
+    * ``placements``: the number of times this volume is placed in the full tree,
+    * ``solid``: the type of the solid,
+    * ``boolean_depth``: the nesting depth of boolean solids (see
+      :func:`get_boolean_depth`),
+    * ``primitives``: the number of primitive solids making up a boolean solid,
+    * ``facets``: the number of facets of tessellated solids,
+    * ``cost``: a crude relative cost estimate, only meant for ranking the volumes.
+      It is calculated as the number of daughters, plus the number of placements
+      times the excess complexity of the solid (number of primitives beyond the first,
+      plus the number of facets).
+
+    The table is sorted by descending ``cost``, so that the worst offenders come first.
+
+    Returns
+    -------
+    a :class:`pandas.DataFrame`, indexed by logical volume name.
+    """
+    import pandas as pd
+
+    stats: dict[str, dict] = {}
+
+    def _walk(lv: geant4.LogicalVolume, level: int) -> None:
+        if lv.name not in stats:
+            solid = lv.solid
+            stats[lv.name] = {
+                "daughters": len(_imprinted_daughters(lv)),
+                "level": level,
+                "placements": 0,
+                "solid": solid.type,
+                "boolean_depth": get_boolean_depth(solid),
+                "primitives": _count_primitives(solid),
+                "facets": _count_facets(solid),
+            }
+        entry = stats[lv.name]
+        entry["level"] = max(entry["level"], level)
+        entry["placements"] += 1
+
+        for pv in _imprinted_daughters(lv):
+            if pv.type == "placement":
+                _walk(pv.logicalVolume, level + 1)
+
+    _walk(registry.worldVolume, 0)
+
+    for entry in stats.values():
+        solid_cost = entry["primitives"] - 1 + entry["facets"]
+        entry["cost"] = entry["daughters"] + entry["placements"] * solid_cost
+
+    table = pd.DataFrame.from_dict(stats, orient="index")
+    table.index.name = "name"
+    return table.sort_values("cost", ascending=False, kind="stable")
+
+
+def _flatten_union(
+    solid: geant4.solid.SolidBase, matrix: np.ndarray, translation: np.ndarray
+) -> list[tuple[geant4.solid.SolidBase, np.ndarray, np.ndarray]]:
+    """Get all constituents of a (nested) union, with their transformations relative to
+    the root solid."""
+    if solid.type != "Union":
+        return [(solid, matrix, translation)]
+
+    mat2, tra2 = _solid_transformation(solid.tra2)
+    return _flatten_union(solid.object1(), matrix, translation) + _flatten_union(
+        solid.object2(), matrix @ mat2, matrix @ tra2 + translation
+    )
+
+
+def _union_depth(solid: geant4.solid.SolidBase) -> int:
+    if solid.type != "Union":
+        return 0
+    return 1 + max(_union_depth(solid.object1()), _union_depth(solid.object2()))
+
+
+def _replace_solid_references(
+    registry: geant4.Registry, replace: dict[int, geant4.solid.SolidBase]
+) -> None:
+    """Replace all references to solids (keyed by their ``id()``) in the registry."""
+
+    def _get(solid):
+        return replace.get(id(solid), solid)
+
+    for lv in registry.logicalVolumeDict.values():
+        if lv.type == "logical":
+            lv.solid = _get(lv.solid)
+    for solid in registry.solidDict.values():
+        if solid.type in _BOOLEAN_SOLIDS:
+            solid.obj1 = _get(solid.obj1)
+            solid.obj2 = _get(solid.obj2)
+        elif solid.type == "MultiUnion":
+            solid.objects = [_get(o) for o in solid.objects]
+        elif solid.type == "Scaled":
+            solid.solid = _get(solid.solid)
+
+
+def convert_union_chains(
+    registry: geant4.Registry,
+    min_depth: int = 2,
+    check_volume: bool = True,
+    rtol: float = 1e-6,
+) -> dict[str, tuple[int, int]]:
+    """Replace chains of nested :class:`~pyg4ometry.geant4.solid.Union` solids by a
+    single :class:`~pyg4ometry.geant4.solid.MultiUnion` solid.
+
+    Geant4 evaluates nested boolean solids recursively, so that navigating long union
+    chains gets slow. A ``G4MultiUnion`` of the same constituents is evaluated with a
+    single level of nesting (and voxelizes its constituents).
+
+    The new solid keeps the name (and the position in the registry) of the outermost
+    union of the chain, and replaces all references to it in logical volumes and other
+    solids. Intermediate unions of the chain are removed from the registry, if they are
+    not used elsewhere.
+
+    Parameters
+    ----------
+    registry
+        the registry to process.
+    min_depth
+        the minimum nesting depth of unions to convert, i.e. the default of 2 converts
+        all unions that have at least one other union as constituent.
+    check_volume
+        check that the mesh volume of the new solid matches the volume of the union
+        chain, and raise a :class:`RuntimeError` otherwise. This can be slow for
+        complex solids.
+    rtol
+        relative tolerance for the volume check.
+
+    Returns
+    -------
+    a mapping of the converted solid names to their union nesting depth before the
+    conversion and to the number of constituents of the new solid.
+    """
+    solids = list(registry.solidDict.values())
+    union_children = {
+        id(c) for s in solids if s.type == "Union" for c in (s.object1(), s.object2())
+    }
+
+    converted = {}
+    intermediates = []
+    for root in solids:
+        if root.type != "Union" or id(root) in union_children:
+            continue
+        depth = _union_depth(root)
+        if depth < min_depth:
+            continue
+
+        parts = _flatten_union(root, np.identity(3), np.zeros(3))
+        transformations = [
+            [list(g4trans.matrix2tbxyz(m)), list(t)] for _, m, t in parts
+        ]
+        multi_union = geant4.solid.MultiUnion(
+            root.name,
+            [solid for solid, _, _ in parts],
+            transformations,
+            registry,
+            addRegistry=False,
+        )
+
+        if check_volume:
+            vol_before = root.mesh().volume()
+            vol_after = multi_union.mesh().volume()
+            if not np.isclose(vol_before, vol_after, rtol=rtol, atol=0):
+                msg = (
+                    f"volume of union {root.name} changed from {vol_before} to "
+                    f"{vol_after} mm^3 when converting to a multi-union"
+                )
+                raise RuntimeError(msg)
+
+        def _collect_intermediates(solid):
+            for c in (solid.object1(), solid.object2()):
+                if c.type == "Union":
+                    intermediates.append(c)
+                    _collect_intermediates(c)
+
+        _collect_intermediates(root)
+
+        # replace the solid in-place, to keep the order of the solids for writing.
+        registry.solidDict[root.name] = multi_union
+        _replace_solid_references(registry, {id(root): multi_union})
+
+        converted[root.name] = (depth, len(parts))
+        log.info(
+            "converted union chain %s (depth %d) into a multi-union of %d solids",
+            root.name,
+            depth,
+            len(parts),
+        )
+
+    # only remove intermediate unions that are not used anywhere else.
+    remove = {id(s) for s in intermediates}
+    changed = True
+    while changed:
+        used = {
+            id(lv.solid)
+            for lv in registry.logicalVolumeDict.values()
+            if lv.type == "logical"
+        }
+        for solid in registry.solidDict.values():
+            if id(solid) not in remove:
+                used |= {id(c) for c in _solid_constituents(solid)}
+        changed = bool(remove & used)
+        remove -= used
+    for solid in intermediates:
+        if id(solid) in remove:
+            registry.solidDict.pop(solid.name, None)
+
+    return converted
+
+
+def _auxiliary_key(aux) -> tuple:
+    return (
+        aux.auxtype,
+        aux.auxvalue,
+        aux.auxunit,
+        *sorted(map(_auxiliary_key, aux.subaux)),
+    )
+
+
+def _get_logical_volume_hash(lv: geant4.LogicalVolume) -> str:
+    """Get a hash of the solid, material and auxiliary data (including the color) of
+    a logical volume, without its name."""
+    h = hashlib.sha1()
+    h.update(get_solid_hash(lv.solid).encode())
+    h.update(repr(lv.material.name).encode())
+    h.update(repr(sorted(map(_auxiliary_key, lv.auxiliary))).encode())
+    color = getattr(lv, "pygeom_color_rgba", None)
+    if color is not None and color is not False:
+        color = tuple(float(c) for c in color)
+    h.update(repr(color).encode())
+    return h.hexdigest()
+
+
+def deduplicate_volumes(registry: geant4.Registry) -> dict[str, tuple[int, int]]:
+    """Merge identical solids and logical volumes into shared instances.
+
+    Solids are considered identical if their :func:`hashes <get_solid_hash>` are equal,
+    i.e. if they have the same type and parameters, regardless of their names. Logical
+    volumes without daughters are considered identical if their solids, materials,
+    auxiliary data and colors are identical.
+
+    For each set of identical objects, the first one in the registry is kept, and all
+    references to the others are replaced by it. The physical volumes (and thus also
+    their names and :attr:`detector assignments
+    <pyg4ometry.geant4.PhysicalVolume.pygeom_active_detector>`) are not changed.
+
+    Logical volumes with daughters, the world volume and volumes referenced by skin
+    surfaces or by :class:`regions <.region.Region>` are never merged.
+
+    Parameters
+    ----------
+    registry
+        the registry to process.
+
+    Returns
+    -------
+    a mapping of ``solids`` and ``logical_volumes`` to the object counts before and
+    after the deduplication.
+
+    See also
+    --------
+    .write.write_pygeom
+    """
+    # merge identical solids.
+    n_solids = len(registry.solidDict)
+    canonical_solids = {}
+    replace_solids = {}
+    for solid in registry.solidDict.values():
+        if solid.type == "OpticalSurface":
+            continue
+        canonical = canonical_solids.setdefault(get_solid_hash(solid), solid)
+        if canonical is not solid:
+            replace_solids[id(solid)] = canonical
+
+    if replace_solids:
+        _replace_solid_references(registry, replace_solids)
+        for name in [
+            n for n, s in registry.solidDict.items() if id(s) in replace_solids
+        ]:
+            del registry.solidDict[name]
+
+    # merge identical logical volumes, that do not have any daughters.
+    n_lvs = len(registry.logicalVolumeDict)
+    skin_lvs = {
+        id(s.volumeref)
+        for s in registry.surfaceDict.values()
+        if s.type == "skinsurface"
+    }
+    region_lvs = {
+        subaux.auxvalue
+        for aux in registry.userInfo
+        if aux.auxtype == "Region"
+        for subaux in aux.subaux
+        if subaux.auxtype == "volume"
+    }
+    canonical_lvs = {}
+    replace_lvs = {}
+    for lv in registry.logicalVolumeDict.values():
+        if (
+            lv.type != "logical"
+            or lv is registry.worldVolume
+            or len(lv.daughterVolumes) > 0
+            or id(lv) in skin_lvs
+            or lv.name in region_lvs
+        ):
+            continue
+        canonical = canonical_lvs.setdefault(_get_logical_volume_hash(lv), lv)
+        if canonical is not lv:
+            replace_lvs[id(lv)] = canonical
+
+    if replace_lvs:
+        mothers = [*registry.logicalVolumeDict.values()]
+        mothers += registry.assemblyVolumeDict.values()
+        for mother in mothers:
+            for pv in mother.daughterVolumes:
+                pv.logicalVolume = replace_lvs.get(
+                    id(pv.logicalVolume), pv.logicalVolume
+                )
+        for name in [
+            n for n, lv in registry.logicalVolumeDict.items() if id(lv) in replace_lvs
+        ]:
+            del registry.logicalVolumeDict[name]
+
+    reduction = {
+        "solids": (n_solids, len(registry.solidDict)),
+        "logical_volumes": (n_lvs, len(registry.logicalVolumeDict)),
+    }
+    log.info(
+        "deduplicated %d -> %d solids and %d -> %d logical volumes",
+        *reduction["solids"],
+        *reduction["logical_volumes"],
+    )
+    return reduction
+
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_]\w*")
+
+
+def _referenced_define_names(value, names: set[str]) -> None:
+    """Collect all names that might refer to defines, used in the given value."""
+    if isinstance(value, str):
+        names.update(_IDENTIFIER_RE.findall(value))
+    elif isinstance(value, gdml_defines.BasicExpression):
+        names.update(_IDENTIFIER_RE.findall(value.expressionString))
+    elif isinstance(value, gdml_defines.ScalarBase):
+        names.add(value.name)
+        _referenced_define_names(value.expression, names)
+    elif isinstance(value, gdml_defines.VectorBase):
+        names.add(value.name)
+        for c in (value.x, value.y, value.z):
+            _referenced_define_names(c, names)
+    elif isinstance(value, gdml_defines.Matrix):
+        names.add(value.name)
+        _referenced_define_names(list(value.values), names)
+    elif isinstance(value, list | tuple):
+        for v in value:
+            _referenced_define_names(v, names)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _referenced_define_names(v, names)
+
+
+def _serialized_size(registry: geant4.Registry, objects: dict[str, list]) -> int:
+    """Get the size of the GDML elements of the given objects, in bytes."""
+    from pyg4ometry import gdml
+
+    w = gdml.Writer()
+    w.registry = registry
+    # components that are still in use are not counted.
+    removed_materials = {m.name for m in objects["materials"]}
+    removed_solids = {s.name for s in objects["solids"]}
+    w.materials_written = [
+        n for n in registry.materialDict if n not in removed_materials
+    ]
+    w.solids_written = [n for n in registry.solidDict if n not in removed_solids]
+
+    for define in objects["defines"]:
+        w.writeDefine(define)
+    for material in objects["materials"]:
+        w.writeMaterial(material)
+    for solid in objects["solids"]:
+        w.writeSolid(solid)
+    for lv in objects["logical_volumes"]:
+        if lv.type == "logical":
+            w.writeLogicalVolume(lv)
+        elif lv.type == "assembly":
+            w.writeAssemblyVolume(lv)
+    for surface in objects["surfaces"]:
+        if surface.type == "bordersurface":
+            w.writeBorderSurface(surface)
+        elif surface.type == "skinsurface":
+            w.writeSkinSurface(surface)
+
+    return sum(
+        len(child.toprettyxml(indent="\t").encode())
+        for section in (w.defines, w.materials, w.solids, w.structure)
+        for child in section.childNodes
+    )
+
+
+def _used_defines(
+    registry: geant4.Registry,
+    solids: dict[int, geant4.solid.SolidBase],
+    materials: dict,
+    pvs: Iterable[geant4.PhysicalVolume],
+) -> set[str]:
+    """Get the names of all defines used by the given objects, including all defines
+    these depend on.
+
+    ``solids`` and ``materials`` (mappings of object ids to objects) are extended in
+    place by the constituents of boolean solids and by the material components.
+    """
+    define_names = set()
+    todo = list(solids.values())
+    while todo:
+        solid = todo.pop()
+        _referenced_define_names(
+            [v for v in vars(solid).values() if not isinstance(v, geant4.Registry)],
+            define_names,
+        )
+        for c in _solid_constituents(solid):
+            if id(c) not in solids:
+                solids[id(c)] = c
+                todo.append(c)
+
+    todo = list(materials.values())
+    while todo:
+        material = todo.pop()
+        _referenced_define_names(getattr(material, "properties", {}), define_names)
+        for comp in getattr(material, "components", []):
+            if id(comp[0]) not in materials:
+                materials[id(comp[0])] = comp[0]
+                todo.append(comp[0])
+
+    for pv in pvs:
+        for attr in ("position", "rotation", "scale"):
+            _referenced_define_names(getattr(pv, attr, None), define_names)
+        if pv.type != "placement":
+            _referenced_define_names(
+                [v for k, v in vars(pv).items() if k not in ("registry",)], define_names
+            )
+
+    # defines can depend on other defines.
+    todo = [n for n in define_names if n in registry.defineDict]
+    defines = set(todo)
+    while todo:
+        names = set()
+        _referenced_define_names(registry.defineDict[todo.pop()], names)
+        for name in names:
+            if name in registry.defineDict and name not in defines:
+                defines.add(name)
+                todo.append(name)
+
+    return defines
+
+
+def prune_registry(registry: geant4.Registry) -> dict[str, tuple[int, int] | int]:
+    """Remove all objects from the registry, that are not used by the geometry.
+
+    All objects reachable from the world volume are kept, i.e. the logical and physical
+    volumes of the volume tree, their solids (including all constituents of boolean
+    solids) and materials (including all components), border and skin surfaces
+    between the kept volumes with their optical surfaces, and all defines used by any
+    of these objects. All other defines, materials, elements, isotopes, solids,
+    optical surfaces, volumes and surfaces are removed from the registry.
+
+    .. note::
+        This is intended to be run directly before writing the geometry, e.g. with
+        ``prune=True`` in :func:`.write.write_pygeom`. Objects that are removed but
+        cached elsewhere (e.g. materials of a :class:`.materials.BaseMaterialRegistry`)
+        should not be used afterwards.
+
+    Parameters
+    ----------
+    registry
+        the registry to process.
+
+    Returns
+    -------
+    a mapping of ``defines``, ``materials``, ``solids``, ``logical_volumes``,
+    ``physical_volumes`` and ``surfaces`` to the object counts before and after
+    pruning, and ``bytes`` to the approximate size of the removed objects in GDML.
+
+    See also
+    --------
+    .write.write_pygeom
+    """
+    lvs, pvs, solids, materials = {}, {}, {}, {}
+
+    volumes = [registry.worldVolume]
+    while volumes:
+        lv = volumes.pop()
+        if id(lv) in lvs:
+            continue
+        lvs[id(lv)] = lv
+        if lv.type == "logical":
+            solids[id(lv.solid)] = lv.solid
+            materials[id(lv.material)] = lv.material
+        for pv in lv.daughterVolumes:
+            pvs[id(pv)] = pv
+            volumes.append(pv.logicalVolume)
+
+    surfaces = {}
+    for surface in registry.surfaceDict.values():
+        if surface.type == "skinsurface":
+            used = id(surface.volumeref) in lvs
+        else:
+            used = id(surface.physref1) in pvs and id(surface.physref2) in pvs
+        if used:
+            surfaces[id(surface)] = surface
+            solids[id(surface.surface_property)] = surface.surface_property
+
+    defines = _used_defines(registry, solids, materials, pvs.values())
+
+    removed = {
+        "defines": [d for n, d in registry.defineDict.items() if n not in defines],
+        "materials": [
+            m for m in registry.materialDict.values() if id(m) not in materials
+        ],
+        "solids": [s for s in registry.solidDict.values() if id(s) not in solids],
+        "logical_volumes": [
+            lv
+            for lv in [
+                *registry.logicalVolumeDict.values(),
+                *registry.assemblyVolumeDict.values(),
+            ]
+            if id(lv) not in lvs
+        ],
+        "physical_volumes": [
+            pv for pv in registry.physicalVolumeDict.values() if id(pv) not in pvs
+        ],
+        "surfaces": [s for s in registry.surfaceDict.values() if id(s) not in surfaces],
+    }
+    saved_bytes = _serialized_size(registry, removed)
+
+    counts = {}
+    for key, store in (
+        ("defines", [registry.defineDict]),
+        ("materials", [registry.materialDict]),
+        ("solids", [registry.solidDict]),
+        ("logical_volumes", [registry.logicalVolumeDict, registry.assemblyVolumeDict]),
+        ("physical_volumes", [registry.physicalVolumeDict]),
+        ("surfaces", [registry.surfaceDict]),
+    ):
+        before = sum(len(d) for d in store)
+        removed_ids = {id(o) for o in removed[key]}
+        for d in store:
+            for name in [n for n, o in d.items() if id(o) in removed_ids]:
+                del d[name]
+        counts[key] = (before, sum(len(d) for d in store))
+    counts["bytes"] = saved_bytes
+
+    log.info(
+        "pruned %d unused objects (%d bytes of GDML)",
+        sum(before - after for before, after in list(counts.values())[:-1]),
+        saved_bytes,
+    )
+    return counts
+
+
+def _material_key(material) -> tuple:
+    key = [
+        material.name,
+        material.type,
+        getattr(material, "state", None),
+        getattr(material, "density", None),
+    ]
+    for attr in ("atomic_number", "atomic_weight", "symbol", "Z", "A", "N", "a"):
+        key.append(getattr(material, attr, None))
+    key += [
+        sorted((c[0].name, _canonical_value(c[1]), c[2:]) for c in material.components),
+        sorted(
+            (k, _canonical_value(v))
+            for k, v in getattr(material, "properties", {}).items()
+        ),
+        sorted(getattr(material, "_state_variables", {}).items(), key=repr),
+    ]
+    return tuple(key)
+
+
+def _physical_volume_key(pv: geant4.PhysicalVolume, auxiliary: bool = True) -> tuple:
+    key = [pv.name, pv.type, pv.logicalVolume.name]
+    if pv.type == "placement":
+        key += [
+            _canonical_value(pv.position),
+            _canonical_value(pv.rotation),
+            _canonical_value(pv.scale) if pv.scale is not None else None,
+            int(float(pv.copyNumber)),
+        ]
+    else:
+        # replica, division or parametrised volumes.
+        key.append(
+            sorted(
+                (k, repr(_canonical_value(v)))
+                for k, v in vars(pv).items()
+                if k not in ("logicalVolume", "motherVolume", "registry")
+            )
+        )
+    if auxiliary:
+        det = pv.get_pygeom_active_detector()
+        # the order of the keys in the metadata is not relevant.
+        key.append(
+            None
+            if det is None
+            else json.dumps(dataclasses.asdict(det), sort_keys=True, default=str)
+        )
+    return tuple(key)
+
+
+def get_registry_hash(registry: geant4.Registry, auxiliary: bool = True) -> str:
+    """Get a deterministic hash over the contents of a registry.
+
+    The hash covers all named objects that end up in a GDML file, i.e. defines,
+    materials, solids (and optical surfaces), logical volumes with their auxiliary data
+    and colors, physical volumes with their transformations and detector info, border
+    and skin surfaces and the user info. It does not depend on the order of insertion
+    of the objects into the registry, or the order of daughter volumes.
+
+    Only the volume tree below the world volume is considered.
+
+    Parameters
+    ----------
+    registry
+        the registry to hash.
+    auxiliary
+        if ``False``, do not include the user info, the auxiliary data and colors of
+        logical volumes and the detector info, i.e. all data that can be replaced with
+        :func:`.write.patch_pygeom_aux`.
+
+    See also
+    --------
+    .write.write_pygeom
+    """
+    entries = []
+
+    def _add(kind, key):
+        entries.append(repr((kind, key)))
+
+    for define in registry.defineDict.values():
+        _add("define", (define.name, type(define).__name__, _canonical_value(define)))
+    for material in registry.materialDict.values():
+        _add("material", _material_key(material))
+
+    # only consider the volumes used in the world volume tree.
+    seen = set()
+    volumes = [registry.worldVolume]
+    while volumes:
+        lv = volumes.pop()
+        if id(lv) in seen:
+            continue
+        seen.add(id(lv))
+
+        key = [lv.name, lv.type]
+        if lv.type == "logical":
+            key += [lv.material.name, lv.solid.name, get_solid_hash(lv.solid)]
+            key.append(_material_key(lv.material))
+            if auxiliary:
+                key.append(sorted(map(_auxiliary_key, lv.auxiliary)))
+                color = getattr(lv, "pygeom_color_rgba", None)
+                if color is not None and color is not False:
+                    color = tuple(float(c) for c in color)
+                key.append(color)
+        key.append(
+            sorted(_physical_volume_key(pv, auxiliary) for pv in lv.daughterVolumes)
+        )
+        _add("volume", tuple(key))
+
+        volumes.extend(pv.logicalVolume for pv in lv.daughterVolumes)
+
+    for solid in registry.solidDict.values():
+        _add("solid", (solid.name, get_solid_hash(solid)))
+    for surface in registry.surfaceDict.values():
+        if surface.type == "skinsurface":
+            refs = (surface.volumeref.name,)
+        else:
+            refs = (surface.physref1.name, surface.physref2.name)
+        _add(
+            "surface", (surface.name, surface.type, surface.surface_property.name, refs)
+        )
+    if auxiliary:
+        for aux in registry.userInfo:
+            _add("userinfo", _auxiliary_key(aux))
+
+    h = hashlib.sha256()
+    for entry in sorted(entries):
+        h.update(entry.encode())
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def _placed_extent(pv: geant4.PhysicalVolume) -> np.ndarray:
+    """Get the axis-aligned bounding box of the physical volume in the mother frame."""
+    lv = pv.logicalVolume
+    if lv.type == "assembly":
+        extents = [_placed_extent(dv) for dv in lv.daughterVolumes]
+        extent = np.array(
+            [
+                np.min([e[0] for e in extents], axis=0),
+                np.max([e[1] for e in extents], axis=0),
+            ]
+        )
+    else:
+        extent = get_extent(lv)
+    return _transform_extent(extent, *_placement_transformation(pv))
+
+
+def _extents_intersect(a: np.ndarray, b: np.ndarray) -> bool:
+    return bool(np.all(a[0] < b[1]) and np.all(b[0] < a[1]))
+
+
+def _is_inside_solid(
+    solid: geant4.solid.SolidBase, inner: geant4.solid.SolidBase, position: np.ndarray
+) -> bool:
+    """Check whether the solid ``inner``, placed at ``position`` is fully contained in
+    ``solid``, based on the meshes."""
+    if solid.type == "Box":
+        mother = get_solid_extent(solid)
+        extent = get_solid_extent(inner) + position
+        return bool(np.all(extent[0] >= mother[0]) and np.all(extent[1] <= mother[1]))
+
+    mesh = inner.mesh().clone()
+    mesh.translate(list(position))
+    protrusion = mesh.subtract(solid.mesh())
+    return protrusion.volume() <= 1e-9 * mesh.volume()
+
+
+def _bisect_daughters(idx: np.ndarray, centers: np.ndarray) -> list[np.ndarray]:
+    """Split the daughter indices at the median along the axis of largest spread."""
+    pts = centers[idx]
+    axis = np.argmax(pts.max(axis=0) - pts.min(axis=0))
+    order = idx[np.argsort(pts[:, axis], kind="stable")]
+    half = len(order) // 2
+    return [order[:half], order[half:]]
+
+
+def _unique_name(name: str, *existing: dict) -> str:
+    idx = 0
+    unique = name
+    while any(unique in names for names in existing):
+        unique = f"{name}_{idx}"
+        idx += 1
+    return unique
+
+
+def group_daughters(
+    lv: geant4.LogicalVolume,
+    max_daughters: int = 16,
+    envelope: Literal["box", "tubs"] = "box",
+    margin: float = 0.01,
+) -> list[geant4.LogicalVolume]:
+    """Group the daughters of a logical volume spatially into new intermediate mother
+    volumes (envelopes).
+
+    Mother volumes with a long, flat list of daughters are expensive to navigate for
+    Geant4. This function clusters the daughters by recursive bisection of their
+    positions, and places each cluster into a new envelope volume (a box or a
+    cylinder made of the material of ``lv``) that has at most ``max_daughters``
+    daughters.
+
+    The existing physical volume instances are moved into the envelopes, so that their
+    names, world positions, attached :class:`.RemageDetectorInfo` and border surfaces
+    toward the mother volume are preserved. The positions of moved daughters are
+    replaced by numeric values, i.e. references to position defines are lost.
+
+    Border surfaces between the mother and the moved daughters are copied, so that
+    they are also defined toward the envelopes. Skin surfaces of the mother volume are
+    copied to the envelope volumes, so that they still cover the boundaries toward the
+    moved daughters. As the envelopes are made of the material of the mother, Geant4
+    does not apply any optical surface at the boundaries between the envelopes and the
+    mother.
+
+    An envelope is only created if it does not intersect any other daughter volume or
+    envelope (based on bounding boxes) and is fully contained in the mother solid;
+    otherwise its daughters are split further, or left in place.
+
+    Parameters
+    ----------
+    lv
+        the mother logical volume to restructure.
+    max_daughters
+        the maximum number of daughters for each created envelope.
+    envelope
+        the solid type of the envelopes, ``box`` or ``tubs`` (cylinder along z).
+    margin
+        the minimal distance (in mm) between the bounding boxes of the daughters and
+        the envelope surface.
+
+    Returns
+    -------
+    the list of created envelope logical volumes. These are hidden in the
+    visualization.
+    """
+    registry = lv.registry
+
+    candidates = [
+        pv
+        for pv in lv.daughterVolumes
+        if pv.type == "placement" and pv.logicalVolume.type == "logical"
+    ]
+    if len(candidates) <= max_daughters:
+        return []
+
+    if any(pv.type != "placement" for pv in lv.daughterVolumes):
+        log.warning("cannot group daughters of %s with replica volumes", lv.name)
+        return []
+
+    extents = np.array([_placed_extent(pv) for pv in candidates])
+    centers = extents.mean(axis=1)
+    obstacles = [
+        _placed_extent(pv) for pv in lv.daughterVolumes if pv not in candidates
+    ]
+
+    mother_pvs = [
+        pv
+        for pv in registry.physicalVolumeDict.values()
+        if pv.type == "placement" and pv.logicalVolume is lv
+    ]
+
+    skin_surfaces = [
+        s
+        for s in registry.surfaceDict.values()
+        if isinstance(s, geant4.SkinSurface) and s.volumeref is lv
+    ]
+
+    envelopes = []
+
+    def _make_envelope(idx: np.ndarray) -> bool:
+        lo = extents[idx, 0].min(axis=0) - margin
+        hi = extents[idx, 1].max(axis=0) + margin
+        center = (lo + hi) / 2
+        name = _unique_name(
+            f"{lv.name}_group{len(envelopes)}",
+            registry.solidDict,
+            registry.logicalVolumeDict,
+            registry.physicalVolumeDict,
+        )
+
+        if envelope == "box":
+            solid = geant4.solid.Box(name, *(hi - lo), registry, addRegistry=False)
+        elif envelope == "tubs":
+            corners = np.array(
+                [
+                    [e[i][0], e[j][1]]
+                    for e in extents[idx]
+                    for i in (0, 1)
+                    for j in (0, 1)
+                ]
+            )
+            r = np.max(np.linalg.norm(corners - center[:2], axis=1)) + margin
+            solid = geant4.solid.Tubs(
+                name, 0, r, hi[2] - lo[2], 0, 2 * np.pi, registry, addRegistry=False
+            )
+        else:
+            msg = f"unknown envelope type {envelope}"
+            raise ValueError(msg)
+
+        env_extent = get_solid_extent(solid) + center
+        members = set(idx.tolist())
+        others = [e for i, e in enumerate(extents) if i not in members]
+        if any(_extents_intersect(env_extent, e) for e in others + obstacles):
+            return False
+        if not _is_inside_solid(lv.solid, solid, center):
+            return False
+
+        registry.addSolid(solid)
+        env_lv = geant4.LogicalVolume(solid, lv.material, name, registry)
+        env_lv.pygeom_color_rgba = False
+        env_pv = geant4.PhysicalVolume(
+            [0, 0, 0], list(center), env_lv, name, lv, registry
+        )
+
+        for i in idx:
+            pv = candidates[i]
+            lv.daughterVolumes.remove(pv)
+            lv._daughterVolumesDict.pop(pv.name, None)
+            pos = np.array(pv.position.eval()) - center
+            pv.position = gdml_defines.Position(
+                _unique_name(f"{pv.name}_pos", registry.defineDict),
+                *pos,
+                "mm",
+                registry,
+                False,
+            )
+            pv.motherVolume = env_lv
+            env_lv.add(pv)
+
+        _copy_border_surfaces(
+            registry, mother_pvs, env_pv, [candidates[i] for i in idx]
+        )
+        for surf in skin_surfaces:
+            geant4.SkinSurface(
+                f"{surf.name}_{name}", env_lv, surf.surface_property, registry
+            )
+
+        obstacles.append(env_extent)
+        envelopes.append(env_lv)
+        return True
+
+    def _group(idx: np.ndarray) -> None:
+        if len(idx) <= 1:
+            return
+        if len(idx) <= max_daughters and _make_envelope(idx):
+            return
+        for part in _bisect_daughters(idx, centers):
+            _group(part)
+
+    _group(np.arange(len(candidates)))
+
+    log.info(
+        "grouped %d daughters of %s into %d envelopes",
+        sum(len(e.daughterVolumes) for e in envelopes),
+        lv.name,
+        len(envelopes),
+    )
+    return envelopes
+
+
+def _copy_border_surfaces(
+    registry: geant4.Registry,
+    mother_pvs: list[geant4.PhysicalVolume],
+    env_pv: geant4.PhysicalVolume,
+    members: list[geant4.PhysicalVolume],
+) -> None:
+    """Copy border surfaces between the mother volume and moved daughters, so that they
+    are also defined toward the new envelope volume."""
+    for surf in list(registry.surfaceDict.values()):
+        if not isinstance(surf, geant4.BorderSurface):
+            continue
+        if surf.physref1 in mother_pvs and surf.physref2 in members:
+            refs = (env_pv, surf.physref2)
+        elif surf.physref2 in mother_pvs and surf.physref1 in members:
+            refs = (surf.physref1, env_pv)
+        else:
+            continue
+        geant4.BorderSurface(
+            f"{surf.name}_{env_pv.name}", *refs, surf.surface_property, registry
+        )
+
+
 def print_volumes(
     registry: g4.Registry,
     which: Literal["logical" | "physical" | "detector"],
@@ -0,0 +1,121 @@
+"""Binary snapshots of registries, for fast reloading without parsing GDML."""
+
+from __future__ import annotations
+
+import copyreg
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import ClassVar
+
+from pyg4ometry import geant4
+from pyg4ometry.geant4._Material import getNistMaterialList
+from pyg4ometry.pycgal.core import CSG as CgalCSG
+from pyg4ometry.pycsg.core import CSG as PyCSG
+from pyg4ometry.visualisation import Mesh
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"PYGEOMTOOLS-SNAPSHOT\n"
+_SNAPSHOT_VERSION = 1
+
+
+def _restore_dict_keys(keys: list):
+    return dict.fromkeys(keys).keys()
+
+
+def _reduce_dict_keys(keys):
+    # all pyg4ometry materials hold a reference to the same list of NIST materials.
+    if keys is getNistMaterialList():
+        return getNistMaterialList, ()
+    return _restore_dict_keys, (list(keys),)
+
+
+def _no_mesh() -> None:
+    return None
+
+
+class _SnapshotPickler(pickle.Pickler):
+    dispatch_table: ClassVar[dict] = {
+        **copyreg.dispatch_table,
+        type({}.keys()): _reduce_dict_keys,
+        # meshes contain native objects that cannot be pickled.
+        Mesh: lambda _: (_no_mesh, ()),
+        CgalCSG: lambda _: (_no_mesh, ()),
+        PyCSG: lambda _: (_no_mesh, ()),
+    }
+
+
+def save_snapshot(registry: geant4.Registry, path: str | os.PathLike) -> None:
+    """Store a binary snapshot of the full registry.
+
+    The snapshot contains all objects of the registry, including the annotations used
+    by *legend-pygeom-tools*, i.e. detector info, colors, regions and optical
+    surfaces. In contrast to GDML files, snapshots can only be loaded with the same
+    (or a compatible) version of pyg4ometry and *legend-pygeom-tools*.
+
+    The visualization meshes of the logical volumes are not stored.
+
+    .. warning::
+        Snapshots are stored using :mod:`pickle`. Only load snapshots from trusted
+        sources.
+
+    See also
+    --------
+    load_snapshot
+    """
+    from . import __version__
+
+    with Path(path).open("wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        _SnapshotPickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(
+            {
+                "version": _SNAPSHOT_VERSION,
+                "pygeomtools": __version__,
+                "registry": registry,
+            }
+        )
+
+
+def is_snapshot(path: str | os.PathLike) -> bool:
+    """Check if the given file is a registry snapshot."""
+    with Path(path).open("rb") as f:
+        return f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+
+
+def load_snapshot(path: str | os.PathLike, mesh: bool = False) -> geant4.Registry:
+    """Load a registry from a snapshot created with :func:`save_snapshot`.
+
+    Parameters
+    ----------
+    path
+        the snapshot file to load.
+    mesh
+        generate the visualization meshes of all logical volumes, with the current
+        pyg4ometry mesh settings. By default, no meshes are created, in contrast to
+        :class:`pyg4ometry.gdml.Reader`.
+
+    .. warning::
+        Snapshots are stored using :mod:`pickle`. Only load snapshots from trusted
+        sources.
+    """
+    with Path(path).open("rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            msg = f"{path} is not a registry snapshot"
+            raise RuntimeError(msg)
+        snapshot = pickle.load(f)
+
+    if snapshot.get("version") != _SNAPSHOT_VERSION:
+        msg = f"unsupported snapshot version {snapshot.get('version')} in {path}"
+        raise RuntimeError(msg)
+
+    log.debug(
+        "loaded snapshot %s written by pygeomtools %s", path, snapshot["pygeomtools"]
+    )
+    registry = snapshot["registry"]
+    if mesh:
+        for lv in registry.logicalVolumeDict.values():
+            if lv.type == "logical":
+                lv.reMesh()
+    return registry
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import gzip
 import logging
+import lzma
+import os
 from collections.abc import Callable
+from pathlib import Path
+from typing import IO
+from xml.dom import minidom
 
 from dbetto import AttrsDict, utils
+from pyg4ometry import gdml, geant4
 
 log = logging.getLogger(__name__)
 
@@ -42,3 +49,120 @@ def load_dict_from_config(
     if isinstance(m, dict):
         return AttrsDict(m)
     return default()
+
+
+def _cache_dir(name: str) -> Path:
+    """Return (and create) a directory for on-disk caches of this package.
+
+    The base directory is taken from the environment variable
+    ``PYGEOMTOOLS_CACHE_DIR``, and defaults to ``$XDG_CACHE_HOME/pygeomtools`` (or
+    ``~/.cache/pygeomtools``).
+    """
+    base = os.environ.get("PYGEOMTOOLS_CACHE_DIR")
+    if base is None:
+        xdg_cache = os.environ.get("XDG_CACHE_HOME", Path("~/.cache").expanduser())
+        base = Path(xdg_cache) / "pygeomtools"
+    cache_dir = Path(base) / name
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def _zstd_module():
+    try:
+        from compression import zstd  # Python >= 3.14
+
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+
+        return zstandard
+    except ImportError:
+        msg = "reading or writing .zst files requires the zstandard package"
+        raise RuntimeError(msg) from None
+
+
+def open_gdml(filename: str | os.PathLike, mode: str = "r") -> IO:
+    """Open a (possibly compressed) GDML file as text (or binary) stream.
+
+    The compression is detected from the file extension, i.e. ``.gz`` (gzip), ``.xz``
+    (lzma) or ``.zst`` (zstandard). Other files are opened without compression.
+
+    Parameters
+    ----------
+    filename
+        the file to open.
+    mode
+        ``r`` for reading, or ``w`` for writing. Append ``b`` for binary streams of
+        the (decompressed) file contents.
+    """
+    if mode not in ("r", "w", "rb", "wb"):
+        msg = f"invalid mode {mode} for opening GDML file"
+        raise ValueError(msg)
+
+    binary = mode.endswith("b")
+    mode = mode[0] + ("b" if binary else "t")
+    encoding = None if binary else "utf-8"
+
+    suffix = Path(filename).suffix.lower()
+    if suffix == ".gz":
+        return gzip.open(filename, mode, compresslevel=6, encoding=encoding)
+    if suffix == ".xz":
+        return lzma.open(filename, mode, encoding=encoding)
+    if suffix == ".zst":
+        return _zstd_module().open(filename, mode, encoding=encoding)
+    return Path(filename).open(mode.rstrip("t"), encoding=encoding)
+
+
+class _StreamingGdmlReader(gdml.Reader):
+    """GDML reader, that parses the XML directly from a (decompressing) stream.
+
+    pyg4ometry's reader reads the whole file into a string before parsing it. Here,
+    the XML parser consumes the (decompressed) file contents in chunks instead. Entity
+    includes are not supported.
+    """
+
+    def load(self) -> None:
+        self._physVolumeNameCount.clear()
+
+        with open_gdml(self.filename, "rb") as f:
+            xmldoc = minidom.parse(f)
+
+        # pyg4ometry expects no whitespace text nodes between the elements.
+        nodes = [xmldoc.documentElement]
+        while nodes:
+            node = nodes.pop()
+            for child in list(node.childNodes):
+                if child.nodeType == child.TEXT_NODE and not child.data.strip():
+                    node.removeChild(child)
+                elif child.nodeType == child.ELEMENT_NODE:
+                    nodes.append(child)
+
+        self.parseDefines(xmldoc)
+        if self._skipMaterials:
+            material_substitutions = None
+        else:
+            material_substitutions = self.parseMaterials(xmldoc)
+        self.parseSolids(xmldoc)
+        self.parseStructure(xmldoc, material_substitutions)
+        self.parseUserInfo(xmldoc)
+        xmldoc.unlink()
+
+
+def read_gdml(filename: str | os.PathLike) -> geant4.Registry:
+    """Read a (possibly compressed) GDML file into a new registry.
+
+    This is a drop-in replacement for :class:`pyg4ometry.gdml.Reader`, that also
+    supports the compressed files handled by :func:`open_gdml`. Compressed files are
+    decompressed while parsing, without creating temporary files or holding the full
+    decompressed text in memory (the parsed XML document is still held in memory).
+
+    .. note::
+        Module files referenced from a compressed file are read by pyg4ometry, and
+        thus have to be uncompressed.
+    """
+    filename = str(filename)
+    if Path(filename).suffix.lower() not in (".gz", ".xz", ".zst"):
+        return gdml.Reader(filename).getRegistry()
+    return _StreamingGdmlReader(filename).getRegistry()
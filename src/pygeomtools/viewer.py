@@ -3,9 +3,14 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import copy
+import glob
 import logging
+import os
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from importlib import resources
 from pathlib import Path
 
@@ -16,9 +21,12 @@ import pyg4ometry.geant4 as g4
 import vtk
 from dbetto.utils import load_dict
 from pyg4ometry import config as meshconfig
-from pyg4ometry import gdml
 from pyg4ometry import visualisation as pyg4vis
+from pyg4ometry.exceptions import NullMeshError
+from vtk.util import numpy_support
 
+from .snapshot import is_snapshot, load_snapshot
+from .utils import read_gdml
 from .visualization import load_color_auxvals_recursive
 
 log = logging.getLogger(__name__)
@@ -40,6 +48,24 @@ def visualize(registry: g4.Registry, scenes: dict | None = None, points=None) ->
     if scenes is None:
         scenes = {}
 
+    load_color_auxvals_recursive(registry.worldVolume)
+    registry.worldVolume.pygeom_color_rgba = False  # hide the wireframe of the world.
+
+    # hidden and excluded volumes are neither meshed nor added to the render pipeline.
+    hidden, pruned = _hidden_volumes(registry.worldVolume, scenes)
+    log.info("hiding %d volumes, excluding %d subtrees", len(hidden), len(pruned))
+
+    # registries loaded from snapshots (or read without meshing) do not contain meshes.
+    # this has to happen before any VTK/GUI state is created, as the meshing might fork
+    # worker processes.
+    _mesh_volumes(
+        registry.worldVolume,
+        scenes.get("mesh_cache", True),
+        scenes.get("mesh_workers"),
+        hidden,
+        pruned,
+    )
+
     # if this option is set, do not use the interactor style (interactive=False below),
     # and directly trigger an export below.
     export_and_exit = scenes.get("export_and_exit")
@@ -76,12 +102,11 @@ def visualize(registry: g4.Registry, scenes: dict | None = None, points=None) ->
                 "interactive session; use export_and_exit."
             )
 
-    v.addLogicalVolume(registry.worldVolume)
+    with _skip_volumes(registry.worldVolume, hidden, pruned):
+        v.addLogicalVolume(registry.worldVolume)
 
     v.pygeom_scenes = scenes
 
-    load_color_auxvals_recursive(registry.worldVolume)
-    registry.worldVolume.pygeom_color_rgba = False  # hide the wireframe of the world.
     _color_recursive(registry.worldVolume, v, scenes.get("color_overrides", {}))
 
     # add clippers.
@@ -98,7 +123,22 @@ def visualize(registry: g4.Registry, scenes: dict | None = None, points=None) ->
             bClipperCloseCuts=clip.get("close_cuts", False),
         )
 
-    v.buildPipelinesAppend()
+    # merge all volumes with the same color into one actor each.
+    if scenes.get("merge_actors", False):
+        _merge_vis_options(v)
+
+    # instanced rendering is not compatible with the clipper pipeline.
+    instancing = scenes.get("instancing", False)
+    with _convert_array_meshes():
+        if instancing is not False and len(clippers) == 0:
+            _build_pipelines_instanced(
+                v, _INSTANCING_MIN_PLACEMENTS if instancing is True else instancing
+            )
+        else:
+            v.buildPipelinesAppend()
+
+    if scenes.get("merge_actors", False):
+        _bake_static_actors(v)
 
     # implement partial clipping. this can be quite confusing, as this can only remove
     # based on shared VisOptions, and not by volume name. if a volume shares their
@@ -123,21 +163,44 @@ def visualize(registry: g4.Registry, scenes: dict | None = None, points=None) ->
     if points is not None:
         _add_points(v, points)
 
-    for scene_points in scenes.get("points", []):
-        points_array = _load_points(
-            scene_points["file"],
-            scene_points["table"],
-            scene_points.get("columns", ["xloc", "yloc", "zloc"]),
-            scene_points.get("n_rows", None),
-            scene_points.get("evtid", None),
-        )
+    v.pygeom_lods = []
+    scene_points = scenes.get("points", [])
+    for entry, loaded in zip(
+        scene_points, _load_scene_points(scene_points), strict=True
+    ):
+        scalar_opts = entry.get("scalar")
+        points_array, scalars = loaded, None
+        if scalar_opts is not None:
+            # the scalar values are loaded as fourth column.
+            points_array, scalars = loaded[:, :3], loaded[:, 3]
+
+        lod = entry.get("lod", False)
+        if lod is not False:
+            v.pygeom_lods.append(
+                _PointCloudLOD(
+                    v,
+                    points_array,
+                    entry.get("color", (1, 1, 0, 1)),
+                    entry.get("size", 5),
+                    **({} if lod is True else lod),
+                    scalars=scalars,
+                    scalar_opts=scalar_opts,
+                )
+            )
+            continue
         _add_points(
             v,
             points_array,
-            scene_points.get("color", (1, 1, 0, 1)),
-            scene_points.get("size", 5),
+            entry.get("color", (1, 1, 0, 1)),
+            entry.get("size", 5),
+            scalars,
+            scalar_opts,
         )
 
+    v.pygeom_events = None
+    if "events" in scenes:
+        v.pygeom_events = _EventDisplay(v, scenes["events"])
+
     # add light and shadow.
     if "light" in scenes:
         light = scenes["light"]
@@ -156,6 +219,7 @@ def visualize(registry: g4.Registry, scenes: dict | None = None, points=None) ->
 
     if "window_size" in scenes:
         v.renWin.SetSize(*scenes["window_size"])
+    _update_lods(v)
 
     v.view(interactive=export_and_exit is None)
 
@@ -170,12 +234,17 @@ def visualize(registry: g4.Registry, scenes: dict | None = None, points=None) ->
 class _KeyboardInteractor(vtk.vtkInteractorStyleTrackballCamera):
     def __init__(self, renderer, iren, vtkviewer, scenes):
         self.AddObserver("KeyPressEvent", self.keypress)
+        self.AddObserver("EndInteractionEvent", self.end_interaction)
 
         self.ren = renderer
         self.iren = iren
         self.vtkviewer = vtkviewer
         self.scenes = scenes
 
+    def end_interaction(self, _obj, _event):
+        if _update_lods(self.vtkviewer):
+            self.ren.GetRenderWindow().Render()
+
     def keypress(self, _obj, _event):
         # predefined: _e_xit
 
@@ -197,6 +266,10 @@ class _KeyboardInteractor(vtk.vtkInteractorStyleTrackballCamera):
             pn.SetVisibility(not pn.GetVisibility())
             self.ren.GetRenderWindow().Render()
 
+        if key in ("Right", "Left") and self.vtkviewer.pygeom_events is not None:
+            # step to the next/previous event.
+            self.vtkviewer.pygeom_events.step(1 if key == "Right" else -1)
+
         if key == "u":  # _u_p
             _set_camera(self.vtkviewer, up=(0, 0, 1), pos=(-20000, 0, 0))
 
@@ -233,6 +306,9 @@ class _KeyboardInteractor(vtk.vtkInteractorStyleTrackballCamera):
         if key == "minus":
             _set_camera(self.vtkviewer, dolly=0.9)
 
+        # the camera might have changed.
+        self.end_interaction(_obj, _event)
+
 
 def _set_camera(
     v: pyg4vis.VtkViewerColouredNew,
@@ -331,19 +407,92 @@ def _export_png(v: pyg4vis.VtkViewerColouredNew, file_name: str = "scene.png") -
         v.renWin.OffScreenRenderingOff()
 
 
-def _add_points(v, points, color=(1, 1, 0, 1), size=5) -> None:
-    # create vtkPolyData from points.
+def _points_to_polydata(points) -> vtk.vtkPolyData:
+    """Build a :class:`vtk.vtkPolyData` with one vertex cell per point.
+
+    ``points`` is any array-like of shape ``(N, 3)``, e.g. also a memory-mapped array.
+    C-contiguous float arrays are used directly by VTK, without copying.
+    """
+    points = np.asarray(points)
+    if points.dtype not in (np.float32, np.float64):
+        points = points.astype(np.float64)
+    points = np.ascontiguousarray(points.reshape(-1, 3))
+    n_points = len(points)
+
     vp = vtk.vtkPoints()
-    ca = vtk.vtkCellArray()
-    pd = vtk.vtkPolyData()
+    # with deep=False, the VTK array keeps a reference to the numpy buffer.
+    vp.SetData(numpy_support.numpy_to_vtk(points, deep=False))
 
-    for t in points:
-        p = vp.InsertNextPoint(*t)
-        ca.InsertNextCell(1)
-        ca.InsertCellPoint(p)
+    id_type = numpy_support.get_numpy_array_type(vtk.VTK_ID_TYPE)
+    ca = vtk.vtkCellArray()
+    ca.SetData(
+        numpy_support.numpy_to_vtkIdTypeArray(
+            np.arange(n_points + 1, dtype=id_type), deep=True
+        ),
+        numpy_support.numpy_to_vtkIdTypeArray(
+            np.arange(n_points, dtype=id_type), deep=True
+        ),
+    )
 
+    pd = vtk.vtkPolyData()
     pd.SetPoints(vp)
     pd.SetVerts(ca)
+    return pd
+
+
+def _scalar_lookup_table(scalars: np.ndarray, scalar_opts: dict) -> vtk.vtkLookupTable:
+    """Build a lookup table for coloring points by scalar values, see the ``scalar``
+    option of scene points entries."""
+    log_scale = scalar_opts.get("log", False)
+    value_range = scalar_opts.get("range")
+    if value_range is None:
+        values = scalars[scalars > 0] if log_scale else scalars
+        value_range = (
+            (float(np.nanmin(values)), float(np.nanmax(values)))
+            if len(values) > 0
+            else (1, 10)
+        )
+
+    lut = vtk.vtkLookupTable()
+    lut.SetHueRange(*scalar_opts.get("hue_range", (0.667, 0)))
+    if log_scale:
+        lut.SetScaleToLog10()
+    lut.SetRange(*value_range)
+    lut.Build()
+    return lut
+
+
+def _color_by_scalars(
+    actor: vtk.vtkActor, pd: vtk.vtkPolyData, scalars, lut: vtk.vtkLookupTable
+) -> None:
+    scalars = np.ascontiguousarray(scalars, dtype=np.float64)
+    pd.GetPointData().SetScalars(numpy_support.numpy_to_vtk(scalars, deep=False))
+
+    mapper = actor.GetMapper()
+    mapper.SetLookupTable(lut)
+    mapper.SetScalarRange(lut.GetRange())
+    mapper.SetScalarModeToUsePointData()
+    mapper.ScalarVisibilityOn()
+
+
+def _add_scalar_bar(v, lut: vtk.vtkLookupTable, title: str) -> None:
+    bar = vtk.vtkScalarBarActor()
+    bar.SetLookupTable(lut)
+    bar.SetTitle(title)
+    bar.SetNumberOfLabels(5)
+    bar.SetMaximumWidthInPixels(80)
+    v.ren.AddViewProp(bar)
+
+
+def _add_points(
+    v,
+    points,
+    color=(1, 1, 0, 1),
+    size=5,
+    scalars: np.ndarray | None = None,
+    scalar_opts: dict | None = None,
+) -> None:
+    pd = _points_to_polydata(points)
 
     # add points to renderer.
     mapper = vtk.vtkPolyDataMapper()
@@ -357,21 +506,263 @@ def _add_points(v, points, color=(1, 1, 0, 1), size=5) -> None:
     actor.GetProperty().SetOpacity(color[3])
     actor.GetProperty().SetRenderPointsAsSpheres(True)
 
+    if scalars is not None:
+        lut = _scalar_lookup_table(scalars, scalar_opts)
+        _color_by_scalars(actor, pd, scalars, lut)
+        _add_scalar_bar(v, lut, scalar_opts["column"])
+
     v.ren.AddActor(actor)
     v.points = actor
 
 
+def _voxel_density(
+    points: np.ndarray, bins: int, chunk_size: int = 10_000_000
+) -> tuple[tuple, np.ndarray, np.ndarray, np.ndarray]:
+    """Bin points into a regular grid of cubic voxels.
+
+    The voxel size is chosen so that the longest side of the bounding box is divided
+    in ``bins`` voxels. The points are processed in chunks of ``chunk_size``, so that
+    also memory-mapped arrays can be binned with bounded memory usage.
+
+    Returns
+    -------
+    grid
+        ``(origin, voxel_size, shape)`` of the grid, see :func:`_voxel_ids`.
+    cells
+        the flat indices of all non-empty voxels.
+    centers
+        the centroid of the points in each non-empty voxel.
+    counts
+        the number of points in each non-empty voxel.
+    """
+    lo = np.min(points, axis=0, initial=np.inf)
+    hi = np.max(points, axis=0, initial=-np.inf)
+    if len(points) == 0:
+        lo = hi = np.zeros(3)
+    voxel_size = max(float(np.max(hi - lo)) / bins, 1e-9)
+    shape = (np.floor((hi - lo) / voxel_size).astype(np.int64) + 1).tolist()
+    grid = (lo, voxel_size, shape)
+
+    n_cells = int(np.prod(shape))
+    counts = np.zeros(n_cells)
+    sums = np.zeros((n_cells, 3))
+    for start in range(0, len(points), chunk_size):
+        chunk = np.asarray(points[start : start + chunk_size])
+        ids = _voxel_ids(chunk, grid)
+        counts += np.bincount(ids, minlength=n_cells)
+        for i in range(3):
+            sums[:, i] += np.bincount(ids, weights=chunk[:, i], minlength=n_cells)
+
+    cells = np.flatnonzero(counts)
+    counts = counts[cells]
+    return grid, cells, sums[cells] / counts[:, np.newaxis], counts
+
+
+def _voxel_ids(points: np.ndarray, grid: tuple) -> np.ndarray:
+    """Return the flat index of the voxel containing each point."""
+    origin, voxel_size, shape = grid
+    idx = np.floor((points - origin) / voxel_size).astype(np.int64)
+    np.clip(idx, 0, np.array(shape) - 1, out=idx)
+    return np.ravel_multi_index(idx.T, shape)
+
+
+def _voxel_order(
+    points: np.ndarray,
+    grid: tuple,
+    cells: np.ndarray,
+    counts: np.ndarray,
+    chunk_size: int = 10_000_000,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sort the point indices by voxel (counting sort, in chunks of ``chunk_size``).
+
+    ``cells`` and ``counts`` are the non-empty voxels and their number of points, as
+    returned by :func:`_voxel_density`. Returns the sorted point indices, and the
+    offsets of the points of each non-empty voxel (in the order of ``cells``), i.e. the
+    points in voxel ``cells[i]`` are ``order[offsets[i]:offsets[i + 1]]`` (in no
+    particular order).
+    """
+    index_type = np.int32 if len(points) < 2**31 else np.int64
+    compact = np.zeros(int(np.prod(grid[2])), dtype=np.int32)
+    compact[cells] = np.arange(len(cells))
+    offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+
+    order = np.empty(len(points), dtype=index_type)
+    cursor = offsets[:-1].copy()
+    for start in range(0, len(points), chunk_size):
+        ids = compact[_voxel_ids(np.asarray(points[start : start + chunk_size]), grid)]
+        perm = np.argsort(ids)
+        sorted_ids = ids[perm]
+        chunk_counts = np.bincount(ids, minlength=len(cells))
+        chunk_offsets = np.cumsum(chunk_counts) - chunk_counts
+        # rank of each point among the points of the same voxel in this chunk.
+        rank = np.arange(len(ids)) - chunk_offsets[sorted_ids]
+        order[cursor[sorted_ids] + rank] = start + perm
+        cursor += chunk_counts
+    return order, offsets
+
+
+class _PointCloudLOD:
+    """Level-of-detail rendering of a large point cloud.
+
+    If more than ``max_points`` points are in the current view, a density map of the
+    point cloud is shown instead of the points: the centroid of each voxel is colored
+    by the number of points in it. If the view is zoomed in far enough, all points in
+    the visible voxels are shown in full resolution.
+
+    The voxel grid (and the points sorted by voxel) is computed once for each point
+    cloud, and reused for all views.
+    """
+
+    def __init__(
+        self,
+        v: pyg4vis.VtkViewerColouredNew,
+        points,
+        color=(1, 1, 0, 1),
+        size=5,
+        max_points: int = 1_000_000,
+        bins: int = 100,
+        scalars: np.ndarray | None = None,
+        scalar_opts: dict | None = None,
+    ):
+        self.v = v
+        self.points = points
+        self.scalars = scalars
+        self.size = size
+        self.max_points = max_points
+
+        self.grid, self.cells, self.centers, self.counts = _voxel_density(points, bins)
+        log.info(
+            "binned %d points in %d voxels (voxel size %.1f mm)",
+            len(points),
+            len(self.cells),
+            self.grid[1],
+        )
+        self.order, self.offsets = _voxel_order(
+            points, self.grid, self.cells, self.counts
+        )
+
+        _add_points(v, np.empty((0, 3)), color, size)
+        self.actor = v.points
+        self.mode = None
+        self.visible = None
+
+        # heat map for the density view.
+        self.lut = vtk.vtkLookupTable()
+        self.lut.SetHueRange(0.667, 0)
+        self.lut.SetScaleToLog10()
+        self.lut.Build()
+
+        if scalars is not None:
+            self.scalar_lut = _scalar_lookup_table(scalars, scalar_opts)
+            _add_scalar_bar(v, self.scalar_lut, scalar_opts["column"])
+
+    def _visible_voxels(self) -> np.ndarray:
+        """Return a mask of the voxels with their centroid in the view (ignoring the
+        clipping range of the camera)."""
+        cam = self.v.ren.GetActiveCamera()
+        aspect = self.v.ren.GetTiledAspectRatio()
+        m = cam.GetCompositeProjectionTransformMatrix(aspect, -1, 1)
+        proj = np.array([[m.GetElement(i, j) for j in range(4)] for i in range(4)])
+
+        clip = self.centers @ proj[:2, :3].T + proj[:2, 3]
+        w = self.centers @ proj[3, :3] + proj[3, 3]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ndc = clip / w[:, np.newaxis]
+        return (w > 0) & np.all(np.abs(ndc) <= 1, axis=1)
+
+    def update(self) -> bool:
+        """Update the shown points for the current camera; returns whether anything
+        has changed."""
+        visible = self._visible_voxels()
+        mapper = self.actor.GetMapper()
+        prop = self.actor.GetProperty()
+
+        if self.counts[visible].sum() <= self.max_points:
+            if self.mode == "points" and np.array_equal(visible, self.visible):
+                return False
+            # gather the points of all visible voxels from their slices.
+            first = self.offsets[:-1][visible]
+            lengths = self.offsets[1:][visible] - first
+            starts = np.repeat(first - np.cumsum(lengths) + lengths, lengths)
+            selected = np.sort(self.order[starts + np.arange(lengths.sum())])
+            points = np.asarray(self.points[selected]).reshape(-1, 3)
+            scalars = None
+            if self.scalars is not None:
+                scalars = np.asarray(self.scalars[selected])
+
+            pd = _points_to_polydata(points)
+            mapper.SetInputData(pd)
+            mapper.ScalarVisibilityOff()
+            if scalars is not None:
+                _color_by_scalars(self.actor, pd, scalars, self.scalar_lut)
+            prop.SetRenderPointsAsSpheres(True)
+            prop.SetPointSize(self.size)
+            self.mode, self.visible = "points", visible
+            return True
+
+        if self.mode == "density":
+            return False
+        pd = _points_to_polydata(self.centers)
+        pd.GetPointData().SetScalars(numpy_support.numpy_to_vtk(self.counts, deep=True))
+        mapper.SetInputData(pd)
+        mapper.SetLookupTable(self.lut)
+        mapper.SetScalarRange(1, max(self.counts.max(), 2))
+        mapper.ScalarVisibilityOn()
+        prop.SetRenderPointsAsSpheres(False)
+        prop.SetPointSize(self.size)
+        self.mode, self.visible = "density", None
+        return True
+
+
+def _update_lods(v: pyg4vis.VtkViewerColouredNew) -> bool:
+    changed = [lod.update() for lod in getattr(v, "pygeom_lods", [])]
+    return any(changed)
+
+
+def _memmap_lh5_array(lh5_file: str, path: str) -> np.ndarray | None:
+    """Memory-map a flat numeric LH5 array, if it is stored uncompressed and
+    contiguous. Returns ``None`` otherwise."""
+    import h5py
+
+    with h5py.File(lh5_file, "r") as f:
+        dset = f.get(path)
+        if not isinstance(dset, h5py.Dataset) or dset.ndim != 1:
+            return None
+        offset = dset.id.get_offset()
+        if dset.chunks is not None or offset is None or dset.dtype.kind not in "fiu":
+            return None
+        dtype, shape = dset.dtype, dset.shape
+    return np.memmap(lh5_file, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+
+def _load_points_npy(npy_file: str) -> np.ndarray:
+    """Load points (in mm) with shape ``(N, 3)`` from a memory-mapped ``.npy`` file."""
+    points = np.load(npy_file, mmap_mode="r")
+    if points.ndim != 2 or points.shape[1] != 3:
+        msg = f"points in {npy_file} do not have the shape (N, 3)"
+        raise ValueError(msg)
+    return points
+
+
 def _load_points(
     lh5_file: str,
     point_table: str,
     columns: list[str],
     n_rows: int | None,
     evtid: int | None = None,
+    buffer_len: int | str = "100*MB",
+    scalar: str | None = None,
 ) -> np.ndarray:
-    import lh5
-    import pint
+    """Load points (in mm) from an LH5 table.
 
-    u = pint.get_application_registry()
+    The table is read in chunks of ``buffer_len`` rows (or of a memory size, see
+    :class:`lh5.LH5Iterator`). The event selection and the unit conversion are
+    applied to each chunk, so that only the selected points are kept in memory.
+
+    If a ``scalar`` column is given, its values (without unit conversion) are loaded
+    in the same pass, and returned as fourth column.
+    """
+    import lh5
 
     log.info(
         "loading table %s (with columns %s) from file %s",
@@ -379,17 +770,46 @@ def _load_points(
         str(columns),
         lh5_file,
     )
-    extra_kwargs = {}
-    if n_rows is not None:
-        extra_kwargs["n_rows"] = n_rows
-    point_tbl = lh5.read(point_table, lh5_file, **extra_kwargs)
-
-    cols_to_load = list(columns)
-    if evtid is not None:
-        cols_to_load.append("evtid")
+    if evtid is None:
+        points = _load_points_flat(lh5_file, point_table, columns, n_rows, scalar)
+        if points is not None:
+            return points
+
+    it = lh5.LH5Iterator(
+        lh5_file,
+        point_table,
+        field_mask=_columns_to_load(columns, evtid, scalar),
+        n_entries=n_rows,
+        buffer_len=buffer_len,
+    )
+
+    chunks = [_table_to_points(point_tbl, columns, evtid, scalar) for point_tbl in it]
+    if not chunks:
+        return np.empty((0, 3 if scalar is None else 4))
+    return np.concatenate(chunks)
+
+
+def _columns_to_load(
+    columns: list[str], evtid: int | None = None, scalar: str | None = None
+) -> list[str]:
+    extra = ([] if evtid is None else ["evtid"]) + ([] if scalar is None else [scalar])
+    return list(dict.fromkeys([*columns, *extra]))
+
+
+def _table_to_points(
+    point_tbl, columns: list[str], evtid: int | None = None, scalar: str | None = None
+):
+    """Convert (a chunk of) an LGDO point table to an array of points in mm (and the
+    values of the ``scalar`` column, if given)."""
+    import pint
+
+    u = pint.get_application_registry()
+
+    cols_to_load = _columns_to_load(columns, evtid, scalar)
     tbl = ak.Array(
-        {col: point_tbl[col].view_as("ak", with_units=True) for col in cols_to_load}
+        {c: point_tbl[c].view_as("ak", with_units=True) for c in cols_to_load}
     )
+    mask = tbl.evtid == evtid if evtid is not None else None
 
     # the points need to be in mm.
     cols = []
@@ -399,13 +819,279 @@ def _load_points(
             "units", ak.parameters(tbl).get("units", None)
         )
         factor = (u(col_units) / u("mm")).to("dimensionless").m
-        if evtid is not None:
-            col = col[tbl.evtid == evtid]
+        if mask is not None:
+            col = col[mask]
         if col.ndim > 1:
             col = ak.flatten(col)
         cols.append(col.to_numpy() * factor)
 
-    return np.array(cols).T
+    if scalar is not None:
+        col = tbl[scalar] if mask is None else tbl[scalar][mask]
+        if col.ndim > 1:
+            col = ak.flatten(col)
+        cols.append(col.to_numpy())
+
+    return np.column_stack(cols)
+
+
+def _expand_points_files(files: str | list[str]) -> list[str]:
+    """Expand environment variables and glob patterns in the given point file(s)."""
+    expanded = []
+    for pattern in [files] if isinstance(files, str) else files:
+        file = os.path.expandvars(pattern)
+        # absolute patterns are not supported by Path.glob.
+        matches = sorted(glob.glob(file)) if glob.has_magic(file) else [file]  # noqa: PTH207
+        if not matches:
+            msg = f"no points file matches {pattern}"
+            raise ValueError(msg)
+        expanded.extend(matches)
+    return expanded
+
+
+def _load_points_file(points_file: str, scene_points: dict) -> np.ndarray:
+    scalar = scene_points.get("scalar", {}).get("column")
+    if points_file.endswith(".npy"):
+        if scalar is not None:
+            msg = f"scalar columns are not supported for .npy file {points_file}"
+            raise ValueError(msg)
+        return _load_points_npy(points_file)
+
+    if "table" not in scene_points:
+        msg = f"no table given for points file {points_file}"
+        raise ValueError(msg)
+    return _load_points(
+        points_file,
+        scene_points["table"],
+        scene_points.get("columns", ["xloc", "yloc", "zloc"]),
+        scene_points.get("n_rows"),
+        scene_points.get("evtid"),
+        scalar=scalar,
+    )
+
+
+def _load_scene_points(scene_points: list[dict]) -> list[np.ndarray]:
+    """Load the points of all entries in the ``points`` list of a scene.
+
+    All files (after expanding glob patterns) are loaded concurrently; ``n_rows``
+    applies to each file separately. Returns one array per entry.
+    """
+    files = [_expand_points_files(entry["file"]) for entry in scene_points]
+    if not any(files):
+        return []
+
+    with ThreadPoolExecutor(min(sum(map(len, files)), os.cpu_count() or 1)) as pool:
+        futures = [
+            [pool.submit(_load_points_file, f, entry) for f in entry_files]
+            for entry, entry_files in zip(scene_points, files, strict=True)
+        ]
+        return [
+            fs[0].result()
+            if len(fs) == 1
+            else np.concatenate([fu.result() for fu in fs])
+            for fs in futures
+        ]
+
+
+def _load_points_flat(
+    lh5_file: str,
+    point_table: str,
+    columns: list[str],
+    n_rows: int | None,
+    scalar: str | None = None,
+) -> np.ndarray | None:
+    """Load points from flat numeric LH5 arrays in bulk, without building LGDO
+    objects. Contiguous datasets are memory-mapped. Returns ``None`` if the columns
+    are not flat arrays (e.g. jagged remage output)."""
+    import h5py
+    import pint
+
+    u = pint.get_application_registry()
+
+    with h5py.File(lh5_file, "r") as f:
+        table = f[point_table]
+        dsets = [table.get(c) for c in columns + ([] if scalar is None else [scalar])]
+        if any(
+            not isinstance(d, h5py.Dataset) or d.ndim != 1 or d.dtype.kind not in "fiu"
+            for d in dsets
+        ):
+            return None
+        units = [d.attrs.get("units", table.attrs.get("units")) for d in dsets]
+        if any(un is None for un in units[:3]):
+            return None
+
+        n = min(len(d) for d in dsets)
+        if n_rows is not None:
+            n = min(n, n_rows)
+        points = np.empty((n, len(dsets)), dtype=np.float64)
+        for i, (d, col_units) in enumerate(zip(dsets, units, strict=True)):
+            col = _memmap_lh5_array(lh5_file, d.name)
+            col = col[:n] if col is not None else d[:n]
+            # the scalar column is not converted.
+            factor = (u(col_units) / u("mm")).to("dimensionless").m if i < 3 else 1
+            np.multiply(col, factor, out=points[:, i])
+    return points
+
+
+class _EventIndex:
+    """Index of the row ranges belonging to each event in an LH5 table.
+
+    The rows of an event do not need to be contiguous; each event maps to one or more
+    ranges of rows. The index is built from the ``evtid`` column, and is cached on
+    disk (see :func:`_load_event_index`).
+    """
+
+    def __init__(self, lh5_file: str, point_table: str):
+        self.lh5_file = lh5_file
+        self.point_table = point_table
+        self.evtids, self.starts, self.stops = _load_event_index(lh5_file, point_table)
+        self.events = np.unique(self.evtids)
+
+    def rows(self, evtid: int) -> list[tuple[int, int]]:
+        """Return the row ranges ``(start, stop)`` of the given event."""
+        lo, hi = np.searchsorted(self.evtids, [evtid, evtid + 1])
+        return list(zip(self.starts[lo:hi], self.stops[lo:hi], strict=True))
+
+    def load(self, evtid: int, columns: list[str]) -> np.ndarray:
+        """Load the points (in mm) of a single event, reading only its rows."""
+        import lh5
+
+        chunks = [
+            _table_to_points(
+                lh5.read(
+                    self.point_table,
+                    self.lh5_file,
+                    field_mask=columns,
+                    start_row=int(start),
+                    n_rows=int(stop - start),
+                ),
+                columns,
+            )
+            for start, stop in self.rows(evtid)
+        ]
+        if not chunks:
+            return np.empty((0, 3))
+        return np.concatenate(chunks)
+
+
+def _build_event_index(
+    lh5_file: str, point_table: str, chunk_size: int = 10_000_000
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Build the event index from the flat ``evtid`` column of the table.
+
+    Returns the arrays ``(evtids, starts, stops)`` of all runs of consecutive rows with
+    the same event id, sorted by event id.
+    """
+    import h5py
+
+    evtids, starts = [], []
+    with h5py.File(lh5_file, "r") as f:
+        dset = f[point_table].get("evtid")
+        if not isinstance(dset, h5py.Dataset) or dset.ndim != 1:
+            msg = f"table {point_table} in {lh5_file} has no flat evtid column"
+            raise ValueError(msg)
+
+        n_rows = len(dset)
+        last = None
+        for offset in range(0, n_rows, chunk_size):
+            chunk = dset[offset : offset + chunk_size]
+            new_run = np.empty(len(chunk), dtype=bool)
+            new_run[0] = last is None or chunk[0] != last
+            np.not_equal(chunk[1:], chunk[:-1], out=new_run[1:])
+            evtids.append(chunk[new_run])
+            starts.append(np.flatnonzero(new_run) + offset)
+            last = chunk[-1]
+
+    evtids = np.concatenate(evtids) if evtids else np.empty(0, dtype=np.int64)
+    starts = np.concatenate(starts) if starts else np.empty(0, dtype=np.int64)
+    stops = np.append(starts[1:], n_rows)
+
+    order = np.argsort(evtids, kind="stable")
+    return evtids[order], starts[order], stops[order]
+
+
+def _load_event_index(
+    lh5_file: str, point_table: str
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Load the event index from the on-disk cache, or build and cache it.
+
+    The cache entries are keyed by the file path, table name, and the size and
+    modification time of the file.
+    """
+    import hashlib
+
+    from .utils import _cache_dir
+
+    stat = Path(lh5_file).stat()
+    key = f"{Path(lh5_file).resolve()}:{point_table}:{stat.st_size}:{stat.st_mtime_ns}"
+    cache_file = (
+        _cache_dir("events") / f"{hashlib.sha256(key.encode()).hexdigest()}.npz"
+    )
+
+    if cache_file.exists():
+        log.debug("loading event index of %s from %s", lh5_file, cache_file)
+        with np.load(cache_file) as idx:
+            return idx["evtids"], idx["starts"], idx["stops"]
+
+    log.info("building event index of table %s in %s", point_table, lh5_file)
+    evtids, starts, stops = _build_event_index(lh5_file, point_table)
+
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.npz")
+    np.savez(tmp_file, evtids=evtids, starts=starts, stops=stops)
+    tmp_file.replace(cache_file)
+    return evtids, starts, stops
+
+
+class _EventDisplay:
+    """Show the points of one event at a time, see the ``events`` scene option."""
+
+    def __init__(self, v: pyg4vis.VtkViewerColouredNew, events: dict):
+        self.v = v
+        self.columns = events.get("columns", ["xloc", "yloc", "zloc"])
+        self.indices = [
+            _EventIndex(f, events["table"])
+            for f in _expand_points_files(events["file"])
+        ]
+        # all events, as (index, evtid) pairs, in file order.
+        self.events = [(idx, int(e)) for idx in self.indices for e in idx.events]
+        if not self.events:
+            msg = f"no events found in {events['file']}"
+            raise ValueError(msg)
+
+        _add_points(
+            v,
+            np.empty((0, 3)),
+            events.get("color", (1, 1, 0, 1)),
+            events.get("size", 5),
+        )
+        self.actor = v.points
+        self.text = vtk.vtkTextActor()
+        self.text.GetTextProperty().SetFontSize(18)
+        self.text.SetPosition(10, 10)
+        v.ren.AddActor(self.text)
+
+        self.pos = 0
+        if events.get("evtid") is not None:
+            evtids = [e for _, e in self.events]
+            if events["evtid"] not in evtids:
+                msg = f"event {events['evtid']} not found in {events['file']}"
+                raise ValueError(msg)
+            self.pos = evtids.index(events["evtid"])
+        self.show(self.pos)
+
+    def show(self, pos: int) -> None:
+        self.pos = pos % len(self.events)
+        idx, evtid = self.events[self.pos]
+        points = idx.load(evtid, self.columns)
+        log.info(
+            "showing event %d (%d points) from %s", evtid, len(points), idx.lh5_file
+        )
+
+        self.actor.GetMapper().SetInputData(_points_to_polydata(points))
+        self.text.SetInput(f"event {evtid} ({self.pos + 1}/{len(self.events)})")
+
+    def step(self, n: int) -> None:
+        self.show(self.pos + n)
+        self.v.ren.GetRenderWindow().Render()
 
 
 def _color_override_matches(overrides: dict, name: str):
@@ -439,7 +1125,7 @@ def _color_recursive(
         color_rgba = color_override if color_override is not None else color_rgba
         assert color_rgba is not None
 
-        for vis in viewer.instanceVisOptions[lv.name]:
+        for vis in viewer.instanceVisOptions.get(lv.name, []):
             if color_rgba is False:
                 vis.alpha = 0
                 vis.visible = False
@@ -453,6 +1139,280 @@ def _color_recursive(
             _color_recursive(pv.logicalVolume, viewer, overrides, level + 1)
 
 
+def _hidden_volumes(world: g4.LogicalVolume, scenes: dict) -> tuple[set[str], set[str]]:
+    """Get the names of the logical volumes that are not shown in the viewer.
+
+    Returns the names of the hidden volumes (not meshed and not rendered, but their
+    daughters are still shown), and of the volumes whose whole subtree is excluded.
+
+    Volumes are hidden if their color (including ``color_overrides``) is ``False`` or
+    fully transparent, if they match any of the ``exclude`` patterns, or if they do
+    not match any of the ``include`` patterns. Volumes matching ``exclude_subtrees``
+    are hidden together with all their daughters.
+    """
+    overrides = scenes.get("color_overrides", {})
+    include = scenes.get("include")
+    include_regex = f"({'|'.join(include)})$" if include is not None else None
+    exclude = scenes.get("exclude", [])
+    exclude_regex = f"({'|'.join(exclude)})$" if len(exclude) > 0 else None
+    subtrees = scenes.get("exclude_subtrees", [])
+    subtrees_regex = f"({'|'.join(subtrees)})$" if len(subtrees) > 0 else None
+
+    hidden = set()
+    pruned = set()
+    seen = set()
+
+    def _walk(lv: g4.LogicalVolume) -> None:
+        if lv.name in seen:
+            return
+        seen.add(lv.name)
+
+        if subtrees_regex is not None and re.match(subtrees_regex, lv.name):
+            pruned.add(lv.name)
+            return
+
+        color_rgba = _color_override_matches(overrides, lv.name)
+        if color_rgba is None:
+            color_rgba = getattr(lv, "pygeom_color_rgba", None)
+        if (
+            color_rgba is False
+            or (color_rgba is not None and color_rgba[3] <= 0)
+            or (include_regex is not None and not re.match(include_regex, lv.name))
+            or (exclude_regex is not None and re.match(exclude_regex, lv.name))
+        ):
+            hidden.add(lv.name)
+
+        for pv in lv.daughterVolumes:
+            if pv.type == "placement":
+                _walk(pv.logicalVolume)
+
+    _walk(world)
+    return hidden, pruned
+
+
+@contextlib.contextmanager
+def _skip_volumes(world: g4.LogicalVolume, hidden: set[str], pruned: set[str]):
+    """Temporarily exclude volumes from :meth:`pyg4ometry.visualisation.ViewerBase.addLogicalVolume`.
+
+    The hidden volumes are marked as assemblies, so that no mesh is added for them,
+    but their daughters are still traversed. The pruned volumes additionally lose
+    their daughters. The original state is restored on exit.
+    """
+    saved = []
+    seen = set()
+
+    def _walk(lv: g4.LogicalVolume) -> None:
+        if id(lv) in seen:
+            return
+        seen.add(id(lv))
+        if lv.name in hidden or lv.name in pruned:
+            saved.append((lv, lv.type, lv.daughterVolumes))
+        if lv.name in pruned:
+            return
+        for pv in lv.daughterVolumes:
+            _walk(pv.logicalVolume)
+
+    _walk(world)
+    try:
+        for lv, _, _ in saved:
+            lv.type = "assembly"
+            if lv.name in pruned:
+                lv.daughterVolumes = []
+        yield
+    finally:
+        for lv, lv_type, daughters in saved:
+            lv.type = lv_type
+            lv.daughterVolumes = daughters
+
+
+_INSTANCING_MIN_PLACEMENTS = 10
+
+
+def _rotations_and_scales(
+    transformations: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray] | None:
+    """Decompose ``(N, 3, 3)`` transformation matrices into rotations and scales
+    along the local axes, i.e. ``M = R @ diag(s)``.
+
+    Returns the rotations as quaternions ``(w, x, y, z)`` and the scales, or ``None``
+    if any of the matrices cannot be decomposed like this (e.g. reflections).
+    """
+    scales = np.linalg.norm(transformations, axis=1)
+    if np.any(scales <= 0):
+        return None
+    rot = transformations / scales[:, np.newaxis, :]
+    identity = np.broadcast_to(np.eye(3), rot.shape)
+    if not np.allclose(rot.transpose(0, 2, 1) @ rot, identity, atol=1e-6) or np.any(
+        np.linalg.det(rot) < 0
+    ):
+        return None
+
+    r = rot
+    trace_terms = np.stack(
+        [
+            1 + r[:, 0, 0] + r[:, 1, 1] + r[:, 2, 2],
+            1 + r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2],
+            1 - r[:, 0, 0] + r[:, 1, 1] - r[:, 2, 2],
+            1 - r[:, 0, 0] - r[:, 1, 1] + r[:, 2, 2],
+        ],
+        axis=1,
+    )
+    quaternions = 0.5 * np.sqrt(np.clip(trace_terms, 0, None))
+    quaternions[:, 1] = np.copysign(quaternions[:, 1], r[:, 2, 1] - r[:, 1, 2])
+    quaternions[:, 2] = np.copysign(quaternions[:, 2], r[:, 0, 2] - r[:, 2, 0])
+    quaternions[:, 3] = np.copysign(quaternions[:, 3], r[:, 1, 0] - r[:, 0, 1])
+    return quaternions, scales
+
+
+def _instanced_actor(
+    source: vtk.vtkPolyData,
+    translations: np.ndarray,
+    quaternions: np.ndarray,
+    scales: np.ndarray,
+    vis_options,
+) -> vtk.vtkActor:
+    """Create an actor that renders the ``source`` mesh at all given placements,
+    using a :class:`vtk.vtkGlyph3DMapper` (i.e. instanced rendering on the GPU)."""
+    instances = _points_to_polydata(translations)
+    for name, array in (("orientation", quaternions), ("scale", scales)):
+        vtk_array = numpy_support.numpy_to_vtk(array, deep=True)
+        vtk_array.SetName(name)
+        instances.GetPointData().AddArray(vtk_array)
+
+    mapper = vtk.vtkGlyph3DMapper()
+    mapper.SetInputData(instances)
+    mapper.SetSourceData(source)
+    mapper.SetOrientationModeToQuaternion()
+    mapper.SetOrientationArray("orientation")
+    mapper.SetScaleModeToScaleByVectorComponents()
+    mapper.SetScaleArray("scale")
+    mapper.ScalarVisibilityOff()
+    mapper.SetResolveCoincidentTopologyToPolygonOffset()
+    mapper.SetRelativeCoincidentTopologyPolygonOffsetParameters(
+        0, 3 * vis_options.depth
+    )
+
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
+    if vis_options.representation == "wireframe":
+        actor.GetProperty().SetRepresentationToWireframe()
+    actor.GetProperty().SetOpacity(vis_options.alpha)
+    actor.GetProperty().SetColor(*vis_options.colour)
+    return actor
+
+
+def _build_pipelines_instanced(
+    v: pyg4vis.VtkViewerColouredNew, min_placements: int
+) -> None:
+    """Build the VTK pipelines, rendering meshes with many placements instanced.
+
+    Meshes with at least ``min_placements`` placements are rendered with one
+    instanced actor per set of visualization options (i.e. per color), instead of
+    copying the mesh for each placement. All other meshes (and meshes with reflected
+    placements) are handled by the usual pipeline of pyg4ometry, that appends all
+    meshes with the same visualization options.
+    """
+    instanced = {}
+    for k, placements in v.instancePlacements.items():
+        if len(placements) < min_placements:
+            continue
+        decomposed = _rotations_and_scales(
+            np.array([ip["transformation"] for ip in placements], dtype=np.float64)
+        )
+        if decomposed is None:
+            log.debug("placements of %s cannot be instanced", k)
+            continue
+        instanced[k] = (placements, v.instanceVisOptions[k], *decomposed)
+
+    # let pyg4ometry build the pipelines of all other meshes.
+    for k in instanced:
+        del v.instancePlacements[k]
+        del v.instanceVisOptions[k]
+    try:
+        v.buildPipelinesAppend()
+    finally:
+        for k, (placements, vis_options, _, _) in instanced.items():
+            v.instancePlacements[k] = placements
+            v.instanceVisOptions[k] = vis_options
+
+    for k, (placements, vis_options, quaternions, scales) in instanced.items():
+        tri = vtk.vtkTriangleFilter()
+        tri.AddInputData(v.polydata[k])
+        tri.Update()
+
+        translations = np.array([ip["translation"] for ip in placements], dtype=float)
+        groups = {}
+        for i, vo in enumerate(vis_options):
+            groups.setdefault(str(vo), (vo, []))[1].append(i)
+
+        for i, (vo, idx) in enumerate(groups.values()):
+            actor = _instanced_actor(
+                tri.GetOutput(), translations[idx], quaternions[idx], scales[idx], vo
+            )
+            v.actors[f"{k}_instanced_{i}"] = actor
+            v.ren.AddActor(actor)
+
+    log.info("rendering %d meshes instanced", len(instanced))
+
+
+def _merge_vis_options(v: pyg4vis.ViewerBase) -> None:
+    """Share one set of visualization options between all placements that look the same.
+
+    pyg4ometry appends all meshes with the same visualization options into a single
+    actor, but the options also contain the depth in the volume tree. Volumes with the
+    same color, opacity and representation are merged into one actor here, so that the
+    number of actors (i.e. draw calls) scales with the number of colors. The merged
+    actors use the smallest depth of the group for their polygon offset, coincident
+    surfaces of volumes at different depths might therefore not be resolved correctly.
+
+    This has to run after the colors are applied and before the pipelines are built;
+    so that clipping (and the closing of clipped cuts) acts on the merged actors.
+    """
+
+    def _key(vo: pyg4vis.VisualisationOptions) -> tuple:
+        if vo.randomColour:
+            return (id(vo),)
+        # these are the only options applied to the actors by pyg4ometry.
+        return (vo.representation, tuple(vo.colour), vo.alpha)
+
+    merged = {}
+    original = set()
+    for vos in v.instanceVisOptions.values():
+        for vo in vos:
+            original.add(str(vo))
+            key = _key(vo)
+            if key not in merged or vo.depth < merged[key].depth:
+                merged[key] = copy.copy(vo)
+
+    for k, vos in v.instanceVisOptions.items():
+        v.instanceVisOptions[k] = [merged[_key(vo)] for vo in vos]
+
+    log.info(
+        "merged %d sets of visualization options into %d", len(original), len(merged)
+    )
+
+
+def _bake_static_actors(v: pyg4vis.ViewerBase) -> None:
+    """Replace the input pipelines of all actors by their (static) output.
+
+    The actors built by pyg4ometry are fed by a pipeline with a triangle and a
+    transform filter for each placement, that is checked for modifications on every
+    render. The geometry does not change after building the pipelines, so the
+    appended (and clipped) polydata is copied once and the pipeline is dropped.
+    """
+    for actor in v.actors.values():
+        mapper = actor.GetMapper()
+        if not isinstance(mapper, vtk.vtkPolyDataMapper):
+            continue
+        producer = mapper.GetInputAlgorithm()
+        if producer is None or isinstance(producer, vtk.vtkTrivialProducer):
+            continue
+        mapper.Update()
+        polydata = vtk.vtkPolyData()
+        polydata.DeepCopy(mapper.GetInput())
+        mapper.SetInputData(polydata)
+
+
 def _add_light_and_shadow(
     v: pyg4vis.VtkViewerColouredNew,
     light_pos: tuple[float, float, float],
@@ -481,6 +1441,276 @@ def _add_light_and_shadow(
         v.ren.SetPass(camera_pass)
 
 
+class _ArrayMesh:
+    """Mesh of a solid, stored as vertex and polygon arrays.
+
+    This is a minimal stand-in for the meshes created by pyg4ometry, that can be
+    cached on disk and is all that is needed by the viewer.
+    """
+
+    def __init__(self, vertices: np.ndarray, offsets: np.ndarray, connectivity):
+        self.vertices = vertices
+        self.offsets = offsets
+        self.connectivity = connectivity
+
+        # attributes of pyg4ometry.visualisation.Mesh used by the viewer.
+        self.localmesh = self
+        self.overlapmeshes = []
+
+    @classmethod
+    def from_solid(cls, solid: g4.solid.SolidBase) -> _ArrayMesh:
+        vertices, polygons, _ = solid.mesh().toVerticesAndPolygons()
+        offsets = np.zeros(len(polygons) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in polygons], out=offsets[1:])
+        connectivity = np.fromiter(
+            (i for p in polygons for i in p), dtype=np.int64, count=offsets[-1]
+        )
+        return cls(
+            np.asarray(vertices, dtype=np.float64).reshape(-1, 3), offsets, connectivity
+        )
+
+    def toVerticesAndPolygons(self) -> tuple[list, list, int]:
+        polygons = np.split(self.connectivity, self.offsets[1:-1])
+        return self.vertices.tolist(), [p.tolist() for p in polygons], len(polygons)
+
+    def to_polydata(self) -> vtk.vtkPolyData:
+        """Convert to VTK polydata, directly from the arrays."""
+        id_type = numpy_support.get_numpy_array_type(vtk.VTK_ID_TYPE)
+        points = vtk.vtkPoints()
+        # single precision, like the points created by pyg4ometry.
+        points.SetData(
+            numpy_support.numpy_to_vtk(self.vertices.astype(np.float32), deep=True)
+        )
+        polys = vtk.vtkCellArray()
+        polys.SetData(
+            numpy_support.numpy_to_vtkIdTypeArray(
+                self.offsets.astype(id_type), deep=True
+            ),
+            numpy_support.numpy_to_vtkIdTypeArray(
+                self.connectivity.astype(id_type), deep=True
+            ),
+        )
+        polydata = vtk.vtkPolyData()
+        polydata.SetPoints(points)
+        polydata.SetPolys(polys)
+        return polydata
+
+
+@contextlib.contextmanager
+def _convert_array_meshes():
+    """Temporarily let pyg4ometry convert :class:`_ArrayMesh` directly to polydata.
+
+    pyg4ometry converts meshes to VTK polydata point by point and polygon by polygon,
+    this is replaced by a conversion of the whole arrays for the meshes created by
+    :func:`_mesh_volumes`.
+    """
+    convert = pyg4vis.Convert.pycsgMeshToVtkPolyData
+
+    def _to_polydata(mesh):
+        if isinstance(mesh, _ArrayMesh):
+            return mesh.to_polydata()
+        return convert(mesh)
+
+    pyg4vis.Convert.pycsgMeshToVtkPolyData = _to_polydata
+    try:
+        yield
+    finally:
+        pyg4vis.Convert.pycsgMeshToVtkPolyData = convert
+
+
+def _mesh_settings_key() -> str:
+    """Return a key for the global meshing settings of pyg4ometry."""
+    from importlib.metadata import version
+
+    defaults = {
+        name: {k: v for k, v in vars(cls).items() if not k.startswith("_")}
+        for name, cls in vars(meshconfig.SolidDefaults).items()
+        if not name.startswith("_")
+    }
+    return repr((version("pyg4ometry"), meshconfig.meshing, sorted(defaults.items())))
+
+
+def _load_cached_mesh(key: str) -> _ArrayMesh | None:
+    from .utils import _cache_dir
+
+    cache_file = _cache_dir("meshes") / f"{key}.npz"
+    if not cache_file.exists():
+        return None
+    with np.load(cache_file) as m:
+        mesh = _ArrayMesh(m["vertices"], m["offsets"], m["connectivity"])
+    # the modification time marks the last use, for the eviction of old meshes.
+    cache_file.touch()
+    return mesh
+
+
+# default maximal size of the mesh cache, in MB.
+_MESH_CACHE_SIZE_MB = 1024
+
+
+def _prune_mesh_cache(max_size: int | None = None) -> None:
+    """Remove the least recently used meshes from the cache, until the cache is not
+    larger than ``max_size`` bytes.
+
+    The default size is taken from the environment variable
+    ``PYGEOMTOOLS_MESH_CACHE_SIZE`` (in MB), and defaults to 1 GB.
+    """
+    from .utils import _cache_dir
+
+    if max_size is None:
+        size_mb = os.environ.get("PYGEOMTOOLS_MESH_CACHE_SIZE", _MESH_CACHE_SIZE_MB)
+        max_size = int(size_mb) * 1024**2
+
+    files = []
+    for f in _cache_dir("meshes").glob("*.npz"):
+        with contextlib.suppress(FileNotFoundError):
+            stat = f.stat()
+            files.append((stat.st_mtime, stat.st_size, f))
+
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, f in sorted(files, key=lambda x: x[0]):
+        if total <= max_size:
+            break
+        f.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    if removed > 0:
+        log.info("removed %d meshes from the cache", removed)
+
+
+def _clear_mesh_cache() -> None:
+    """Remove all meshes from the on-disk cache."""
+    _prune_mesh_cache(0)
+
+
+def _build_mesh(solid: g4.solid.SolidBase, key: str, cache: bool) -> _ArrayMesh | None:
+    """Mesh the solid, and store the mesh in the cache. Returns ``None`` on meshing
+    errors."""
+    from .utils import _cache_dir
+
+    try:
+        mesh = _ArrayMesh.from_solid(solid)
+    except (NullMeshError, ValueError):
+        return None
+
+    if cache:
+        cache_file = _cache_dir("meshes") / f"{key}.npz"
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.npz")
+        np.savez(
+            tmp_file,
+            vertices=mesh.vertices,
+            offsets=mesh.offsets,
+            connectivity=mesh.connectivity,
+        )
+        tmp_file.replace(cache_file)
+    return mesh
+
+
+# solids to mesh in the worker processes. the solids reference their registry, so
+# they are not pickled, but inherited by the forked workers.
+_solids_to_mesh: dict[str, g4.solid.SolidBase] = {}
+
+
+def _build_mesh_worker(key: str, cache: bool) -> _ArrayMesh | None:
+    return _build_mesh(_solids_to_mesh[key], key, cache)
+
+
+def _mesh_volumes(
+    world: g4.LogicalVolume,
+    cache: bool = True,
+    max_workers: int | None = None,
+    hidden: set[str] = frozenset(),
+    pruned: set[str] = frozenset(),
+) -> None:
+    """Create the meshes of all logical volumes in the tree that do not have one yet.
+
+    Volumes in ``hidden`` are not meshed, and the subtrees of volumes in ``pruned``
+    are skipped entirely (see :func:`_hidden_volumes`).
+
+    Each unique solid (see :func:`.geometry.get_solid_hash`) is only meshed once. With
+    ``cache``, the meshes are also stored on disk, keyed by the solid hash and the
+    meshing settings (e.g. ``fine_mesh``); so that unchanged solids do not have to be
+    meshed again when viewing the same geometry again.
+
+    The solids that are not in the cache are meshed in a pool of ``max_workers``
+    processes (default: number of CPUs). The solids cannot be pickled, so this requires
+    the ``fork`` start method, which is only used on Linux (on macOS, forking is unsafe
+    and not the default). On other platforms the solids are meshed serially.
+    """
+    import hashlib
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    from .geometry import _count_primitives, get_solid_hash
+
+    settings = _mesh_settings_key()
+    volumes: dict[str, list[g4.LogicalVolume]] = {}
+    solids: dict[str, g4.solid.SolidBase] = {}
+    seen = set()
+
+    def _walk(lv: g4.LogicalVolume) -> None:
+        if id(lv) in seen:
+            return
+        seen.add(id(lv))
+        if lv.name in pruned:
+            return
+        if (
+            lv.type == "logical"
+            and lv.name not in hidden
+            and getattr(lv, "mesh", None) is None
+        ):
+            if lv.solid.type == "extruder":
+                # the viewer needs the decomposed extrusions of the solid.
+                lv.reMesh()
+            else:
+                key = hashlib.sha1(
+                    (get_solid_hash(lv.solid) + settings).encode(),
+                    usedforsecurity=False,
+                ).hexdigest()
+                volumes.setdefault(key, []).append(lv)
+                solids.setdefault(key, lv.solid)
+        for pv in lv.daughterVolumes:
+            _walk(pv.logicalVolume)
+
+    _walk(world)
+
+    meshes = {key: _load_cached_mesh(key) for key in solids} if cache else {}
+    meshes = {key: mesh for key, mesh in meshes.items() if mesh is not None}
+    # start with the most complex solids, for a better load balancing.
+    todo = sorted(
+        (key for key in solids if key not in meshes),
+        key=lambda key: _count_primitives(solids[key]),
+        reverse=True,
+    )
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(todo))
+    if max_workers > 1 and sys.platform.startswith("linux"):
+        _solids_to_mesh.update({key: solids[key] for key in todo})
+        try:
+            with ProcessPoolExecutor(
+                max_workers, mp_context=multiprocessing.get_context("fork")
+            ) as pool:
+                built = pool.map(_build_mesh_worker, todo, [cache] * len(todo))
+                meshes.update(zip(todo, built, strict=True))
+        finally:
+            _solids_to_mesh.clear()
+    else:
+        meshes.update((key, _build_mesh(solids[key], key, cache)) for key in todo)
+
+    if cache:
+        _prune_mesh_cache()
+
+    for key, lvs in volumes.items():
+        if meshes[key] is None:
+            log.error("meshing error %s", ", ".join(lv.name for lv in lvs))
+        for lv in lvs:
+            lv.mesh = meshes[key]
+
+    log.info(
+        "meshed %d unique solids (%d from cache)", len(solids), len(solids) - len(todo)
+    )
+
+
 def vis_gdml_cli(args: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(
         prog="legend-pygeom-vis",
@@ -504,6 +1734,23 @@ def vis_gdml_cli(args: list[str] | None = None) -> None:
         action="store_true",
         help="""use finer meshing settings""",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="""number of processes for meshing the solids. default: number of CPUs""",
+    )
+    parser.add_argument(
+        "--no-mesh-cache",
+        action="store_true",
+        help="""do not use the on-disk cache of solid meshes.""",
+    )
+    parser.add_argument(
+        "--clear-mesh-cache",
+        action="store_true",
+        help="""remove all meshes from the on-disk cache before (or without) viewing
+        a geometry.""",
+    )
     parser.add_argument(
         "--scene",
         "-s",
@@ -511,17 +1758,39 @@ def vis_gdml_cli(args: list[str] | None = None) -> None:
     )
     parser.add_argument(
         "--add-points",
-        help="""load points from LH5 file""",
+        help="""load points from LH5 file, or from a .npy file with shape (N, 3) in
+        mm. Glob patterns are expanded.""",
     )
     parser.add_argument(
         "--add-points-columns",
         default="vtx:xloc,yloc,zloc",
         help="""columns in the point file. default: %(default)s""",
     )
+    parser.add_argument(
+        "--lod",
+        action="store_true",
+        help="""show a density map of the points from --add-points, if too many
+        points are in view.""",
+    )
+    parser.add_argument(
+        "--event-display",
+        action="store_true",
+        help="""show the points from --add-points event by event (step with the
+        left/right arrow keys).""",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="""load a registry snapshot instead of a GDML file. snapshots are
+        pickle files, only load snapshots from trusted sources: loading a malicious
+        snapshot can execute arbitrary code.""",
+    )
 
     parser.add_argument(
         "filename",
-        help="""GDML file to visualize.""",
+        nargs="?",
+        help="""GDML file (optionally compressed as .gz, .xz or .zst), or registry
+        snapshot with --snapshot, to visualize.""",
     )
 
     parsed = parser.parse_args(args)
@@ -532,6 +1801,13 @@ def vis_gdml_cli(args: list[str] | None = None) -> None:
     if parsed.debug:
         logging.root.setLevel(logging.DEBUG)
 
+    if parsed.clear_mesh_cache:
+        _clear_mesh_cache()
+    if parsed.filename is None:
+        if not parsed.clear_mesh_cache:
+            parser.error("the following arguments are required: filename")
+        return
+
     scene = {}
     if parsed.scene:
         scene = load_dict(parsed.scene)
@@ -543,20 +1819,52 @@ def vis_gdml_cli(args: list[str] | None = None) -> None:
 
     if scene.get("fine_mesh", parsed.fine):
         meshconfig.setGlobalMeshSliceAndStack(100)
+    if parsed.no_mesh_cache:
+        scene["mesh_cache"] = False
+    if parsed.jobs is not None:
+        scene["mesh_workers"] = parsed.jobs
 
     points = None
+    if parsed.event_display and not parsed.add_points:
+        msg = "--event-display requires --add-points"
+        raise ValueError(msg)
     if parsed.add_points:
         table_parts = [c.strip() for c in parsed.add_points_columns.split(":")]
-        point_table = table_parts[0]
-        point_columns = [c.strip() for c in table_parts[1].split(",")]
+        point_columns = [c.strip() for c in table_parts[-1].split(",")]
         if len(table_parts) != 2 or len(point_columns) != 3:
             msg = "invalid parameter for points"
             raise ValueError(msg)
 
-        points = _load_points(parsed.add_points, point_table, point_columns, None, None)
-
-    log.info("loading GDML geometry from %s", parsed.filename)
-    registry = gdml.Reader(parsed.filename).getRegistry()
+        points_entry = {
+            "file": parsed.add_points,
+            "table": table_parts[0],
+            "columns": point_columns,
+        }
+        if parsed.event_display:
+            scene["events"] = points_entry
+        elif parsed.lod:
+            scene.setdefault("points", []).append({**points_entry, "lod": True})
+        else:
+            (points,) = _load_scene_points([points_entry])
+
+    if parsed.snapshot:
+        log.info("loading registry snapshot from %s", parsed.filename)
+        registry = load_snapshot(parsed.filename)
+    elif is_snapshot(parsed.filename):
+        # never unpickle a file without explicit consent of the user.
+        msg = (
+            f"{parsed.filename} is a registry snapshot, pass --snapshot to load it "
+            "(only for snapshots from trusted sources)"
+        )
+        raise ValueError(msg)
+    else:
+        log.info("loading GDML geometry from %s", parsed.filename)
+        # meshing happens in the viewer, possibly from the mesh cache.
+        meshconfig.doMeshing = False
+        try:
+            registry = read_gdml(parsed.filename)
+        finally:
+            meshconfig.doMeshing = True
 
     log.info("visualizing...")
     visualize(registry, scene, points)
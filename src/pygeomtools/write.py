@@ -1,10 +1,27 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
+import importlib
+import io
+import logging
+import multiprocessing
 import os
+import re
+import tempfile
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from xml.parsers import expat
 
+from dbetto.utils import load_dict
 from pyg4ometry import gdml, geant4
+from pyg4ometry.gdml import Defines as gdml_defines
 
-from . import detectors, geometry, visualization
+from . import detectors, geometry, utils, visualization
+
+log = logging.getLogger(__name__)
 
 
 def _run_all_checks(
@@ -21,12 +38,509 @@ def _run_all_checks(
     geometry.check_optical_surfaces(reg)
 
 
+def _new_gdml_writer() -> gdml.Writer:
+    # pyg4ometry has added color writing in their bdsim style by default in 2025.
+    try:
+        return gdml.Writer(writeColour=False)
+    except TypeError:
+        return gdml.Writer()
+
+
+_GDML_SECTIONS = ("defines", "materials", "solids", "structure", "userinfo")
+
+
+class _HashingWriter:
+    """Text stream wrapper that keeps a hash of everything written to it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.hash = hashlib.sha256()
+
+    def write(self, data: str) -> None:
+        self.hash.update(data.encode())
+        self.f.write(data)
+
+    def hexdigest(self) -> str:
+        return self.hash.hexdigest()
+
+
+def _file_content_hash(gdml_file: Path) -> str:
+    h = hashlib.sha256()
+    with utils.open_gdml(gdml_file) as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk.encode())
+    return h.hexdigest()
+
+
+_CANONICAL_PRECISION = 12
+# only floating point literals are formatted, integers (e.g. copy numbers) are kept.
+_FLOAT_RE = re.compile(
+    r"(?<![\w.])(?:(?:\d+\.\d*|\.\d+)(?:[eE][-+]?\d+)?|\d+[eE][-+]?\d+)(?![\w.])"
+)
+_NON_NUMERIC_ATTRIBUTES = frozenset(
+    ("name", "ref", "auxtype", "auxvalue", "auxunit", "unit", "lunit", "aunit", "type")
+)
+
+
+def _format_float(m: re.Match) -> str:
+    # adding 0.0 normalizes negative zeros.
+    return format(float(m.group()) + 0.0, f".{_CANONICAL_PRECISION}g")
+
+
+def _canonicalize(node) -> None:
+    """Normalize a serialized GDML element in place, for canonical output.
+
+    All floating point literals are formatted with a fixed precision, and the order of
+    physical volumes and of the entries of the detector structures is sorted by name.
+    """
+    if node.nodeType == node.TEXT_NODE:
+        node.data = _FLOAT_RE.sub(_format_float, node.data)
+        return
+    if node.nodeType != node.ELEMENT_NODE:
+        return
+
+    for attr, value in list(node.attributes.items()):
+        if attr not in _NON_NUMERIC_ATTRIBUTES:
+            node.setAttribute(attr, _FLOAT_RE.sub(_format_float, value))
+
+    sort_key = None
+    if node.tagName == "volume":
+        sort_key = ("physvol", "name")
+    elif node.tagName == "auxiliary" and node.getAttribute("auxtype") in (
+        detectors.AUXKEY_DET,
+        detectors.AUXKEY_DETMETA,
+    ):
+        sort_key = ("auxiliary", "auxtype")
+    if sort_key is not None:
+        tag, attr = sort_key
+        children = [c for c in node.childNodes if getattr(c, "tagName", None) == tag]
+        for c in children:
+            node.removeChild(c)
+        for c in sorted(children, key=lambda c: c.getAttribute(attr)):
+            node.appendChild(c)
+
+    for child in node.childNodes:
+        _canonicalize(child)
+
+
+def _define_dependencies(define, defines: dict) -> list[str]:
+    if isinstance(define, gdml_defines.Matrix):
+        expressions = [v.expression.expressionString for v in define.values]
+    elif isinstance(define, gdml_defines.VectorBase):
+        expressions = [c.expressionString for c in (define.x, define.y, define.z)]
+    else:
+        expressions = [define.expression.expressionString]
+    names = set(re.findall(r"[A-Za-z_]\w*", " ".join(expressions)))
+    return sorted(n for n in names if n in defines and n != define.name)
+
+
+def _sorted_defines(defines: dict) -> list:
+    """Sort defines by name, but always write dependencies first."""
+    result = []
+    seen = set()
+
+    def _visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for dep in _define_dependencies(defines[name], defines):
+            _visit(dep)
+        result.append(defines[name])
+
+    for name in sorted(defines):
+        _visit(name)
+    return result
+
+
+class _StreamingGdmlWriter:
+    """Write a GDML file element-by-element, without building the full XML DOM.
+
+    This re-uses the element writers of :class:`pyg4ometry.gdml.Writer`, but serializes
+    and discards each top-level element right after it has been created. As writing one
+    element might add elements to other sections (i.e. defines or materials), each
+    section is first streamed to a temporary file. The output is identical to the output
+    of :meth:`pyg4ometry.gdml.Writer.write`.
+
+    If a ``world`` volume is given, only its volume tree (and the materials, solids and
+    surfaces needed by it) is written, and without any user info. The physical volumes
+    in ``modules`` are written as references to other GDML files and their volume trees
+    are not written.
+
+    In ``canonical`` mode, all elements are written sorted by name (but with all
+    dependencies first), and floating point values are formatted with a fixed
+    precision.
+    """
+
+    def __init__(
+        self,
+        registry: geant4.Registry,
+        aux_only: bool = False,
+        world: geant4.LogicalVolume | None = None,
+        modules: dict[int, str] | None = None,
+        comment: str | None = None,
+        canonical: bool = False,
+    ):
+        self.registry = registry
+        self.comment = comment
+        self.canonical = canonical
+        self.aux_only = aux_only
+        self.world = world
+        self.modules = modules or {}
+        self.user_info = registry.userInfo if world is None else []
+        self.module_surfaces = set()
+
+    def _flush(self, sections: dict) -> None:
+        for name, f in sections.items():
+            node = getattr(self.w, name)
+            while node.firstChild is not None:
+                child = node.removeChild(node.firstChild)
+                if self.canonical:
+                    _canonicalize(child)
+                child.writexml(f, "\t\t", "\t", "\n")
+                child.unlink()
+
+    def write(self, gdml_file: str | os.PathLike, skip_unchanged: bool = False) -> bool:
+        """Write the GDML file.
+
+        Returns ``False`` if ``skip_unchanged`` is set and the existing file already has
+        the same content, i.e. the file has not been touched.
+        """
+        self.w = _new_gdml_writer()
+        self.w.registry = self.registry
+        if self.modules:
+            self._patch_physvol_writer()
+
+        gdml_file = Path(gdml_file)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sections = {
+                name: (Path(tmpdir) / name).open("w+", encoding="utf-8")
+                for name in _GDML_SECTIONS
+            }
+            try:
+                self._write_elements(sections)
+                if not skip_unchanged:
+                    with utils.open_gdml(gdml_file, "w") as f:
+                        self._write_document(f, sections)
+                    return True
+
+                tmp_file = _temporary_file_name(gdml_file)
+                with utils.open_gdml(tmp_file, "w") as f:
+                    new_hash = _HashingWriter(f)
+                    self._write_document(new_hash, sections)
+            finally:
+                for f in sections.values():
+                    f.close()
+
+        if gdml_file.exists() and _file_content_hash(gdml_file) == new_hash.hexdigest():
+            tmp_file.unlink()
+            return False
+        tmp_file.replace(gdml_file)
+        return True
+
+    def _patch_physvol_writer(self) -> None:
+        w = self.w
+        write_pv = w.writePhysicalVolume
+
+        def _write_module_pv(pv):
+            if id(pv) not in self.modules:
+                return write_pv(pv)
+
+            pvol = w.doc.createElement("physvol")
+            pvol.setAttribute("name", f"{w.prepend}{pv.name}")
+            fr = w.doc.createElement("file")
+            fr.setAttribute("name", self.modules[id(pv)])
+            pvol.appendChild(fr)
+
+            w.writeVectorVariable(pvol, pv.position)
+            w.writeVectorVariable(pvol, pv.rotation)
+            w.writeVectorVariable(pvol, pv.scale)
+
+            if pv.copyNumber != 0:
+                pvol.setAttribute("copynumber", str(int(float(pv.copyNumber))))
+            return pvol
+
+        w.writePhysicalVolume = _write_module_pv
+
+    def _volume_tree(self) -> list[geant4.LogicalVolume]:
+        """Get all volumes in the tree below the world volume, with daughters first."""
+        volumes = []
+        seen = set()
+
+        def _visit(lv):
+            if id(lv) in seen:
+                return
+            seen.add(id(lv))
+            daughters = lv.daughterVolumes
+            if self.canonical:
+                daughters = sorted(daughters, key=lambda pv: pv.name)
+            for pv in daughters:
+                if id(pv) not in self.modules:
+                    _visit(pv.logicalVolume)
+            volumes.append(lv)
+
+        _visit(self.world if self.world is not None else self.registry.worldVolume)
+        return volumes
+
+    def _write_elements(self, sections: dict) -> None:
+        w, reg = self.w, self.registry
+
+        if not self.aux_only and self.world is None and not self.modules:
+            # set the world again to force a refresh on the ordering of volumes.
+            reg.setWorld(reg.worldName)
+
+            for define in self._defines():
+                w.writeDefine(define)
+                self._flush(sections)
+            for material in self._sorted(reg.materialDict):
+                w.writeMaterial(material)
+                self._flush(sections)
+            for solid in self._sorted(reg.solidDict):
+                w.writeSolid(solid)
+                self._flush(sections)
+            volumes = [reg.logicalVolumeDict[name] for name in reg.logicalVolumeList]
+            if self.canonical:
+                volumes = self._volume_tree()
+            for lv in volumes:
+                if lv.type == "logical":
+                    w.writeLogicalVolume(lv)
+                    w.writeMaterial(lv.material)
+                elif lv.type == "assembly":
+                    w.writeAssemblyVolume(lv)
+                self._flush(sections)
+            for surface in self._sorted(reg.surfaceDict):
+                if surface.type == "bordersurface":
+                    w.writeBorderSurface(surface)
+                elif surface.type == "skinsurface":
+                    w.writeSkinSurface(surface)
+                self._flush(sections)
+
+        elif not self.aux_only:
+            # only write the elements needed for a (partial) volume tree.
+            volumes = self._volume_tree()
+            surfaces = self._surfaces(volumes)
+            for define in self._defines(self._used_defines(volumes, surfaces)):
+                w.writeDefine(define)
+                self._flush(sections)
+
+            for lv in volumes:
+                if lv.type == "logical":
+                    w.writeSolid(lv.solid)
+                    w.writeLogicalVolume(lv)
+                    w.writeMaterial(lv.material)
+                elif lv.type == "assembly":
+                    w.writeAssemblyVolume(lv)
+                self._flush(sections)
+
+            for surface in surfaces:
+                w.writeSolid(surface.surface_property)
+                if surface.type == "bordersurface":
+                    w.writeBorderSurface(surface)
+                elif surface.type == "skinsurface":
+                    w.writeSkinSurface(surface)
+                self._flush(sections)
+
+        for auxiliary in self.user_info:
+            w.writeAuxiliary(auxiliary)
+            self._flush(sections)
+
+    def _sorted(self, objects: dict) -> list:
+        if self.canonical:
+            return [objects[name] for name in sorted(objects)]
+        return list(objects.values())
+
+    def _defines(self, names: set[str] | None = None) -> list:
+        defines = self.registry.defineDict
+        if names is not None:
+            defines = {n: d for n, d in defines.items() if n in names}
+        if self.canonical:
+            return _sorted_defines(defines)
+        return list(defines.values())
+
+    def _used_defines(
+        self, volumes: list[geant4.LogicalVolume], surfaces: list
+    ) -> set[str]:
+        """Get the names of the defines needed by the given volumes and surfaces."""
+        logical = [lv for lv in volumes if lv.type == "logical"]
+        solids = {id(lv.solid): lv.solid for lv in logical}
+        solids |= {id(s.surface_property): s.surface_property for s in surfaces}
+        materials = {id(lv.material): lv.material for lv in logical}
+        pvs = [pv for lv in volumes for pv in lv.daughterVolumes]
+        return geometry._used_defines(self.registry, solids, materials, pvs)
+
+    def _surfaces(self, volumes: list[geant4.LogicalVolume]) -> list:
+        if self.world is None:
+            # the main file holds all surfaces that are not part of any module, also if
+            # they span different modules.
+            return [
+                s
+                for s in self._sorted(self.registry.surfaceDict)
+                if id(s) not in self.module_surfaces
+            ]
+
+        lvs = {id(lv) for lv in volumes}
+        pvs = {
+            id(pv)
+            for lv in volumes
+            for pv in lv.daughterVolumes
+            if id(pv) not in self.modules
+        }
+        surfaces = []
+        for surface in self._sorted(self.registry.surfaceDict):
+            if surface.type == "skinsurface":
+                inside = id(surface.volumeref) in lvs
+            else:
+                inside = id(surface.physref1) in pvs and id(surface.physref2) in pvs
+            if inside:
+                surfaces.append(surface)
+        return surfaces
+
+    def _write_document(self, f, sections: dict) -> None:
+        # this exactly mimics the output of minidom's toprettyxml().
+        top = self.w.top
+        f.write('<?xml version="1.0" ?>\n')
+        if self.comment is not None:
+            f.write(f"<!-- {self.comment} -->\n")
+        f.write("<gdml")
+        for attr, value in top.attributes.items():
+            f.write(f' {attr}="{value}"')
+        f.write(">\n")
+
+        for name in _GDML_SECTIONS:
+            tag = getattr(self.w, name).tagName
+            if name == "userinfo" and not self.aux_only and not self.user_info:
+                # userinfo is not supported by older Geant4 versions, only write it if
+                # needed.
+                continue
+            section = sections[name]
+            if section.tell() == 0:
+                f.write(f"\t<{tag}/>\n")
+                continue
+            f.write(f"\t<{tag}>\n")
+            section.seek(0)
+            while chunk := section.read(1 << 20):
+                f.write(chunk)
+            f.write(f"\t</{tag}>\n")
+
+        if self.aux_only:
+            f.write("\t<setup/>\n")
+        else:
+            world = (
+                self.world.name if self.world is not None else self.registry.worldName
+            )
+            f.write('\t<setup name="Default" version="1.0">\n')
+            f.write(f'\t\t<world ref="{self.w.prepend}{world}"/>\n')
+            f.write("\t</setup>\n")
+        f.write("</gdml>\n")
+
+
+def _temporary_file_name(gdml_file: Path) -> Path:
+    # keep the compression suffix, that is used to select the compression.
+    if gdml_file.suffix.lower() in (".gz", ".xz", ".zst"):
+        return gdml_file.with_name(f".{gdml_file.stem}.tmp{gdml_file.suffix}")
+    return gdml_file.with_name(f".{gdml_file.name}.tmp")
+
+
+_HASH_COMMENT = "pygeomtools registry hash: {}"
+_HASH_COMMENT_RE = re.compile(r"<!-- pygeomtools registry hash: ([0-9a-f]+) -->")
+
+
+def _output_hash(
+    reg: geant4.Registry, canonical: bool, modules: Sequence[str] | None = None
+) -> str:
+    """Get the registry hash, that also distinguishes the output mode."""
+    reg_hash = geometry.get_registry_hash(reg)
+    if canonical:
+        reg_hash = hashlib.sha256(f"{reg_hash}:canonical".encode()).hexdigest()
+    if modules:
+        modules_key = ",".join(sorted(modules))
+        reg_hash = hashlib.sha256(
+            f"{reg_hash}:modules:{modules_key}".encode()
+        ).hexdigest()
+    return reg_hash
+
+
+def _read_registry_hash(gdml_file: Path) -> str | None:
+    """Read the registry hash stored in the header of an existing GDML file."""
+    if not gdml_file.exists():
+        return None
+    try:
+        with utils.open_gdml(gdml_file) as f:
+            header = f.readline() + f.readline()
+    except (OSError, EOFError, ValueError):
+        return None
+    m = _HASH_COMMENT_RE.search(header)
+    return m.group(1) if m else None
+
+
+def _module_file_name(gdml_file: Path, module: str) -> Path:
+    compression = ""
+    if gdml_file.suffix.lower() in (".gz", ".xz", ".zst"):
+        compression = gdml_file.suffix
+        gdml_file = gdml_file.with_suffix("")
+    return gdml_file.with_name(
+        f"{gdml_file.stem}.{module}{gdml_file.suffix}{compression}"
+    )
+
+
+def _write_modular(
+    reg: geant4.Registry,
+    gdml_file: str | os.PathLike,
+    modules: Sequence[str],
+    max_workers: int | None = None,
+    comment: str | None = None,
+    canonical: bool = False,
+) -> None:
+    gdml_file = Path(gdml_file)
+
+    module_pvs = {}
+    for name in modules:
+        pv = reg.physicalVolumeDict.get(name)
+        if pv is None or pv.type != "placement" or pv.logicalVolume.type != "logical":
+            msg = f"module {name} is not a physical volume placing a logical volume"
+            raise ValueError(msg)
+        module_pvs[id(pv)] = (pv, _module_file_name(gdml_file, name))
+
+    # the module files are placed next to the main file, and are referenced by their
+    # plain file names.
+    module_refs = {i: f.name for i, (_, f) in module_pvs.items()}
+    writers = {
+        gdml_file: _StreamingGdmlWriter(
+            reg, modules=module_refs, comment=comment, canonical=canonical
+        )
+    }
+    for pv, module_file in module_pvs.values():
+        writer = _StreamingGdmlWriter(
+            reg, world=pv.logicalVolume, modules=module_refs, canonical=canonical
+        )
+        writers[module_file] = writer
+        writers[gdml_file].module_surfaces |= {
+            id(s) for s in writer._surfaces(writer._volume_tree())
+        }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            f: executor.submit(writer.write, f, skip_unchanged=True)
+            for f, writer in writers.items()
+        }
+        for f, future in futures.items():
+            if future.result():
+                log.info("wrote GDML file %s", f)
+            else:
+                log.info("skipped writing unchanged GDML file %s", f)
+
+
 def write_pygeom(
     reg: geant4.Registry,
     gdml_file: str | os.PathLike | None = None,
     write_vis_auxvals: bool = True,
     *,
     ignore_duplicate_uids: bool | set[int] = False,
+    prune: bool = False,
+    deduplicate: bool = False,
+    modules: Sequence[str] | None = None,
+    max_workers: int | None = None,
+    skip_unchanged: bool = False,
+    canonical: bool = False,
 ) -> None:
     """Commit all auxiliary data to the registry and write out a GDML file.
 
@@ -35,11 +549,44 @@ def write_pygeom(
     reg
         the pyg4ometry registry containing the geometry to be written.
     gdml_file
-        GDML file to write, or ``None`` just for performing the other actions.
+        GDML file to write, or ``None`` just for performing the other actions. Files
+        ending in ``.gz``, ``.xz`` or ``.zst`` are compressed while writing.
     write_vis_auxvals
         if ``False``, do not store colors in the output file.
     ignore_duplicate_uids
         skip the check for duplicate detector uids for all, or just some, uids.
+    prune
+        remove all objects from the registry that are not used by the geometry, before
+        writing. Note that this modifies the registry.
+    deduplicate
+        merge identical solids and logical volumes before writing. Note that this
+        modifies the registry.
+    modules
+        names of physical volumes, whose volume trees are written to separate GDML
+        files (e.g. ``geometry.<name>.gdml`` for ``geometry.gdml``). The main file
+        references these module files instead of containing the volume trees. All
+        files are written concurrently, and files with unchanged contents are not
+        overwritten. The user info is only stored in the main file.
+
+        .. note::
+            The module files are referenced by their file names, relative to the
+            main file. Geant4 resolves these references against its working
+            directory, so the geometry has to be loaded from the directory containing
+            the files. pyg4ometry cannot read the main file of a modular geometry.
+    max_workers
+        number of threads for writing the module files.
+    skip_unchanged
+        store a :func:`content hash <.geometry.get_registry_hash>` of the registry in
+        the output file, and do not write the file at all if the existing output file
+        was written from a registry with the same hash.
+    canonical
+        write a canonical representation of the registry, that does not depend on the
+        order of construction: defines, materials, solids, volumes and surfaces are
+        sorted by name (with all dependencies first), physical volumes and detectors
+        are sorted by name, and all floating point values are written with a fixed
+        precision of 12 significant digits. Names generated by pyg4ometry and
+        *legend-pygeom-tools* are derived from the names of their owners, and are thus
+        already deterministic.
 
     See also
     --------
@@ -48,18 +595,47 @@ def write_pygeom(
     .visualization.write_color_auxvals
     .geometry.check_registry_sanity
     .geometry.check_optical_surfaces
+    .geometry.prune_registry
+    .geometry.deduplicate_volumes
+    .geometry.get_registry_hash
     """
+    if prune:
+        geometry.prune_registry(reg)
+    if deduplicate:
+        geometry.deduplicate_volumes(reg)
+
     _run_all_checks(reg, write_vis_auxvals, ignore_duplicate_uids)
 
     if gdml_file is not None:
-        # pyg4ometry has added color writing in their bdsim style by default in 2025.
-        try:
-            w = gdml.Writer(writeColour=False)
-        except TypeError:
-            w = gdml.Writer()
+        _write_committed(
+            reg, Path(gdml_file), modules, max_workers, skip_unchanged, canonical
+        )
+
+
+def _write_committed(
+    reg: geant4.Registry,
+    gdml_file: Path,
+    modules: Sequence[str] | None = None,
+    max_workers: int | None = None,
+    skip_unchanged: bool = False,
+    canonical: bool = False,
+) -> None:
+    """Write a registry, after all auxiliary data has been committed."""
+    comment = None
+    if skip_unchanged:
+        reg_hash = _output_hash(reg, canonical, modules)
+        module_files = [_module_file_name(gdml_file, m) for m in modules or []]
+        if _read_registry_hash(gdml_file) == reg_hash and all(
+            f.exists() for f in module_files
+        ):
+            log.info("skipped writing %s, the registry is unchanged", gdml_file)
+            return
+        comment = _HASH_COMMENT.format(reg_hash)
 
-        w.addDetector(reg)
-        w.write(str(gdml_file))
+    if modules:
+        _write_modular(reg, gdml_file, modules, max_workers, comment, canonical)
+    else:
+        _StreamingGdmlWriter(reg, comment=comment, canonical=canonical).write(gdml_file)
 
 
 def write_pygeom_aux_only(
@@ -79,7 +655,8 @@ def write_pygeom_aux_only(
     reg
         the pyg4ometry registry containing the geometry to be written.
     gdml_file
-        GDML file to write, or ``None`` just for performing the other actions.
+        GDML file to write, or ``None`` just for performing the other actions. Files
+        ending in ``.gz``, ``.xz`` or ``.zst`` are compressed while writing.
     write_vis_auxvals
         if ``False``, do not store colors in the output file.
     ignore_duplicate_uids
@@ -95,12 +672,500 @@ def write_pygeom_aux_only(
         _run_all_checks(reg, write_vis_auxvals, ignore_duplicate_uids)
 
     if gdml_file is not None:
-        # pyg4ometry has added color writing in their bdsim style by default in 2025.
-        try:
-            w = gdml.Writer(writeColour=False)
-        except TypeError:
-            w = gdml.Writer()
+        _StreamingGdmlWriter(reg, aux_only=True).write(gdml_file)
 
-        for auxiliary in reg.userInfo:
-            w.writeAuxiliary(auxiliary)
-        w.write(str(gdml_file))
+
+class _AuxiliaryScanner:
+    """Find the byte ranges of all auxiliary data in a GDML file.
+
+    The file is parsed as a stream, so that the file is never fully kept in memory.
+    Each recorded range includes the whitespace in front of the element, i.e. starts
+    directly after the end of the previous sibling (or the start tag of the parent).
+    """
+
+    def __init__(self, lv_names: set[str]):
+        self.lv_names = lv_names
+        self.stack = []
+        self.pending = []
+        self.hash_comments = []
+        self.userinfo = None
+        self.setup = None
+        self.volumes = {}
+
+        self.parser = expat.ParserCreate()
+        self.parser.buffer_text = False
+        self.parser.StartElementHandler = self._start
+        self.parser.EndElementHandler = self._end
+        self.parser.CommentHandler = self._comment
+        self.parser.XmlDeclHandler = self._xml_decl
+        self.xml_decl = None
+        self.parser.DefaultHandlerExpand = self._default
+        self.whitespace = None
+
+    def scan(self, f) -> None:
+        size = 0
+        while chunk := f.read(1 << 20):
+            size += len(chunk)
+            self.parser.Parse(chunk, False)
+        self.parser.Parse(b"", True)
+        self._resolve(size)
+
+    def _resolve(self, idx: int) -> None:
+        # the end of an element is only known at the start of the next parser event.
+        for callback in self.pending:
+            callback(idx)
+        self.pending.clear()
+
+    def _event(self) -> int:
+        idx = self.parser.CurrentByteIndex
+        self._resolve(idx)
+        return idx
+
+    def _start(self, name: str, attrs: dict) -> None:
+        idx = self._event()
+        parent = self.stack[-1] if self.stack else None
+        frame = {
+            "path": (*parent["path"], name) if parent else (name,),
+            "start": parent["boundary"] if parent else idx,
+            "name": attrs.get("name"),
+            "aux": [],
+        }
+        self.stack.append(frame)
+        if frame["path"] == ("gdml", "setup") and self.setup is None:
+            self.setup = frame["start"]
+
+        def _set_boundary(i):
+            frame["boundary"] = frame["insert"] = i
+
+        self.pending.append(_set_boundary)
+
+    def _end(self, _name: str) -> None:
+        self._event()
+        frame = self.stack.pop()
+        parent = self.stack[-1] if self.stack else None
+
+        def _done(i):
+            if parent is not None:
+                parent["boundary"] = i
+            self._element_done(frame, parent, i)
+
+        self.pending.append(_done)
+
+    def _element_done(self, frame: dict, parent: dict | None, end: int) -> None:
+        path = frame["path"]
+        if path == ("gdml", "userinfo"):
+            self.userinfo = (frame["start"], end)
+        elif path == ("gdml", "structure", "volume"):
+            if frame["name"] in self.lv_names:
+                self.volumes[frame["name"]] = frame
+        elif path[:3] == ("gdml", "structure", "volume") and len(path) == 4:
+            if path[3] == "auxiliary":
+                parent["aux"].append((frame["start"], end))
+            elif path[3] in ("materialref", "solidref"):
+                parent["insert"] = end
+
+    def _xml_decl(self, *_args) -> None:
+        self._event()
+        self.pending.append(lambda i: setattr(self, "xml_decl", i))
+
+    def _default(self, data: str) -> None:
+        idx = self._event()
+        self.whitespace = idx if data.isspace() else None
+
+    def _comment(self, data: str) -> None:
+        idx = self._event()
+        if not self.stack and _HASH_COMMENT_RE.fullmatch(f"<!--{data}-->"):
+            # also remove the line break in front of the comment.
+            start = idx if self.whitespace is None else self.whitespace
+            self.pending.append(lambda i: self.hash_comments.append((start, i)))
+
+
+def _serialize_element(element, indent: str) -> str:
+    # serialize like minidom's toprettyxml(), including the whitespace in front.
+    f = io.StringIO()
+    f.write("\n")
+    element.writexml(f, indent, "\t", "\n")
+    return f.getvalue()[:-1]
+
+
+def _serialize_auxiliary(auxiliaries: list, indent: str, canonical: bool) -> str:
+    w = _new_gdml_writer()
+    parent = w.doc.createElement("volume")
+    for aux in auxiliaries:
+        w.writeAuxiliary(aux, parent=parent)
+    if canonical:
+        for child in parent.childNodes:
+            _canonicalize(child)
+    return "".join(_serialize_element(c, indent) for c in parent.childNodes)
+
+
+def _copy_bytes(src, dst, n: int) -> None:
+    """Copy ``n`` bytes from ``src`` to ``dst``, or skip them if ``dst`` is ``None``."""
+    while n > 0:
+        chunk = src.read(min(n, 1 << 20))
+        if not chunk:
+            msg = "GDML file changed while patching"
+            raise RuntimeError(msg)
+        if dst is not None:
+            dst.write(chunk)
+        n -= len(chunk)
+
+
+def patch_pygeom_aux(
+    reg: geant4.Registry,
+    gdml_file: str | os.PathLike,
+    output_file: str | os.PathLike | None = None,
+    write_vis_auxvals: bool = True,
+    *,
+    ignore_duplicate_uids: bool | set[int] = False,
+) -> None:
+    """Commit all auxiliary data to the registry and replace the auxiliary data in an
+    existing GDML file.
+
+    Only the user info and the auxiliary data of the logical volumes (e.g. colors)
+    are replaced, all other parts of the file are copied without parsing them into
+    pyg4ometry objects. This makes it possible to update detector metadata, uids or
+    colors of large geometries without writing out the full geometry again.
+
+    If the file was written from the same registry, the result is identical to
+    writing the full file with :func:`write_pygeom` again.
+
+    Parameters
+    ----------
+    reg
+        the pyg4ometry registry containing the auxiliary data. Logical volumes that are
+        not part of the registry, or not part of the GDML file, are not changed.
+    gdml_file
+        existing GDML file to patch (optionally compressed).
+    output_file
+        GDML file to write the patched file to. By default, ``gdml_file`` is replaced.
+    write_vis_auxvals
+        if ``False``, do not store colors in the output file.
+    ignore_duplicate_uids
+        skip the check for duplicate detector uids for all, or just some, uids.
+
+    See also
+    --------
+    write_pygeom
+    write_pygeom_aux_only
+    """
+    if hasattr(reg, "worldVolume") and reg.worldVolume is not None:
+        _run_all_checks(reg, write_vis_auxvals, ignore_duplicate_uids)
+
+    output_file = Path(output_file) if output_file is not None else Path(gdml_file)
+    _patch_committed(reg, Path(gdml_file), output_file)
+
+
+def _patch_committed(
+    reg: geant4.Registry,
+    gdml_file: Path,
+    output_file: Path,
+    comment: str | None = None,
+    canonical: bool = False,
+) -> None:
+    """Patch the auxiliary data, after all auxiliary data has been committed."""
+    lvs = {
+        name: lv
+        for name, lv in reg.logicalVolumeDict.items()
+        if getattr(lv, "type", "logical") == "logical"
+    }
+    scanner = _AuxiliaryScanner(set(lvs))
+    with utils.open_gdml(gdml_file, "rb") as f:
+        scanner.scan(f)
+
+    edits = [(start, end, "") for start, end in scanner.hash_comments]
+    if comment is not None and scanner.xml_decl is not None:
+        edits.append((scanner.xml_decl, scanner.xml_decl, f"\n<!-- {comment} -->"))
+
+    user_info = ""
+    if reg.userInfo:
+        w = _new_gdml_writer()
+        for aux in reg.userInfo:
+            w.writeAuxiliary(aux)
+        if canonical:
+            _canonicalize(w.userinfo)
+        user_info = _serialize_element(w.userinfo, "\t")
+    if scanner.userinfo is not None:
+        edits.append((*scanner.userinfo, user_info))
+    elif user_info:
+        if scanner.setup is None:
+            msg = f"{gdml_file} does not contain a setup element"
+            raise RuntimeError(msg)
+        edits.append((scanner.setup, scanner.setup, user_info))
+
+    for name, frame in scanner.volumes.items():
+        lv = lvs[name]
+        aux = lv.auxiliary
+        if not isinstance(aux, list | tuple):
+            aux = [aux] if aux else []
+        new_aux = _serialize_auxiliary(aux, "\t\t\t", canonical)
+
+        if frame["aux"]:
+            edits.append((*frame["aux"][0], new_aux))
+            edits.extend((start, end, "") for start, end in frame["aux"][1:])
+        elif new_aux:
+            edits.append((frame["insert"], frame["insert"], new_aux))
+
+    # insertions have to come before replacements at the same position.
+    edits.sort(key=lambda e: e[:2])
+    tmp_file = _temporary_file_name(output_file)
+    with (
+        utils.open_gdml(gdml_file, "rb") as src,
+        utils.open_gdml(tmp_file, "wb") as dst,
+    ):
+        pos = 0
+        for start, end, text in edits:
+            _copy_bytes(src, dst, start - pos)
+            dst.write(text.encode())
+            _copy_bytes(src, None, end - start)
+            pos = end
+        while chunk := src.read(1 << 20):
+            dst.write(chunk)
+    tmp_file.replace(output_file)
+    log.info("patched auxiliary data of %d volumes", len(scanner.volumes))
+
+
+def _write_variant(
+    builder: Callable[[Any], geant4.Registry],
+    config: Any,
+    idx: int,
+    gdml_files: Sequence[Path],
+    owners: dict,
+    written: dict,
+    done: Sequence,
+    options: dict,
+) -> str:
+    """Build and write a single variant of a batch in a worker process."""
+    gdml_file = gdml_files[idx]
+    try:
+        reg = builder(config)
+        if options["prune"]:
+            geometry.prune_registry(reg)
+        if options["deduplicate"]:
+            geometry.deduplicate_volumes(reg)
+        _run_all_checks(
+            reg, options["write_vis_auxvals"], options["ignore_duplicate_uids"]
+        )
+
+        reg_hash = _output_hash(reg, options["canonical"])
+        comment = None
+        if options["skip_unchanged"]:
+            comment = _HASH_COMMENT.format(reg_hash)
+            if _read_registry_hash(gdml_file) == reg_hash:
+                return "unchanged"
+
+        # the first variant with a given geometry writes the full file, all others
+        # only replace the auxiliary data in a copy of that file.
+        owner = owners.setdefault(geometry.get_registry_hash(reg, False), idx)
+        if owner != idx:
+            done[owner].wait()
+            if written.get(owner, False):
+                _patch_committed(
+                    reg, gdml_files[owner], gdml_file, comment, options["canonical"]
+                )
+                return "patched"
+
+        _write_committed(
+            reg,
+            gdml_file,
+            skip_unchanged=options["skip_unchanged"],
+            canonical=options["canonical"],
+        )
+        written[idx] = True
+        return "written"
+    finally:
+        done[idx].set()
+
+
+def write_pygeom_batch(
+    builder: Callable[[Any], geant4.Registry],
+    configs: Sequence,
+    gdml_files: Sequence[str | os.PathLike],
+    write_vis_auxvals: bool = True,
+    *,
+    ignore_duplicate_uids: bool | set[int] = False,
+    prune: bool = False,
+    deduplicate: bool = False,
+    skip_unchanged: bool = False,
+    canonical: bool = False,
+    max_workers: int | None = None,
+) -> list[str]:
+    """Build and write many variants of a geometry in parallel.
+
+    Each variant is built by calling ``builder`` with one of the ``configs`` and written
+    with :func:`write_pygeom`, in a pool of worker processes. Variants that only differ
+    in their detector info, colors or other auxiliary data share the same geometry: it
+    is only serialized once, and the files of all other variants are created by
+    replacing the auxiliary data in a copy (see :func:`patch_pygeom_aux`).
+
+    Parameters
+    ----------
+    builder
+        function that builds the registry of one variant from its config. The function
+        and the configs must be picklable, i.e. the builder has to be a module-level
+        function.
+    configs
+        configs of all variants.
+    gdml_files
+        output GDML file for each config.
+    write_vis_auxvals
+        if ``False``, do not store colors in the output files.
+    ignore_duplicate_uids
+        skip the check for duplicate detector uids for all, or just some, uids.
+    prune
+        remove unused objects from the registries before writing.
+    deduplicate
+        merge identical solids and logical volumes before writing.
+    skip_unchanged
+        do not write variants if the existing output file was written from a registry
+        with the same content hash.
+    canonical
+        write a canonical representation of the registries, see :func:`write_pygeom`.
+    max_workers
+        number of worker processes.
+
+    Returns
+    -------
+    for each variant, if the file has been ``written``, ``patched`` from another
+    variant or left ``unchanged``.
+
+    See also
+    --------
+    write_pygeom
+    patch_pygeom_aux
+    """
+    if len(configs) != len(gdml_files):
+        msg = "the number of configs and output files differs"
+        raise ValueError(msg)
+    gdml_files = [Path(f) for f in gdml_files]
+    if len(set(gdml_files)) != len(gdml_files):
+        msg = "the output files are not unique"
+        raise ValueError(msg)
+
+    options = {
+        "write_vis_auxvals": write_vis_auxvals,
+        "ignore_duplicate_uids": ignore_duplicate_uids,
+        "prune": prune,
+        "deduplicate": deduplicate,
+        "skip_unchanged": skip_unchanged,
+        "canonical": canonical,
+    }
+    with (
+        multiprocessing.Manager() as manager,
+        ProcessPoolExecutor(max_workers) as pool,
+    ):
+        owners, written = manager.dict(), manager.dict()
+        done = [manager.Event() for _ in configs]
+        futures = [
+            pool.submit(
+                _write_variant,
+                builder,
+                c,
+                i,
+                gdml_files,
+                owners,
+                written,
+                done,
+                options,
+            )
+            for i, c in enumerate(configs)
+        ]
+        results = [f.result() for f in futures]
+
+    log.info(
+        "wrote %d variants (%d patched, %d unchanged)",
+        len(results),
+        results.count("patched"),
+        results.count("unchanged"),
+    )
+    return results
+
+
+def write_pygeom_batch_cli(args: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="legend-pygeom-write-batch",
+        description="%(prog)s command line interface",
+    )
+
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="store_true",
+        help="""Increase the program verbosity""",
+    )
+    parser.add_argument(
+        "--builder",
+        "-b",
+        required=True,
+        help="""function building a registry from a config, as module:function.""",
+    )
+    parser.add_argument(
+        "--output-dir",
+        "-o",
+        default=".",
+        help="""output directory. default: %(default)s""",
+    )
+    parser.add_argument(
+        "--suffix",
+        default=".gdml",
+        help="""suffix of the output files, that are named like the config files.
+        default: %(default)s""",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="""number of worker processes.""",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="""remove unused objects from the registries before writing.""",
+    )
+    parser.add_argument(
+        "--deduplicate",
+        action="store_true",
+        help="""merge identical solids and logical volumes before writing.""",
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="""do not write files of unchanged variants.""",
+    )
+    parser.add_argument(
+        "--canonical",
+        action="store_true",
+        help="""write canonical GDML files, independent of the construction order.""",
+    )
+    parser.add_argument(
+        "configs",
+        nargs="+",
+        help="""config files (JSON or YAML), one for each variant.""",
+    )
+
+    parsed = parser.parse_args(args)
+
+    logging.basicConfig()
+    if parsed.verbose:
+        logging.getLogger("pygeomtools").setLevel(logging.DEBUG)
+
+    module_name, _, function_name = parsed.builder.partition(":")
+    if not function_name:
+        msg = f"invalid builder {parsed.builder}, expected module:function"
+        raise ValueError(msg)
+    builder = getattr(importlib.import_module(module_name), function_name)
+
+    configs = [load_dict(c) for c in parsed.configs]
+    gdml_files = [
+        Path(parsed.output_dir) / (Path(c).stem + parsed.suffix) for c in parsed.configs
+    ]
+    write_pygeom_batch(
+        builder,
+        configs,
+        gdml_files,
+        prune=parsed.prune,
+        deduplicate=parsed.deduplicate,
+        skip_unchanged=parsed.skip_unchanged,
+        canonical=parsed.canonical,
+        max_workers=parsed.jobs,
+    )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import pint
 import pyg4ometry
 import pytest
 from dbetto import AttrsDict
@@ -294,3 +295,59 @@ def test_wrong_uid():
 
     with pytest.raises(ValueError):
         detectors.write_detector_auxvals(registry)
+
+
+def test_rewrite(tmp_path):
+    from pygeomtools import Region, RemageDetectorInfo, detectors, write_pygeom
+
+    registry = g4.Registry()
+    world = g4.solid.Box("world", 2, 2, 2, registry, "m")
+    world_lv = g4.LogicalVolume(
+        world, g4.MaterialPredefined("G4_Galactic"), "world", registry
+    )
+    registry.setWorld(world_lv)
+
+    det = g4.solid.Box("det", 0.1, 0.5, 0.5, registry, "m")
+    det = g4.LogicalVolume(det, g4.MaterialPredefined("G4_Ge"), "det", registry)
+    det1 = g4.PhysicalVolume([0, 0, 0], [-255, 0, 0], det, "det1", world_lv, registry)
+    det1.pygeom_active_detector = RemageDetectorInfo("germanium", 1, {"a": 1})
+    region = Region("reg")
+    region.set_cuts(1 * pint.get_application_registry().mm)
+    region.add_to_gdml(registry)
+
+    write_pygeom(registry, tmp_path / "geometry1.gdml")
+
+    # change the detector info after the first write; readers see the new info, but
+    # do not modify the registry.
+    det1.pygeom_active_detector = RemageDetectorInfo("scintillator", 2, {"a": 2})
+    user_info = list(registry.userInfo)
+    assert detectors.get_all_sensvols(registry)["det1"].uid == 2
+    assert detectors.get_sensvol_metadata(registry, "det1") == {"a": 2}
+    assert detectors.get_sensvol_by_uid(registry, 2)[0] == "det1"
+    assert all(a is b for a, b in zip(registry.userInfo, user_info, strict=True))
+    detectors.generate_detector_macro(registry, tmp_path / "det.mac")
+    assert (tmp_path / "det.mac").read_text() == (
+        "/RMG/Geometry/RegisterDetector Scintillator det1 2\n"
+    )
+    write_pygeom(registry, tmp_path / "geometry2.gdml")
+    assert [aux.auxtype for aux in registry.userInfo] == [
+        "Region",
+        "RMG_detector_meta",
+        "RMG_detector",
+    ]
+
+    registry = pyg4ometry.gdml.Reader(tmp_path / "geometry2.gdml").getRegistry()
+    assert detectors.get_sensvol_by_uid(registry, 2)[0] == "det1"
+    assert detectors.get_sensvol_metadata(registry, "det1") == {"a": 2}
+
+    # the detector info cannot be re-generated from a registry read from a file.
+    with pytest.raises(RuntimeError, match="already present"):
+        detectors.write_detector_auxvals(registry)
+
+    # detector info on the volumes has to match the structure read from the file.
+    pv = registry.physicalVolumeDict["det1"]
+    pv.pygeom_active_detector = RemageDetectorInfo("scintillator", 2)
+    assert detectors.get_all_sensvols(registry)["det1"].uid == 2
+    pv.pygeom_active_detector = RemageDetectorInfo("germanium", 42)
+    with pytest.raises(RuntimeError, match="differs"):
+        detectors.get_all_sensvols(registry)
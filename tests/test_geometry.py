@@ -1,10 +1,23 @@
 from __future__ import annotations
 
 import numpy as np
+import pyg4ometry
 import pyg4ometry.geant4 as g4
 import pytest
 
-from pygeomtools.geometry import check_materials, get_approximate_volume
+from pygeomtools.geometry import (
+    analyze_navigation_cost,
+    check_materials,
+    convert_union_chains,
+    deduplicate_volumes,
+    get_approximate_volume,
+    get_extent,
+    get_registry_hash,
+    get_solid_extent,
+    get_world_extent,
+    group_daughters,
+    prune_registry,
+)
 
 
 @pytest.fixture
@@ -72,3 +85,352 @@ def test_approximate_volume():
 
     assert np.isclose(get_approximate_volume(det).m, 0.1 * 0.5 * 0.5)
     assert np.isclose(get_approximate_volume(scint1).m, 0.5 - (0.1 * 0.5 * 0.5))
+
+
+def test_extent():
+    registry = g4.Registry()
+    world = g4.solid.Box("world", 2, 2, 2, registry, "m")
+    world_lv = g4.LogicalVolume(
+        world, g4.MaterialPredefined("G4_Galactic"), "world", registry
+    )
+    registry.setWorld(world_lv)
+
+    lar_mat = g4.MaterialPredefined("G4_lAr")
+    scint = g4.solid.Tubs("scint", 0, 100, 400, 0, 2 * np.pi, registry)
+    scint_lv = g4.LogicalVolume(scint, lar_mat, "scint", registry)
+    g4.PhysicalVolume(
+        [0, np.pi / 2, 0], [0, 0, 300], scint_lv, "scint", world_lv, registry
+    )
+
+    det = g4.solid.Box("det", 10, 20, 30, registry)
+    det_lv = g4.LogicalVolume(det, g4.MaterialPredefined("G4_Ge"), "det", registry)
+    det_pv = g4.PhysicalVolume([0, 0, 0], [0, 0, 50], det_lv, "det", scint_lv, registry)
+
+    assert np.allclose(get_extent(world_lv), [[-1000] * 3, [1000] * 3])
+    assert np.allclose(get_extent(scint_lv), [[-100, -100, -200], [100, 100, 200]])
+    assert np.allclose(get_extent(det_lv), [[-5, -10, -15], [5, 10, 15]])
+
+    # the daughter is rotated by 90 deg around y.
+    assert np.allclose(get_world_extent(det_pv), [[-65, -10, 295], [-35, 10, 305]])
+
+    # the extent is cached, but updated when changing the solid parameters.
+    det.pX = 50
+    assert np.allclose(get_extent(det_lv), [[-25, -10, -15], [25, 10, 15]])
+
+    union = g4.solid.Union("union", det, det, [[0, 0, 0], [0, 0, 100]], registry)
+    assert np.allclose(get_solid_extent(union), [[-25, -10, -15], [25, 10, 115]])
+    subtraction = g4.solid.Subtraction(
+        "subtraction", det, scint, [[0, 0, 0], [0, 0, 100]], registry
+    )
+    assert np.allclose(get_solid_extent(subtraction), get_solid_extent(det))
+
+
+def test_navigation_cost():
+    registry = g4.Registry()
+    world = g4.solid.Box("world", 2, 2, 2, registry, "m")
+    world_lv = g4.LogicalVolume(
+        world, g4.MaterialPredefined("G4_Galactic"), "world", registry
+    )
+    registry.setWorld(world_lv)
+
+    lar_mat = g4.MaterialPredefined("G4_lAr")
+    scint = g4.solid.Box("scint", 0.5, 1, 1, registry, "m")
+    scint_lv = g4.LogicalVolume(scint, lar_mat, "scint", registry)
+    g4.PhysicalVolume([0, 0, 0], [-255, 0, 0], scint_lv, "scint", world_lv, registry)
+
+    box = g4.solid.Box("box", 10, 10, 10, registry)
+    union = g4.solid.Union("union1", box, box, [[0, 0, 0], [0, 0, 5]], registry)
+    union = g4.solid.Union("union2", union, box, [[0, 0, 0], [0, 0, 10]], registry)
+    holder_lv = g4.LogicalVolume(union, lar_mat, "holder", registry)
+    for i in range(10):
+        g4.PhysicalVolume(
+            [0, 0, 0], [0, 0, 20 * i], holder_lv, f"holder{i}", scint_lv, registry
+        )
+
+    cost = analyze_navigation_cost(registry)
+    assert list(cost.index) == ["holder", "scint", "world"]
+    assert cost.loc["scint", "daughters"] == 10
+    assert cost.loc["holder", "placements"] == 10
+    assert cost.loc["holder", "level"] == 2
+    assert cost.loc["holder", "boolean_depth"] == 2
+    assert cost.loc["holder", "primitives"] == 3
+    assert cost.loc["holder", "cost"] == 20
+
+
+def test_group_daughters(tmp_path):
+    from pygeomtools import RemageDetectorInfo, detectors, write_pygeom
+
+    registry = g4.Registry()
+    world = g4.solid.Box("world", 2, 2, 2, registry, "m")
+    world_lv = g4.LogicalVolume(
+        world, g4.MaterialPredefined("G4_Galactic"), "world", registry
+    )
+    registry.setWorld(world_lv)
+
+    lar_mat = g4.MaterialPredefined("G4_lAr")
+    lar = g4.solid.Tubs("lar", 0, 500, 400, 0, 2 * np.pi, registry)
+    lar_lv = g4.LogicalVolume(lar, lar_mat, "lar", registry)
+    lar_pv = g4.PhysicalVolume([0, 0, 0], [0, 0, 0], lar_lv, "lar", world_lv, registry)
+
+    det = g4.solid.Box("det", 10, 10, 50, registry)
+    det_lv = g4.LogicalVolume(det, g4.MaterialPredefined("G4_Ge"), "det", registry)
+    det_pvs = []
+    for i in range(8):
+        for j in range(8):
+            pv = g4.PhysicalVolume(
+                [0, 0, 0.1 * i],
+                [40 * (i - 3.5), 40 * (j - 3.5), 10],
+                det_lv,
+                f"det_{i}_{j}",
+                lar_lv,
+                registry,
+            )
+            pv.set_pygeom_active_detector(RemageDetectorInfo("germanium", 8 * i + j))
+            det_pvs.append(pv)
+
+    osurf = g4.solid.OpticalSurface(
+        "os", "polished", "glisur", "dielectric_metal", 1.0, registry
+    )
+    g4.BorderSurface("os_det", lar_pv, det_pvs[0], osurf, registry)
+    g4.SkinSurface("os_lar", lar_lv, osurf, registry)
+
+    extents_before = [get_world_extent(pv) for pv in det_pvs]
+
+    envelopes = group_daughters(lar_lv, max_daughters=16)
+    assert len(envelopes) == 4
+    assert len(lar_lv.daughterVolumes) == 4
+    assert all(len(e.daughterVolumes) == 16 for e in envelopes)
+
+    for pv, extent in zip(det_pvs, extents_before, strict=True):
+        assert np.allclose(get_world_extent(pv), extent)
+
+    # the border surface is also defined toward the envelope.
+    surfaces = [
+        s
+        for s in registry.surfaceDict.values()
+        if s.type == "bordersurface" and s.physref2 is det_pvs[0]
+    ]
+    assert len(surfaces) == 2
+    assert {s.physref1.logicalVolume for s in surfaces} == {
+        lar_lv,
+        det_pvs[0].motherVolume,
+    }
+    # the skin surface of the mother also covers the envelopes.
+    skin_lvs = [
+        s.volumeref
+        for s in registry.surfaceDict.values()
+        if isinstance(s, g4.SkinSurface) and s.surface_property is osurf
+    ]
+    assert len(skin_lvs) == 5
+    assert set(skin_lvs) == {lar_lv, *envelopes}
+
+    write_pygeom(registry, tmp_path / "grouped.gdml")
+    registry = pyg4ometry.gdml.Reader(tmp_path / "grouped.gdml").getRegistry()
+    sensvols = detectors.get_all_sensvols(registry)
+    assert len(sensvols) == 64
+    assert sensvols["det_2_3"].uid == 19
+
+
+def test_convert_union_chains(tmp_path):
+    from pygeomtools import write_pygeom
+
+    registry = g4.Registry()
+    world = g4.solid.Box("world", 2, 2, 2, registry, "m")
+    world_lv = g4.LogicalVolume(
+        world, g4.MaterialPredefined("G4_Galactic"), "world", registry
+    )
+    registry.setWorld(world_lv)
+
+    box = g4.solid.Box("box", 10, 20, 30, registry)
+    inner = g4.solid.Union("inner", box, box, [[0, 0.4, 0], [0, 0, 25]], registry)
+    chain = box
+    for i in range(3):
+        chain = g4.solid.Union(
+            f"chain{i}", chain, box, [[0.3 * i, 0, 0.2], [15 * (i + 1), 3, 0]], registry
+        )
+    outer = g4.solid.Union("outer", chain, inner, [[0, 0, 0.5], [0, -40, 0]], registry)
+    # a shallow union is not converted.
+    shallow = g4.solid.Union("shallow", box, box, [[0, 0, 0], [5, 0, 0]], registry)
+
+    iron = g4.MaterialPredefined("G4_Fe")
+    lv = g4.LogicalVolume(outer, iron, "lv", registry)
+    g4.PhysicalVolume([0, 0, 0], [0, 0, 0], lv, "pv", world_lv, registry)
+    lv2 = g4.LogicalVolume(shallow, iron, "lv2", registry)
+    g4.PhysicalVolume([0, 0, 0], [0, 0, 500], lv2, "pv2", world_lv, registry)
+
+    volume = outer.mesh().volume()
+    extent = get_solid_extent(outer)
+
+    converted = convert_union_chains(registry)
+    assert converted == {"outer": (4, 6)}
+    assert lv.solid.type == "MultiUnion"
+    assert lv.solid.name == "outer"
+    assert lv2.solid is shallow
+    assert set(registry.solidDict) == {"world", "box", "outer", "shallow"}
+
+    assert np.isclose(lv.solid.mesh().volume(), volume)
+    assert np.allclose(get_solid_extent(lv.solid), extent)
+
+    write_pygeom(registry, tmp_path / "multiunion.gdml")
+    registry = pyg4ometry.gdml.Reader(tmp_path / "multiunion.gdml").getRegistry()
+    assert registry.logicalVolumeDict["lv"].solid.type == "MultiUnion"
+
+
+def test_deduplicate_volumes(tmp_path):
+    from pygeomtools import RemageDetectorInfo, detectors, write_pygeom
+
+    registry = g4.Registry()
+    world = g4.solid.Box("world", 2, 2, 2, registry, "m")
+    world_lv = g4.LogicalVolume(
+        world, g4.MaterialPredefined("G4_Galactic"), "world", registry
+    )
+    registry.setWorld(world_lv)
+
+    fiber_mat = g4.MaterialPredefined("G4_POLYSTYRENE")
+    for i in range(10):
+        fiber = g4.solid.Tubs(f"fiber_{i}", 0, 0.5, 100, 0, 2 * np.pi, registry)
+        core = g4.solid.Tubs(f"core_{i}", 0, 0.4, 100, 0, 2 * np.pi, registry)
+        clad = g4.solid.Subtraction(
+            f"clad_{i}", fiber, core, [[0, 0, 0], [0, 0, 0]], registry
+        )
+        lv = g4.LogicalVolume(clad, fiber_mat, f"clad_{i}", registry)
+        lv.pygeom_color_rgba = [0, 1, 0, 1] if i < 8 else [1, 0, 0, 1]
+        pv = g4.PhysicalVolume(
+            [0, 0, 0], [2 * i, 0, 0], lv, f"clad_{i}", world_lv, registry
+        )
+        pv.set_pygeom_active_detector(RemageDetectorInfo("scintillator", i))
+
+    reduction = deduplicate_volumes(registry)
+    assert reduction == {"solids": (31, 4), "logical_volumes": (11, 3)}
+    assert {pv.logicalVolume.name for pv in world_lv.daughterVolumes} == {
+        "clad_0",
+        "clad_8",
+    }
+
+    write_pygeom(registry, tmp_path / "dedup.gdml", deduplicate=True)
+    registry = pyg4ometry.gdml.Reader(tmp_path / "dedup.gdml").getRegistry()
+    assert len(registry.logicalVolumeDict) == 3
+    sensvols = detectors.get_all_sensvols(registry)
+    assert len(sensvols) == 10
+    assert sensvols["clad_9"].uid == 9
+
+
+def test_deduplicate_volumes_region():
+    from pygeomtools import Region
+
+    registry = g4.Registry()
+    world = g4.solid.Box("world", 2, 2, 2, registry, "m")
+    world_lv = g4.LogicalVolume(
+        world, g4.MaterialPredefined("G4_Galactic"), "world", registry
+    )
+    registry.setWorld(world_lv)
+
+    for i in range(3):
+        box = g4.solid.Box(f"box{i}", 1, 1, 1, registry)
+        lv = g4.LogicalVolume(box, g4.MaterialPredefined("G4_lAr"), f"lv{i}", registry)
+        g4.PhysicalVolume([0, 0, 0], [2 * i, 0, 0], lv, f"pv{i}", world_lv, registry)
+
+    region = Region("fine")
+    region.add_volume("lv1")
+    region.set_cuts()
+    region.add_to_gdml(registry)
+
+    reduction = deduplicate_volumes(registry)
+    # lv2 is merged into lv0, but the volume in the region is kept.
+    assert reduction["logical_volumes"] == (4, 3)
+    assert set(registry.logicalVolumeDict) == {"world", "lv0", "lv1"}
+
+
+def test_prune_registry(tmp_path):
+    from pygeomtools import write_pygeom
+
+    registry = g4.Registry()
+    world = g4.solid.Box("world", 2, 2, 2, registry, "m")
+    world_lv = g4.LogicalVolume(
+        world, g4.MaterialPredefined("G4_Galactic"), "world", registry
+    )
+    registry.setWorld(world_lv)
+
+    pyg4ometry.gdml.Constant("half", 0.5, registry)
+    pyg4ometry.gdml.Constant("size", "2*half", registry)
+    pyg4ometry.gdml.Constant("unused", 3, registry)
+
+    lar = g4.MaterialCompound("lar", 1.39, 1, registry)
+    lar.add_element_natoms(g4.ElementSimple("Ar", "Ar", 18, 39.95, registry), 1)
+    lar.addVecProperty("RINDEX", [1.0, 5.0], [1.23, 1.23])
+    unused_mat = g4.MaterialCompound("water", 1.0, 1, registry)
+    unused_mat.add_element_natoms(g4.ElementSimple("H", "H", 1, 1, registry), 2)
+    unused_mat.addVecProperty("RINDEX", [1.0, 5.0], [1.33, 1.33])
+
+    box = g4.solid.Box("box", "size", 1, 1, registry, "m")
+    hole = g4.solid.Orb("hole", 0.1, registry, "m")
+    det = g4.solid.Subtraction("det", box, hole, [[0, 0, 0], [0, 0, 0]], registry)
+    det_lv = g4.LogicalVolume(det, lar, "det", registry)
+    g4.PhysicalVolume([0, 0, 0], [0, 0, 0], det_lv, "det", world_lv, registry)
+
+    # a detached volume tree.
+    unused = g4.solid.Box("unused", 1, 1, 1, registry, "m")
+    unused_lv = g4.LogicalVolume(unused, unused_mat, "unused", registry)
+    inner_lv = g4.LogicalVolume(hole, lar, "inner", registry)
+    g4.PhysicalVolume([0, 0, 0], [0, 0, 0], inner_lv, "inner", unused_lv, registry)
+    g4.solid.OpticalSurface("os", "polished", "glisur", "dielectric_metal", 1, registry)
+
+    result = prune_registry(registry)
+    assert result["defines"] == (5, 3)
+    assert result["materials"] == (5, 3)
+    assert result["solids"] == (6, 4)
+    assert result["logical_volumes"] == (4, 2)
+    assert result["physical_volumes"] == (2, 1)
+    assert result["bytes"] > 0
+    assert set(registry.defineDict) == {"half", "size", "lar_RINDEX"}
+
+    write_pygeom(registry, tmp_path / "pruned.gdml")
+    registry = pyg4ometry.gdml.Reader(tmp_path / "pruned.gdml").getRegistry()
+    assert set(registry.logicalVolumeDict) == {"world", "det"}
+
+
+def test_registry_hash():
+    from pygeomtools import RemageDetectorInfo
+
+    def _make_registry(order, uid=0, color=(1, 0, 0, 1), metadata=None):
+        registry = g4.Registry()
+        world = g4.solid.Box("world", 2, 2, 2, registry, "m")
+        world_lv = g4.LogicalVolume(
+            world, g4.MaterialPredefined("G4_Galactic"), "world", registry
+        )
+        registry.setWorld(world_lv)
+
+        solids = {
+            "a": g4.solid.Box("a", 10, 10, 10, registry),
+            "b": g4.solid.Tubs("b", 0, 10, 10, 0, 2 * np.pi, registry),
+        }
+        for name in order:
+            lv = g4.LogicalVolume(
+                solids[name], g4.MaterialPredefined("G4_Ge"), name, registry
+            )
+            lv.pygeom_color_rgba = color
+            pv = g4.PhysicalVolume(
+                [0, 0, 0], [0, 0, 100 * ord(name)], lv, name, world_lv, registry
+            )
+            pv.set_pygeom_active_detector(
+                RemageDetectorInfo("germanium", uid + ord(name), metadata)
+            )
+        return registry
+
+    h = get_registry_hash(_make_registry("ab"))
+    assert h == get_registry_hash(_make_registry("ab"))
+    assert h == get_registry_hash(_make_registry("ba"))
+    assert h != get_registry_hash(_make_registry("ab", uid=1))
+    assert h != get_registry_hash(_make_registry("ab", color=(0, 1, 0, 1)))
+
+    # the order of the keys in the detector metadata is not relevant.
+    h_meta = get_registry_hash(_make_registry("ab", metadata={"x": 1, "y": [2]}))
+    assert h_meta != h
+    assert h_meta == get_registry_hash(
+        _make_registry("ab", metadata={"y": [2], "x": 1})
+    )
+    assert h_meta != get_registry_hash(_make_registry("ab", metadata={"x": 1}))
+
+    reg = _make_registry("ab")
+    reg.logicalVolumeDict["a"].solid.pX = 11
+    assert h != get_registry_hash(reg)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pyg4ometry.geant4 as g4
+import pytest
+from pyg4ometry import gdml
+
+from pygeomtools import (
+    RemageDetectorInfo,
+    detectors,
+    load_snapshot,
+    save_snapshot,
+    write_pygeom,
+)
+from pygeomtools.snapshot import is_snapshot
+
+
+def test_snapshot(tmp_path):
+    reg = g4.Registry()
+    world = g4.solid.Box("world", 2, 2, 2, reg, "m")
+    world_lv = g4.LogicalVolume(
+        world, g4.MaterialPredefined("G4_Galactic"), "world", reg
+    )
+    reg.setWorld(world_lv)
+
+    lar = g4.MaterialCompound("lar", 1.39, 1, reg)
+    lar.add_element_natoms(g4.ElementSimple("Ar", "Ar", 18, 39.95, reg), 1)
+    scint = g4.solid.Box("scint", 0.5, 1, 1, reg, "m")
+    scint_lv = g4.LogicalVolume(scint, lar, "scint", reg)
+    scint_lv.pygeom_color_rgba = [0, 0, 1, 0.2]
+    scint_pv = g4.PhysicalVolume([0, 0, 0], [0, 0, 0], scint_lv, "scint", world_lv, reg)
+
+    det = g4.solid.Subtraction(
+        "det",
+        g4.solid.Box("box", 10, 10, 10, reg),
+        g4.solid.Orb("hole", 2, reg),
+        [[0, 0, 0], [5, 0, 0]],
+        reg,
+    )
+    det_lv = g4.LogicalVolume(det, g4.MaterialPredefined("G4_Ge"), "det", reg)
+    det_pv = g4.PhysicalVolume([0, 0, 0], [0, 0, 0], det_lv, "det", scint_lv, reg)
+    det_pv.pygeom_active_detector = RemageDetectorInfo("germanium", 1, {"a": 1})
+
+    osurf = g4.solid.OpticalSurface(
+        "os", "polished", "glisur", "dielectric_metal", 1, reg
+    )
+    g4.BorderSurface("bs", scint_pv, det_pv, osurf, reg)
+
+    save_snapshot(reg, tmp_path / "geom.snapshot")
+    assert is_snapshot(tmp_path / "geom.snapshot")
+
+    reg2 = load_snapshot(tmp_path / "geom.snapshot")
+    assert reg2.worldVolume.name == "world"
+    assert reg2.logicalVolumeDict["scint"].pygeom_color_rgba == [0, 0, 1, 0.2]
+    assert reg2.logicalVolumeDict["det"].mesh is None
+    det2 = reg2.physicalVolumeDict["det"]
+    assert det2.pygeom_active_detector == RemageDetectorInfo("germanium", 1, {"a": 1})
+    assert reg2.surfaceDict["bs"].physref2 is det2
+
+    # the snapshot can be written as normal GDML file.
+    write_pygeom(reg2, tmp_path / "geom.gdml")
+    sensvols = detectors.get_all_sensvols(
+        gdml.Reader(tmp_path / "geom.gdml").getRegistry()
+    )
+    assert sensvols["det"].metadata == {"a": 1}
+
+    # snapshots of registries read from GDML keep the committed auxiliary data.
+    save_snapshot(
+        gdml.Reader(tmp_path / "geom.gdml").getRegistry(), tmp_path / "r.snap"
+    )
+    reg3 = load_snapshot(tmp_path / "r.snap", mesh=True)
+    assert detectors.get_all_sensvols(reg3)["det"].uid == 1
+    assert reg3.logicalVolumeDict["det"].mesh is not None
+
+
+def test_no_snapshot(tmp_path):
+    (tmp_path / "geom.gdml").write_text("<gdml/>")
+    assert not is_snapshot(tmp_path / "geom.gdml")
+    with pytest.raises(RuntimeError, match="not a registry snapshot"):
+        load_snapshot(tmp_path / "geom.gdml")
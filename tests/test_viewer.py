@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import concurrent.futures
+import copy
 import json
+import os
 from pathlib import Path
+from types import SimpleNamespace
 
+import h5py
 import lh5
+import numpy as np
+import pyg4ometry.geant4 as g4
 import pytest
 import vtk
 from lgdo import Array, Table, VectorOfVectors
+from pyg4ometry import config as meshconfig
 from pyg4ometry import gdml
+from pyg4ometry import visualisation as pyg4vis
+from pyg4ometry.transformation import tbxyz2matrix
+from vtk.util import numpy_support
 
-from pygeomtools import viewer
+from pygeomtools import save_snapshot, viewer
 
 
 def _offscreen_gl_available() -> bool:
@@ -28,6 +39,12 @@ def _offscreen_gl_available() -> bool:
         return False
 
 
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYGEOMTOOLS_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
 @pytest.fixture
 def points_file(tmp_path):
     file = tmp_path / "points.lh5"
@@ -46,6 +63,427 @@ def points_file(tmp_path):
     return str(file)
 
 
+def test_load_points(tmp_path):
+    points = np.arange(30, dtype=np.float64).reshape(10, 3)
+
+    np.save(tmp_path / "points.npy", points)
+    npy_points = viewer._load_points_npy(str(tmp_path / "points.npy"))
+    assert isinstance(npy_points, np.memmap)
+    pd = viewer._points_to_polydata(npy_points)
+    assert pd.GetNumberOfPoints() == 10
+    assert pd.GetNumberOfVerts() == 10
+    assert pd.GetPoint(3) == tuple(points[3])
+
+    # lh5 writes chunked datasets, that are read in bulk.
+    tab = Table(
+        {c: Array(points[:, i], attrs={"units": "m"}) for i, c in enumerate("xyz")}
+    )
+    lh5.write(tab, "vtx", tmp_path / "flat.lh5", wo_mode="of")
+    assert viewer._memmap_lh5_array(str(tmp_path / "flat.lh5"), "vtx/x") is None
+    loaded = viewer._load_points(str(tmp_path / "flat.lh5"), "vtx", list("xyz"), 5)
+    assert np.array_equal(loaded, points[:5] * 1000)
+
+    # contiguous datasets are memory-mapped.
+    with h5py.File(tmp_path / "contiguous.h5", "w") as f:
+        f.create_group("vtx").attrs["units"] = "cm"
+        for i, c in enumerate("xyz"):
+            f["vtx"].create_dataset(c, data=points[:, i])
+    assert (
+        viewer._memmap_lh5_array(str(tmp_path / "contiguous.h5"), "vtx/x") is not None
+    )
+    loaded = viewer._load_points(
+        str(tmp_path / "contiguous.h5"), "vtx", list("xyz"), None
+    )
+    assert np.array_equal(loaded, points * 10)
+
+
+def test_load_points_chunked(tmp_path):
+    rows = [[0.1 * i] * (i % 3 + 1) for i in range(10)]
+    for i in range(2):
+        data = {"evtid": Array(np.arange(10) % 4 + 10 * i)}
+        for c in ("xloc", "yloc", "zloc"):
+            data[c] = VectorOfVectors(rows, attrs={"units": "m"})
+        lh5.write(Table(data), "stp/test", tmp_path / f"points{i}.lh5", wo_mode="of")
+    file = str(tmp_path / "points0.lh5")
+    columns = ["xloc", "yloc", "zloc"]
+
+    # the selection is the same for all chunk sizes.
+    full = viewer._load_points(file, "stp/test", columns, None, None, 3)
+    assert full.shape == (sum(map(len, rows)), 3)
+    assert np.allclose(full[:, 0], np.concatenate(rows) * 1000)
+
+    expected = np.concatenate([rows[i] for i in (1, 5, 9)]) * 1000
+    for buffer_len in (1, 3, 100):
+        evt = viewer._load_points(file, "stp/test", columns, None, 1, buffer_len)
+        assert np.allclose(evt[:, 2], expected)
+    limited = viewer._load_points(file, "stp/test", columns, 6, 1, 4)
+    assert np.allclose(limited[:, 2], expected[:5])
+
+    entries = [
+        {"file": str(tmp_path / "points*.lh5"), "table": "stp/test", "n_rows": 2},
+        {"file": [file, file], "table": "stp/test", "evtid": 1},
+    ]
+    multi, double = viewer._load_scene_points(entries)
+    assert len(multi) == 2 * 3
+    assert np.array_equal(double, np.concatenate([evt, evt]))
+
+    with pytest.raises(ValueError, match="no points file"):
+        viewer._load_scene_points([{"file": str(tmp_path / "missing*.lh5")}])
+
+
+def test_event_index(tmp_path, cache_dir, monkeypatch):
+    # events are not sorted, and event 1 is split in two row ranges.
+    evtids = [0, 0, 1, 1, 2, 3, 1]
+    data = {"evtid": Array(np.array(evtids))}
+    for c in ("xloc", "yloc", "zloc"):
+        data[c] = VectorOfVectors(
+            [[float(i)] * (i + 1) for i in range(7)], attrs={"units": "mm"}
+        )
+    file = str(tmp_path / "events.lh5")
+    lh5.write(Table(data), "stp/test", file, wo_mode="of")
+
+    for chunk_size in (1, 2, 100):
+        index = viewer._build_event_index(file, "stp/test", chunk_size)
+        assert index[0].tolist() == [0, 1, 1, 2, 3]
+        assert index[1].tolist() == [0, 2, 6, 4, 5]
+        assert index[2].tolist() == [2, 4, 7, 5, 6]
+
+    index = viewer._EventIndex(file, "stp/test")
+    assert index.events.tolist() == [0, 1, 2, 3]
+    assert index.rows(1) == [(2, 4), (6, 7)]
+    assert index.rows(5) == []
+    columns = ["xloc", "yloc", "zloc"]
+    assert np.array_equal(
+        index.load(1, columns), viewer._load_points(file, "stp/test", columns, None, 1)
+    )
+    assert len(list((cache_dir / "events").iterdir())) == 1
+
+    # the cached index is used.
+    monkeypatch.setattr(viewer, "_build_event_index", None)
+    assert viewer._EventIndex(file, "stp/test").rows(1) == [(2, 4), (6, 7)]
+
+
+def test_mesh_cache(cache_dir, monkeypatch):
+    def _read():
+        monkeypatch.setattr(meshconfig, "doMeshing", False)
+        registry = gdml.Reader(Path(__file__).parent / "geometry.gdml").getRegistry()
+        monkeypatch.setattr(meshconfig, "doMeshing", True)
+        return registry
+
+    registry = _read()
+    assert not any(hasattr(lv, "mesh") for lv in registry.logicalVolumeDict.values())
+    viewer._mesh_volumes(registry.worldVolume)
+    n_cached = len(list((cache_dir / "meshes").iterdir()))
+    assert 0 < n_cached <= len(registry.logicalVolumeDict)
+
+    for lv in registry.logicalVolumeDict.values():
+        vertices, polygons, count = lv.mesh.localmesh.toVerticesAndPolygons()
+        ref_vertices, ref_polygons, _ = lv.solid.mesh().toVerticesAndPolygons()
+        assert count == len(polygons) == len(ref_polygons)
+        assert np.allclose(vertices, ref_vertices)
+
+    # the second time, all meshes are loaded from the cache.
+    with monkeypatch.context() as m:
+        m.setattr(viewer._ArrayMesh, "from_solid", None)
+        registry = _read()
+        viewer._mesh_volumes(registry.worldVolume)
+        assert all(lv.mesh is not None for lv in registry.logicalVolumeDict.values())
+
+    # meshing in parallel gives the same meshes.
+    serial, parallel = _read(), _read()
+    viewer._mesh_volumes(serial.worldVolume, cache=False, max_workers=1)
+    viewer._mesh_volumes(parallel.worldVolume, cache=False, max_workers=2)
+    for name, lv in serial.logicalVolumeDict.items():
+        other = parallel.logicalVolumeDict[name].mesh
+        assert np.array_equal(lv.mesh.vertices, other.vertices)
+        assert np.array_equal(lv.mesh.connectivity, other.connectivity)
+
+    # worker processes are only forked on linux.
+    with monkeypatch.context() as m:
+        m.setattr(viewer.sys, "platform", "darwin")
+        m.setattr(concurrent.futures, "ProcessPoolExecutor", None)
+        registry = _read()
+        viewer._mesh_volumes(registry.worldVolume, cache=False, max_workers=2)
+        assert all(lv.mesh is not None for lv in registry.logicalVolumeDict.values())
+
+    # changed mesh settings do not use the same cache entries.
+    monkeypatch.setattr(meshconfig.SolidDefaults.Tubs, "nslice", 32)
+    viewer._mesh_volumes(_read().worldVolume)
+    assert len(list((cache_dir / "meshes").iterdir())) > n_cached
+
+    # the cached meshes are converted directly to the same polydata.
+    for lv in serial.logicalVolumeDict.values():
+        polydata = lv.mesh.to_polydata()
+        ref = pyg4vis.Convert.pycsgMeshToVtkPolyData(lv.mesh)
+        assert np.array_equal(
+            numpy_support.vtk_to_numpy(polydata.GetPoints().GetData()),
+            numpy_support.vtk_to_numpy(ref.GetPoints().GetData()),
+        )
+        for f in ("GetOffsetsArray", "GetConnectivityArray"):
+            assert np.array_equal(
+                numpy_support.vtk_to_numpy(getattr(polydata.GetPolys(), f)()),
+                numpy_support.vtk_to_numpy(getattr(ref.GetPolys(), f)()),
+            )
+
+
+def test_mesh_cache_eviction(cache_dir, monkeypatch):
+    reg = g4.Registry()
+    box = g4.solid.Box("box", 1, 1, 1, reg)
+    for i in range(4):
+        viewer._build_mesh(box, str(i), True)
+    cache_files = sorted((cache_dir / "meshes").iterdir())
+    size = cache_files[0].stat().st_size
+    for i, f in enumerate(cache_files):
+        os.utime(f, (i, i))
+
+    # loading a mesh marks it as recently used.
+    assert viewer._load_cached_mesh("0") is not None
+    monkeypatch.setenv("PYGEOMTOOLS_MESH_CACHE_SIZE", "0")
+    viewer._prune_mesh_cache(2 * size)
+    assert sorted(f.name for f in (cache_dir / "meshes").iterdir()) == [
+        "0.npz",
+        "3.npz",
+    ]
+
+    # the size is taken from the environment by default.
+    viewer._prune_mesh_cache()
+    assert list((cache_dir / "meshes").iterdir()) == []
+
+    viewer._build_mesh(box, "0", True)
+    viewer.vis_gdml_cli(["--clear-mesh-cache"])
+    assert list((cache_dir / "meshes").iterdir()) == []
+    with pytest.raises(SystemExit):
+        viewer.vis_gdml_cli([])
+
+
+def test_hidden_volumes(monkeypatch):
+    monkeypatch.setattr(meshconfig, "doMeshing", False)
+    registry = gdml.Reader(Path(__file__).parent / "geometry.gdml").getRegistry()
+    world = registry.worldVolume
+    world.pygeom_color_rgba = False
+    registry.logicalVolumeDict["Orb"].pygeom_color_rgba = [1, 0, 0, 0]
+
+    scenes = {
+        "color_overrides": {"Sphere": False},
+        "exclude": ["Box.*"],
+        "exclude_subtrees": ["MotherOrb"],
+    }
+    hidden, pruned = viewer._hidden_volumes(world, scenes)
+    assert hidden == {"World", "Orb", "Sphere", "Box", "BoxWithHole", "BoxAndOrb"}
+    assert pruned == {"MotherOrb"}
+
+    hidden_incl, _ = viewer._hidden_volumes(world, {"include": ["Tubs", "Box.*"]})
+    assert hidden_incl == {"World", "Orb", "Sphere", "MotherOrb", "Polycone"}
+
+    viewer._mesh_volumes(
+        world, cache=False, max_workers=1, hidden=hidden, pruned=pruned
+    )
+    meshed = {
+        name
+        for name, lv in registry.logicalVolumeDict.items()
+        if getattr(lv, "mesh", None) is not None
+    }
+    assert meshed == {"Tubs", "Polycone"}
+
+    v = pyg4vis.VtkViewerColouredNew(defaultCutters=False, axisCubeWidget=False)
+    with viewer._skip_volumes(world, hidden, pruned):
+        v.addLogicalVolume(world)
+    assert set(v.instanceVisOptions) == {"Tubs", "Polycone"}
+    # the original geometry tree is restored.
+    assert world.type == "logical"
+    assert len(registry.logicalVolumeDict["MotherOrb"].daughterVolumes) == 1
+    viewer._color_recursive(world, v, scenes["color_overrides"])
+
+
+def test_merge_vis_options():
+    registry = gdml.Reader(Path(__file__).parent / "geometry.gdml").getRegistry()
+    v = pyg4vis.VtkViewerColouredNew(defaultCutters=False, axisCubeWidget=False)
+    v.addLogicalVolume(registry.worldVolume)
+    viewer._color_recursive(
+        registry.worldVolume, v, {"World": False, "Box.*": [1, 0, 0, 1]}
+    )
+    v.instanceVisOptions["BoxAndOrb2"][0].depth = 2
+    v.instanceVisOptions["Orb"][0].lineWidth = 2
+    assert len({str(vo) for vos in v.instanceVisOptions.values() for vo in vos}) == 5
+
+    viewer._merge_vis_options(v)
+    merged = {str(vo) for vos in v.instanceVisOptions.values() for vo in vos}
+    # world, red volumes and all other volumes with the default color.
+    assert len(merged) == 3
+    assert v.instanceVisOptions["Box"][0] is v.instanceVisOptions["BoxAndOrb2"][0]
+    assert v.instanceVisOptions["Box"][0].depth == 0
+
+    v.addClipper([0, 0, 0], [0, 1, 0], bClipperCloseCuts=True)
+    v.buildPipelinesAppend()
+    assert len(v.actors) == 2 * len(merged)
+
+    for actor in v.actors.values():
+        actor.GetMapper().Update()
+    n_cells = {
+        k: a.GetMapper().GetInput().GetNumberOfCells() for k, a in v.actors.items()
+    }
+    viewer._bake_static_actors(v)
+    for k, actor in v.actors.items():
+        producer = actor.GetMapper().GetInputAlgorithm()
+        assert isinstance(producer, vtk.vtkTrivialProducer)
+        assert actor.GetMapper().GetInput().GetNumberOfCells() == n_cells[k]
+
+
+def test_instancing():
+    rng = np.random.default_rng(1)
+    angles = rng.uniform(-np.pi, np.pi, size=(20, 3))
+    rotations = np.array([tbxyz2matrix(a) for a in angles])
+    scales = rng.uniform(0.5, 2, size=(20, 3))
+
+    quaternions, decomposed_scales = viewer._rotations_and_scales(
+        rotations @ (scales[:, :, np.newaxis] * np.eye(3))
+    )
+    assert np.allclose(decomposed_scales, scales)
+    for q, rot in zip(quaternions, rotations, strict=True):
+        m = np.zeros((3, 3))
+        vtk.vtkMath.QuaternionToMatrix3x3(q, m)
+        assert np.allclose(m, rot)
+
+    # reflections cannot be instanced.
+    assert viewer._rotations_and_scales(np.diag([1, 1, -1])[np.newaxis]) is None
+
+    reg = g4.Registry()
+    world = g4.solid.Box("world", 1000, 1000, 1000, reg)
+    world_lv = g4.LogicalVolume(world, "G4_Galactic", "world", reg)
+    reg.setWorld(world_lv)
+    box = g4.LogicalVolume(g4.solid.Box("box", 10, 20, 40, reg), "G4_Ge", "box", reg)
+    for i in range(12):
+        g4.PhysicalVolume(
+            angles[i].tolist(), [30 * i, 0, 0], box, f"box{i}", world_lv, reg
+        )
+
+    v = pyg4vis.VtkViewerColouredNew(defaultCutters=False, axisCubeWidget=False)
+    v.addLogicalVolume(world_lv)
+    # placements with two different colors.
+    vis_options = v.instanceVisOptions["box"]
+    for i, vo in enumerate(vis_options):
+        vis_options[i] = copy.copy(vo)
+        if i % 2:
+            vis_options[i].colour = [1, 0, 0]
+    viewer._build_pipelines_instanced(v, 10)
+
+    assert {"box_instanced_0", "box_instanced_1"} <= set(v.actors)
+    for i in range(2):
+        mapper = v.actors[f"box_instanced_{i}"].GetMapper()
+        assert isinstance(mapper, vtk.vtkGlyph3DMapper)
+        assert mapper.GetInput().GetNumberOfPoints() == 6
+    # the world is not instanced.
+    assert len(v.actors) == 3
+
+    # the instanced placements cover the same space as the meshes transformed by the
+    # usual pipeline of pyg4ometry.
+    v_ref = pyg4vis.VtkViewerColouredNew(defaultCutters=False, axisCubeWidget=False)
+    v_ref.addLogicalVolume(world_lv)
+    v_ref.instanceVisOptions["box"] = vis_options
+    # the world shares the visualization options with the first group of boxes.
+    del v_ref.instancePlacements["world"]
+    v_ref.buildPipelinesAppend()
+    for i in range(2):
+        mapper = v.actors[f"box_instanced_{i}"].GetMapper()
+        source = numpy_support.vtk_to_numpy(mapper.GetSource().GetPoints().GetData())
+        instances = mapper.GetInput()
+        translations = numpy_support.vtk_to_numpy(instances.GetPoints().GetData())
+        quaternions = numpy_support.vtk_to_numpy(
+            instances.GetPointData().GetArray("orientation")
+        )
+        scales = numpy_support.vtk_to_numpy(instances.GetPointData().GetArray("scale"))
+
+        points = []
+        for t, q, s in zip(translations, quaternions, scales, strict=True):
+            rot = np.zeros((3, 3))
+            vtk.vtkMath.QuaternionToMatrix3x3(q, rot)
+            points.append(source @ (rot * s).T + t)
+        points = np.concatenate(points)
+
+        # the groups of placements are ordered by their first placement.
+        ref_mapper = v_ref.actors[str(vis_options[i])].GetMapper()
+        ref_mapper.Update()
+        ref = ref_mapper.GetInput()
+        assert ref.GetNumberOfPoints() == len(points)
+        bounds = np.stack([points.min(axis=0), points.max(axis=0)], axis=1).flatten()
+        assert np.allclose(bounds, ref.GetBounds())
+
+
+def test_scalar_points(tmp_path, points_file):
+    columns = ["xloc", "yloc", "zloc"]
+    loaded = viewer._load_points(points_file, "stp/test", columns, None, 1, 1, "xloc")
+    assert loaded.shape == (3, 4)
+    assert np.allclose(loaded[:, 3], [-0.3, 0.4, -0.5])
+    assert np.allclose(loaded[:, 0], loaded[:, 3] * 1000)
+
+    # flat tables, loaded in bulk.
+    tab = Table(
+        {
+            **{c: Array(np.arange(4.0), attrs={"units": "m"}) for c in columns},
+            "edep": Array(np.array([1, 10, 100, 1000]), attrs={"units": "keV"}),
+        }
+    )
+    lh5.write(tab, "vtx", tmp_path / "flat.lh5", wo_mode="of")
+    loaded = viewer._load_points(
+        str(tmp_path / "flat.lh5"), "vtx", columns, 3, scalar="edep"
+    )
+    assert np.array_equal(loaded[:, 3], [1, 10, 100])
+
+    v = SimpleNamespace(ren=vtk.vtkRenderer())
+    viewer._add_points(
+        v,
+        loaded[:, :3],
+        scalars=loaded[:, 3],
+        scalar_opts={"column": "edep", "log": True},
+    )
+    mapper = v.points.GetMapper()
+    assert mapper.GetScalarVisibility()
+    assert mapper.GetScalarRange() == (1, 100)
+    assert mapper.GetLookupTable().GetScale() == vtk.VTK_SCALE_LOG10
+    assert mapper.GetInput().GetPointData().GetScalars().GetNumberOfTuples() == 3
+
+
+def test_point_cloud_lod():
+    rng = np.random.default_rng(1)
+    points = rng.normal(size=(100_000, 3)) * 1000
+
+    grid, cells, centers, counts = viewer._voxel_density(points, 20, chunk_size=30_000)
+    assert counts.sum() == len(points)
+    assert max(grid[2]) == 21
+    ids = viewer._voxel_ids(points, grid)
+    assert np.array_equal(np.unique(ids), cells)
+    assert np.allclose(centers[0], points[ids == cells[0]].mean(axis=0))
+
+    order, offsets = viewer._voxel_order(points, grid, cells, counts, chunk_size=30_000)
+    assert np.array_equal(np.sort(order), np.arange(len(points)))
+    assert np.array_equal(ids[order], np.sort(ids))
+    assert np.array_equal(np.diff(offsets), counts)
+
+    v = SimpleNamespace(ren=vtk.vtkRenderer())
+    lod = viewer._PointCloudLOD(v, points, max_points=10_000, bins=20)
+    cam = v.ren.GetActiveCamera()
+    cam.SetFocalPoint(0, 0, 0)
+    cam.SetPosition(0, 0, 20000)
+    assert lod.update()
+    assert lod.mode == "density"
+    assert lod.actor.GetMapper().GetInput().GetNumberOfPoints() == len(cells)
+    assert not lod.update()
+
+    # zooming in shows the full resolution points.
+    cam.SetViewAngle(5)
+    cam.SetPosition(0, 0, 2000)
+    assert lod.update()
+    assert lod.mode == "points"
+    n_shown = lod.actor.GetMapper().GetInput().GetNumberOfPoints()
+    assert 0 < n_shown <= 10_000
+    assert n_shown == lod.counts[lod.visible].sum()
+    shown = numpy_support.vtk_to_numpy(
+        lod.actor.GetMapper().GetInput().GetPoints().GetData()
+    )
+    selected = np.isin(ids, cells[lod.visible])
+    assert np.array_equal(shown, points[selected])
+
+
 @pytest.mark.skipif(
     not _offscreen_gl_available(),
     reason="no offscreen GL backend (EGL/OSMesa) available",
@@ -104,6 +542,7 @@ def test_viewer(tmp_path, points_file):
     vis_scene["clipper"] = [
         {"origin": [0, 0, 0], "normal": [0, 1, 0], "close_cuts": True}
     ]
+    vis_scene["merge_actors"] = True
     vis_scene["export_and_exit"] = output_file
     viewer.visualize(registry, vis_scene)
 
@@ -114,9 +553,31 @@ def test_viewer(tmp_path, points_file):
     vis_scene["points"] = [
         {"file": points_file, "table": "stp/test", "size": 20, "color": [1, 0, 0, 1]}
     ]
+    np.save(tmp_path / "points.npy", np.zeros((5, 3)))
+    vis_scene["points"].append({"file": str(tmp_path / "points.npy")})
+    vis_scene["points"].append(
+        {"file": str(tmp_path / "points.npy"), "lod": {"max_points": 2}}
+    )
+    vis_scene["points"].append(
+        {
+            "file": points_file,
+            "table": "stp/test",
+            "scalar": {"column": "zloc", "range": [-0.5, 0.5]},
+        }
+    )
     vis_scene["export_and_exit"] = output_file
     viewer.visualize(registry, vis_scene)
 
+    # test the event display.
+    output_file = tmp_path / "test_viewer_events.png"
+    output_file.unlink(missing_ok=True)
+
+    del vis_scene["points"]
+    vis_scene["events"] = {"file": points_file, "table": "stp/test", "evtid": 1}
+    vis_scene["export_and_exit"] = output_file
+    viewer.visualize(registry, vis_scene)
+    assert output_file.exists()
+
 
 @pytest.mark.filterwarnings("ignore:.*:DeprecationWarning")
 def test_viewer_cli(tmp_path, points_file):
@@ -152,3 +613,17 @@ def test_viewer_cli(tmp_path, points_file):
             str(geom),
         ]
     )
+
+    # test loading a registry snapshot.
+    output_file = tmp_path / "test_viewer_cli_snapshot.png"
+    output_file.unlink(missing_ok=True)
+
+    snapshot = tmp_path / "geometry.snapshot"
+    save_snapshot(gdml.Reader(geom).getRegistry(), snapshot)
+    vis_scene["export_and_exit"] = str(output_file)
+    tmp_scene.write_text(json.dumps(vis_scene))
+    with pytest.raises(ValueError, match="--snapshot"):
+        viewer.vis_gdml_cli(["--scene", str(tmp_scene), str(snapshot)])
+    assert not output_file.exists()
+    viewer.vis_gdml_cli(["--scene", str(tmp_scene), "--snapshot", str(snapshot)])
+    assert output_file.exists()
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pint
+import pyg4ometry.geant4 as g4
+import pytest
+from pyg4ometry import gdml
+
+from pygeomtools import (
+    Region,
+    RemageDetectorInfo,
+    get_sensvol_by_uid,
+    patch_pygeom_aux,
+    write_pygeom,
+    write_pygeom_aux_only,
+    write_pygeom_batch,
+)
+from pygeomtools.geometry import get_registry_hash
+from pygeomtools.utils import _zstd_module, open_gdml, read_gdml
+from pygeomtools.write import _new_gdml_writer, write_pygeom_batch_cli
+
+u = pint.get_application_registry()
+
+
+def _make_registry(scint_radius=0.5):
+    reg = g4.Registry()
+    world = g4.solid.Box("world", 2, 2, 2, reg, "m")
+    world_lv = g4.LogicalVolume(
+        world, g4.MaterialPredefined("G4_Galactic"), "world", reg
+    )
+    reg.setWorld(world_lv)
+
+    lar = g4.MaterialCompound("lar", 1.39, 1, reg)
+    lar.add_element_natoms(g4.ElementSimple("Ar", "Ar", 18, 39.95, reg), 1)
+    lar.addVecProperty("RINDEX", [1.0, 5.0], [1.23, 1.23])
+    scint = g4.solid.Tubs("scint", 0, scint_radius, 1, 0, 6.28, reg, "m")
+    scint_lv = g4.LogicalVolume(scint, lar, "scint", reg)
+    scint_lv.pygeom_color_rgba = [0, 0, 1, 0.2]
+    scint_pv = g4.PhysicalVolume([0, 0, 0], [0, 0, 0], scint_lv, "scint", world_lv, reg)
+
+    box = g4.solid.Box("box", 0.1, 0.1, 0.1, reg, "m")
+    hole = g4.solid.Orb("hole", 20, reg)
+    det = g4.solid.Subtraction("det", box, hole, [[0.1, 0, 0], [10, 0, 0]], reg)
+    det_lv = g4.LogicalVolume(det, g4.MaterialPredefined("G4_Ge"), "det", reg)
+    det_lv.pygeom_color_rgba = [1, 0, 0, 1]
+    for i in range(3):
+        det_pv = g4.PhysicalVolume(
+            [0, 0, 0.2 * i], [0, 0, 200 * i], det_lv, f"det{i}", scint_lv, reg
+        )
+        det_pv.set_pygeom_active_detector(
+            RemageDetectorInfo("germanium", i, {"name": f"det{i}"})
+        )
+
+    osurf = g4.solid.OpticalSurface(
+        "os", "polished", "glisur", "dielectric_metal", 1, reg
+    )
+    osurf.addVecProperty("REFLECTIVITY", [1.0, 5.0], [0.1, 0.5])
+    g4.BorderSurface("bs", scint_pv, det_pv, osurf, reg)
+
+    region = Region("my_region")
+    region.add_volume(det_lv)
+    region.set_cuts(0.1 * u.mm)
+    region.add_to_gdml(reg)
+
+    return reg
+
+
+def test_streaming_writer(tmp_path):
+    reg = _make_registry()
+    write_pygeom(reg, tmp_path / "stream.gdml")
+
+    # the streamed output has to be identical to the DOM-based writer.
+    w = _new_gdml_writer()
+    w.addDetector(reg)
+    w.write(str(tmp_path / "dom.gdml"))
+
+    assert Path(tmp_path / "stream.gdml").read_bytes() == (
+        Path(tmp_path / "dom.gdml").read_bytes()
+    )
+    gdml.Reader(tmp_path / "stream.gdml").getRegistry()
+
+
+def test_streaming_writer_aux_only(tmp_path):
+    reg = g4.Registry()
+    region = Region("my_region")
+    region.add_volume("volume")
+    region.set_cuts(0.1 * u.mm)
+    region.add_to_gdml(reg)
+
+    write_pygeom_aux_only(reg, tmp_path / "stream.gdml")
+
+    w = _new_gdml_writer()
+    for aux in reg.userInfo:
+        w.writeAuxiliary(aux)
+    w.write(str(tmp_path / "dom.gdml"))
+
+    assert Path(tmp_path / "stream.gdml").read_bytes() == (
+        Path(tmp_path / "dom.gdml").read_bytes()
+    )
+
+
+@pytest.mark.parametrize("ext", ["gz", "xz", "zst"])
+def test_compressed_gdml(tmp_path, ext):
+    if ext == "zst":
+        try:
+            _zstd_module()
+        except RuntimeError:
+            pytest.skip("zstandard not available")
+
+    write_pygeom(_make_registry(), tmp_path / "plain.gdml")
+    write_pygeom(_make_registry(), tmp_path / f"compressed.gdml.{ext}")
+    write_pygeom_aux_only(g4.Registry(), tmp_path / f"aux.gdml.{ext}")
+
+    plain = (tmp_path / "plain.gdml").read_text()
+    with open_gdml(tmp_path / f"compressed.gdml.{ext}") as f:
+        assert f.read() == plain
+    assert (tmp_path / f"compressed.gdml.{ext}").stat().st_size < len(plain)
+
+    reg = read_gdml(tmp_path / f"compressed.gdml.{ext}")
+    assert get_sensvol_by_uid(reg, 2)[0] == "det2"
+    # the streaming reader gives the same registry as the reader of pyg4ometry.
+    assert get_registry_hash(reg) == get_registry_hash(
+        gdml.Reader(tmp_path / "plain.gdml").getRegistry()
+    )
+
+
+def test_modular_gdml(tmp_path):
+    def _make_modular_registry(meta):
+        reg = _make_registry()
+        # border surfaces spanning different modules cannot be read by pyg4ometry.
+        reg.surfaceDict.clear()
+        reg.physicalVolumeDict["det2"].pygeom_active_detector.metadata = meta
+        gdml.Constant("unused", 1, reg)
+        return reg
+
+    main_file = tmp_path / "geom.gdml"
+    module_file = tmp_path / "geom.scint.gdml"
+    write_pygeom(_make_modular_registry({}), main_file, modules=["scint"])
+
+    # module files are referenced relative to the main file.
+    assert '<file name="geom.scint.gdml"/>' in main_file.read_text()
+    assert '<world ref="scint"/>' in module_file.read_text()
+
+    # each file only contains the defines it needs.
+    assert "unused" not in main_file.read_text()
+    assert "unused" not in module_file.read_text()
+    assert "lar_RINDEX" not in main_file.read_text()
+    assert "lar_RINDEX" in module_file.read_text()
+
+    reg = read_gdml(module_file)
+    assert reg.worldVolume.name == "scint"
+    assert len(reg.worldVolume.daughterVolumes) == 3
+
+    # unchanged files are not written again.
+    mtimes = (main_file.stat().st_mtime_ns, module_file.stat().st_mtime_ns)
+    write_pygeom(_make_modular_registry({}), main_file, modules=["scint"])
+    assert (main_file.stat().st_mtime_ns, module_file.stat().st_mtime_ns) == mtimes
+
+    # metadata changes only touch the main file.
+    write_pygeom(_make_modular_registry({"a": 1}), main_file, modules=["scint"])
+    assert main_file.stat().st_mtime_ns != mtimes[0]
+    assert module_file.stat().st_mtime_ns == mtimes[1]
+
+    # the list of modules is part of the stored hash.
+    write_pygeom(
+        _make_modular_registry({}), main_file, modules=["scint"], skip_unchanged=True
+    )
+    write_pygeom(_make_modular_registry({}), main_file, skip_unchanged=True)
+    assert "<file " not in main_file.read_text()
+    assert len(read_gdml(main_file).worldVolume.daughterVolumes) == 1
+
+
+def test_skip_unchanged(tmp_path):
+    gdml_file = tmp_path / "geom.gdml"
+    write_pygeom(_make_registry(), gdml_file, skip_unchanged=True)
+    assert "<!-- pygeomtools registry hash: " in gdml_file.read_text()
+    gdml.Reader(gdml_file).getRegistry()
+
+    mtime = gdml_file.stat().st_mtime_ns
+    write_pygeom(_make_registry(), gdml_file, skip_unchanged=True)
+    assert gdml_file.stat().st_mtime_ns == mtime
+
+    reg = _make_registry()
+    reg.physicalVolumeDict["det1"].pygeom_active_detector.uid = 5
+    write_pygeom(reg, gdml_file, skip_unchanged=True)
+    assert gdml_file.stat().st_mtime_ns != mtime
+    assert get_sensvol_by_uid(read_gdml(gdml_file), 5)[0] == "det1"
+
+
+@pytest.mark.parametrize("ext", ["", ".gz"])
+def test_patch_aux(tmp_path, ext):
+    def _make_patched_registry():
+        reg = _make_registry()
+        reg.physicalVolumeDict["det1"].pygeom_active_detector.metadata = {"a": 1}
+        reg.logicalVolumeDict["det"].pygeom_color_rgba = [0, 1, 0, 1]
+        return reg
+
+    gdml_file = tmp_path / f"geom.gdml{ext}"
+    write_pygeom(_make_registry(), gdml_file, skip_unchanged=True)
+    write_pygeom(_make_patched_registry(), tmp_path / "full.gdml")
+
+    patch_pygeom_aux(_make_patched_registry(), gdml_file)
+    with open_gdml(gdml_file) as f:
+        assert f.read() == (tmp_path / "full.gdml").read_text()
+
+    reg = read_gdml(gdml_file)
+    assert get_sensvol_by_uid(reg, 1)[1].metadata == {"a": 1}
+
+    # removing all auxiliary data.
+    reg = g4.Registry()
+    reg.logicalVolumeDict["det"] = g4.LogicalVolume(
+        g4.solid.Orb("o", 1, reg), g4.MaterialPredefined("G4_Ge"), "det", reg
+    )
+    patch_pygeom_aux(reg, gdml_file, tmp_path / "empty.gdml")
+    text = (tmp_path / "empty.gdml").read_text()
+    assert "<userinfo" not in text
+    assert text.count('auxtype="rmg_color"') == 1
+    assert '<volume name="det">\n\t\t\t<materialref' in text
+
+
+def _build_variant(config):
+    reg = _make_registry(config["radius"])
+    reg.physicalVolumeDict["det0"].pygeom_active_detector.metadata = config["meta"]
+    return reg
+
+
+def test_write_batch(tmp_path):
+    configs = [
+        {"meta": {"a": 1}, "radius": 0.5},
+        {"meta": {"a": 2}, "radius": 0.5},
+        {"meta": {"a": 1}, "radius": 0.6},
+    ]
+    gdml_files = [tmp_path / f"variant{i}.gdml" for i in range(3)]
+    results = write_pygeom_batch(
+        _build_variant, configs, gdml_files, skip_unchanged=True, max_workers=1
+    )
+    assert results == ["written", "patched", "written"]
+
+    for config, gdml_file in zip(configs, gdml_files, strict=True):
+        write_pygeom(
+            _build_variant(config), tmp_path / "single.gdml", skip_unchanged=True
+        )
+        assert gdml_file.read_text() == (tmp_path / "single.gdml").read_text()
+
+    results = write_pygeom_batch(
+        _build_variant, configs, gdml_files, skip_unchanged=True, max_workers=2
+    )
+    assert results == ["unchanged"] * 3
+
+    for i, config in enumerate(configs):
+        (tmp_path / f"cfg{i}.json").write_text(json.dumps(config))
+    write_pygeom_batch_cli(
+        [
+            "--builder",
+            "test_write:_build_variant",
+            "--output-dir",
+            str(tmp_path),
+            "--suffix",
+            ".gdml.gz",
+            "--skip-unchanged",
+            *(str(tmp_path / f"cfg{i}.json") for i in range(3)),
+        ]
+    )
+    with open_gdml(tmp_path / "cfg1.gdml.gz") as f:
+        assert f.read() == (tmp_path / "variant1.gdml").read_text()
+
+
+def test_canonical(tmp_path):
+    def _make_canonical_registry(reverse, offset):
+        reg = g4.Registry()
+        world = g4.solid.Box("world", 2, 2, 2, reg, "m")
+        world_lv = g4.LogicalVolume(
+            world, g4.MaterialPredefined("G4_Galactic"), "world", reg
+        )
+        reg.setWorld(world_lv)
+
+        gdml.Constant("z", 0.1 * (1 + offset), reg)
+        gdml.Constant("a", "2*z", reg)
+
+        ge = g4.MaterialPredefined("G4_Ge")
+        names = ["det_b", "det_a"] if reverse else ["det_a", "det_b"]
+        for name in names:
+            solid = g4.solid.Box(name, 0.1 * (1 + offset), 0.1, 0.1, reg, "m")
+            lv = g4.LogicalVolume(solid, ge, name, reg)
+            pv = g4.PhysicalVolume(
+                [0, 0, 0],
+                [0.2 * (name == "det_b") * (1 + offset), 0, 0],
+                lv,
+                name,
+                world_lv,
+                reg,
+            )
+            pv.set_pygeom_active_detector(
+                RemageDetectorInfo("germanium", 1 + (name == "det_b"))
+            )
+        return reg
+
+    write_pygeom(
+        _make_canonical_registry(False, 0), tmp_path / "a.gdml", canonical=True
+    )
+    write_pygeom(
+        _make_canonical_registry(True, 1e-15), tmp_path / "b.gdml", canonical=True
+    )
+    write_pygeom(_make_canonical_registry(True, 0), tmp_path / "c.gdml")
+
+    text = (tmp_path / "a.gdml").read_text()
+    assert text == (tmp_path / "b.gdml").read_text()
+    assert text != (tmp_path / "c.gdml").read_text()
+    # dependencies are still written first.
+    assert text.index('name="z"') < text.index('name="a"')
+    assert text.index('name="det_a"') < text.index('name="det_b"')
+
+    reg = read_gdml(tmp_path / "a.gdml")
+    assert get_sensvol_by_uid(reg, 2)[0] == "det_b"